@@ -2,47 +2,67 @@
 Backend Flask pour le projet CAN 2025 - ISMAGI
 ================================================
 INSTRUCTIONS:
-1. Installez les dépendances: pip install flask flask-cors pandas numpy scikit-learn playwright flask_swagger_ui bs4
+1. Installez les dépendances: pip install flask flask-cors pandas numpy scikit-learn playwright flask_swagger_ui bs4 lxml
 1.1 executer la commande : python -m playwright install
 2. Lancez le serveur: python app.py
+   (plusieurs workers : gunicorn -w 4 -b 127.0.0.1:5001 "app:create_app()")
 3. Le serveur sera accessible sur http://localhost:5001
 
 Chaque camarade doit compléter sa fonction correspondante.
 """
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request, send_from_directory
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
 import pandas as pd
 import numpy as np
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 from datetime import datetime
 import csv
+import functools
+import shutil
+import threading
+import time
 
 import os
 from preprocessing import PreprocessingPipeline
-
-URL = "https://www.cafonline.com/fr/can2025/calendrier-resultats/"
-
-
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Permet toutes les origines pour le développement
+from sessions import DEFAULT_SESSION, SessionManager
+from dataset_cache import DatasetCache
+from data_catalog import DataCatalog
+from viz_aggregates import VizAggregateStore, export_csv, VIZ_FILES, DAY_ORDER
+from columnar_storage import read_dataset, remove_dataset
+from jobs import Job, JobManager
+from browser_pool import BrowserPool
+from fixture_parser import parse_fixtures
+from match_details import DetailFetcher, update_matches
+from workflow_store import create_state_store
+from step_cache import step_key
+from http_cache import conditional_json
+from viz_scatter import SCATTER_MODES, scatter_density, scatter_sample
+from olap_cube import CUBE_DIMENSIONS, OlapCubeStore
+from upload_stream import stream_upload
+from metrics import Counter, Gauge, MetricsRegistry
+from profiler import SamplingProfiler
+from lazy_imports import parse_subsystems, preload_in_background, status as subsystems_status
+
+# Surchargeable pour scraper une copie locale (ex: backend/fixtures/caf_calendar.html servie en HTTP)
+URL = os.environ.get("CAN2025_MATCHES_URL", "https://www.cafonline.com/fr/can2025/calendrier-resultats/")
+
+# Navigateurs Playwright réutilisés entre les scrapings (lancés au premier appel, un pool par application)
+BROWSER_POOL_SIZE = int(os.environ.get("CAN2025_BROWSER_POOL_SIZE", "1"))
+
+# Pages de détail des matchs (stade, coup d'envoi) : lien trouvé dans la fixture, sinon ce gabarit ({match_id})
+MATCH_DETAIL_URL = os.environ.get("CAN2025_MATCH_DETAIL_URL") or None
+SCRAPE_CONCURRENCY = int(os.environ.get("CAN2025_SCRAPE_CONCURRENCY", "8"))
+SCRAPE_RATE_PER_HOST = float(os.environ.get("CAN2025_SCRAPE_RATE", "4"))
+
+
+# Les routes sont déclarées sur un blueprint ; create_app() construit l'application
+api = Blueprint("api", __name__)
 
 # Configuration Swagger
 SWAGGER_URL = '/api/docs'  # URL pour accéder à l'interface Swagger
 API_URL = '/static/swagger.json'  # URL vers le fichier de spec
 
-swaggerui_blueprint = get_swaggerui_blueprint(
-    SWAGGER_URL,
-    API_URL,
-    config={
-        'app_name': "CAN 2025 Analysis API"
-    }
-)
-
-app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
-
-@app.route('/static/swagger.json')
+@api.route('/static/swagger.json')
 def send_swagger_spec():
     return send_from_directory(os.path.dirname(os.path.abspath(__file__)), 'swagger.json')
 
@@ -54,21 +74,28 @@ if not os.path.exists(DATA_PATH):
 # Suffixe pour les fichiers CSV
 DATA_PATH = DATA_PATH + "/"
 
+# Cache partagé des datasets (plafond mémoire optionnel en Mo, 0 = illimité)
+DATASET_CACHE_MAX_MB = int(os.environ.get("CAN2025_DATASET_CACHE_MAX_MB", "0"))
+dataset_cache = DatasetCache(max_bytes=DATASET_CACHE_MAX_MB * 1024 * 1024 or None, loader=read_dataset)
+
+# Catalogue des fichiers écrits (lignes, schéma, taille, hash) : les résumés ne relisent pas les CSV
+catalog = DataCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "data_catalog.json"))
+
+# On cherche d'abord dans public/data, puis dans le dossier courant (backend)
+DATASET_SEARCH_PATHS = [
+    f"{DATA_PATH}dataset_can_2025_FULL_CLEANED.csv",
+    f"{DATA_PATH}dataset_can_2025_realiste.csv",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_can_2025_FULL_CLEANED.csv"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_can_2025_realiste.csv")
+]
+
 def load_dataset():
-    """Charge le dataset principal pour les visualisations"""
+    """Charge le dataset principal pour les visualisations (via le cache partagé)"""
     try:
-        # On cherche d'abord dans public/data, puis dans le dossier courant (backend)
-        search_paths = [
-            f"{DATA_PATH}dataset_can_2025_FULL_CLEANED.csv",
-            f"{DATA_PATH}dataset_can_2025_realiste.csv",
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_can_2025_FULL_CLEANED.csv"),
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_can_2025_realiste.csv")
-        ]
-        
-        for path in search_paths:
-            if os.path.exists(path):
-                print(f"✅ Dataset chargé depuis: {path}")
-                return pd.read_csv(path)
+        for path in DATASET_SEARCH_PATHS:
+            df = dataset_cache.get(path)
+            if df is not None:
+                return df
         
         print("❌ Dataset non trouvé dans les chemins spécifiés")
         return None
@@ -76,100 +103,133 @@ def load_dataset():
         print(f"❌ Erreur lors du chargement du dataset: {str(e)}")
         return None
 
+def dataset_version():
+    """Identifiant de version du dataset courant (chemin résolu, mtime, taille), ou None"""
+    for path in DATASET_SEARCH_PATHS:
+        signature = DatasetCache.signature(path)
+        if signature is not None:
+            return "{}:{}:{}".format(*signature)
+    return None
+
+# Agrégats de visualisation partagés entre generate-all et les endpoints GET
+viz_store = VizAggregateStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "viz_aggregates.json"))
+
+def get_viz_artifacts():
+    """Retourne les agrégats de visualisation, recalculés seulement si le dataset a changé"""
+    return viz_store.get(dataset_version(), load_dataset)
+
+# Cube OLAP pour les requêtes filtrées (reconstruit seulement si le dataset a changé)
+cube_store = OlapCubeStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "olap_cube.npz"))
+
+def cube_filters():
+    """Filtres du cube lus dans la query string (?Categorie=Cat 1&Jour_Semaine=Samedi,Dimanche)"""
+    return {d: request.args[d].split(',') for d in CUBE_DIMENSIONS if d in request.args}
+
+
+# État du workflow et des jobs partagé entre workers (sqlite, file ou memory)
+STATE_STORE = os.environ.get("CAN2025_STATE_STORE", "sqlite")
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state")
+
+# Jobs en arrière-plan pour les tâches longues (scraping, entraînement...)
+JOB_WORKERS = int(os.environ.get("CAN2025_JOB_WORKERS", str(os.cpu_count() or 4)))
+
+# Instrumentation (exposée au format Prometheus sur /api/metrics)
+metrics = MetricsRegistry()
+http_latency = metrics.histogram("can2025_http_request_duration_seconds", "Durée des requêtes HTTP",
+                                 ["method", "route"])
+http_requests = metrics.counter("can2025_http_requests_total", "Requêtes HTTP traitées", ["method", "route", "status"])
+http_errors = metrics.counter("can2025_http_request_errors_total", "Requêtes HTTP en erreur serveur (5xx)",
+                              ["method", "route"])
+step_duration = metrics.histogram("can2025_pipeline_step_duration_seconds", "Durée des étapes du pipeline",
+                                  ["step", "cached"])
+step_cpu = metrics.counter("can2025_pipeline_step_cpu_seconds_total", "Temps CPU des étapes du pipeline",
+                           ["step", "cached"])
+predicted_rows = metrics.counter("can2025_predict_rows_total",
+                                 "Lignes prédites, par source (table de prix précalculée ou RandomForest)",
+                                 ["source"])
+
+def observe_step(step, cached, wall_s, cpu_s):
+    """Callback des pipelines (toutes sessions) : durée et CPU de chaque étape exécutée ou restaurée"""
+    step_duration.observe(wall_s, step=step, cached=str(cached).lower())
+    step_cpu.inc(cpu_s, step=step, cached=str(cached).lower())
+
+# Profileur des requêtes lentes (seuil en ms, 0 = désactivé) : profils .folded dans backend/profiles/
+PROFILE_SLOW_MS = int(os.environ.get("CAN2025_PROFILE_SLOW_MS", "0"))
+profiler = (SamplingProfiler(os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+                             PROFILE_SLOW_MS / 1000) if PROFILE_SLOW_MS else None)
+
+# Sous-systèmes dont les dépendances (scikit-learn, lxml, Playwright) sont préchargées en arrière-plan
+# une fois l'application prête ("all", liste "modeling,reduction" ou vide = chargement au premier usage)
+PRELOAD_SUBSYSTEMS = parse_subsystems(os.environ.get("CAN2025_PRELOAD", ""))
+
+def wants_async():
+    """Le client demande-t-il une exécution en arrière-plan (?async=1 ou {"async": true}) ?"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and bool(data.get('async'))
+
+def run_task(kind, fn, key=None):
+    """Exécute fn(job) -> (payload, code HTTP) tout de suite, ou en job si le client le demande
+
+    key : clé de déduplication des jobs (par défaut kind), cf. JobManager.submit.
+    """
+    if wants_async():
+        job, created = app_state().jobs.submit(kind, fn, key=key)
+        return jsonify({
+            "job_id": job.id,
+            "state": job.state,
+            "deduplicated": not created,
+            "status_url": f"/api/jobs/{job.id}"
+        }), 202
+    payload, status_code = fn(Job(kind))
+    return jsonify(payload), status_code
+
 
 # ============================================
 # TÂCHE 2: EXPORTATION (SCRAPING)
 # ============================================
-@app.route('/api/scrape/matches', methods=['POST'])
-def scrape_matches():
-    """Scrape real CAN 2025 matches and save to CSV"""
+def run_scrape_matches(job, browser_pool):
+    """Scrape real CAN 2025 matches and save to CSV, returns (payload, HTTP status)"""
 
     try:
-        html = ""
-        with sync_playwright() as p:
-            # 1. Launch browser with specific configurations to avoid detection
-            browser = p.chromium.launch(headless=True)
-            
-            # Use a real browser User-Agent so the site doesn't block the request
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-            )
-            
-            page = context.new_page()
-            
-            # 2. Navigate and wait for the data to actually load
-            # 'networkidle' waits until there are no more network requests (API calls finished)
-            page.goto(URL, wait_until="networkidle", timeout=60000)
-            
-            # Wait for a specific element that contains actual team names
-            page.wait_for_selector(".Opta-TeamName", timeout=15000)
-            
-            html = page.content()
-            browser.close()
+        # 1-2. Page chargée dans un navigateur du pool (contexte préchauffé, ressources lourdes bloquées)
+        job.update(10, step="fetch")
+        html = browser_pool.fetch_html(URL, wait_selector=".Opta-fixture")
 
-        # 3. Parse HTML
-        soup = BeautifulSoup(html, "html.parser")
-        
-        # We use a class selector instead of #Opta_0 in case the ID increments
-        fixtures = soup.find_all(class_="Opta-fixture")
+        # 3-4. Parse HTML : seuls les sous-arbres .Opta-fixture sont extraits (cf. fixture_parser)
+        job.update(70, step="parsing")
+        matches = parse_fixtures(html)
 
-        if not fixtures:
-            return jsonify({
+        if not matches:
+            return {
                 "error": "Scraper found 0 fixtures. The site structure might have changed or blocked the request."
-            }), 404
-
-        matches = []
-
-        def safe_text(el):
-            return el.get_text(strip=True) if el else None
+            }, 404
 
-        # 4. Extract + map to model
-        for f in fixtures:
-            date_ms = f.get("data-date")
-            
-            # Scores
-            home_score_el = f.select_one(".Opta-Score.Opta-Home .Opta-Team-Score")
-            away_score_el = f.select_one(".Opta-Score.Opta-Away .Opta-Team-Score")
-            
-            home_score = safe_text(home_score_el)
-            away_score = safe_text(away_score_el)
-
-            # Draw Logic
-            is_draw = False
-            if home_score is not None and away_score is not None:
-                is_draw = (home_score == away_score)
-
-            match = {
-                "match_id": f.get("data-match"),
-                "date": datetime.fromtimestamp(int(date_ms) / 1000).isoformat() if date_ms else None,
-                "status": safe_text(f.select_one("abbr")) or "Scheduled",
-                "stage": f.get("data-competition_stage") or "Group",
-
-                "home_team": safe_text(f.select_one(".Opta-Home .Opta-TeamName")),
-                "away_team": safe_text(f.select_one(".Opta-Away .Opta-TeamName")),
-
-                "home_score": int(home_score) if home_score and home_score.isdigit() else None,
-                "away_score": int(away_score) if away_score and away_score.isdigit() else None,
-
-                "winner_side": f.get("data-match_winner_side"),
-                "is_draw": is_draw,
-                "stadium": None
-            }
-            matches.append(match)
-
-        # 5. Save to CSV
-        df_matches = pd.DataFrame(matches)
+        # 5. Pages de détail en parallèle (stade, coup d'envoi), CSV mis à jour au fil des réponses
+        job.update(75, step="details")
         csv_filename = os.path.join(DATA_PATH, "CAN_2025_Matches.csv")
-        df_matches.to_csv(csv_filename, index=False)
+        fetcher = DetailFetcher(concurrency=SCRAPE_CONCURRENCY, rate_per_host=SCRAPE_RATE_PER_HOST)
+        matches, details = update_matches(matches, html, URL, csv_filename, url_template=MATCH_DETAIL_URL,
+                                          fetcher=fetcher, progress=lambda pct: job.update(75 + pct * 0.2))
+        catalog.record(csv_filename)
 
-        return jsonify({
+        return {
             "message": f"Successfully extracted {len(matches)} matches",
+            "details": details,
             "data": matches
-        })
+        }, 200
 
     except Exception as e:
         print(f"Scraping Error: {str(e)}") # Visible in your server logs
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@api.route('/api/scrape/matches', methods=['POST'])
+def scrape_matches():
+    """Scrape real CAN 2025 matches (add ?async=1 to run it as a background job)"""
+    # Le job tourne hors contexte d'application : le pool est lu ici
+    browser_pool = app_state().browser_pool
+    return run_task("scrape_matches", lambda job: run_scrape_matches(job, browser_pool))
 
 # ==========================================
 #  TÂCHES PRÉTRAITEMENT (3, 4, 5, 6)
@@ -180,14 +240,86 @@ BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 INPUT_CSV = os.path.join(BACKEND_DIR, "dataset_can_2025_realiste.csv")
 OUTPUT_CSV = os.path.join(DATA_PATH, "dataset_can_2025_FULL_CLEANED.csv")
 
-pipeline = PreprocessingPipeline(INPUT_CSV, OUTPUT_CSV)
-
-@app.route('/api/workflow/status', methods=['GET'])
+ARTIFACTS_DIR = os.path.join(BACKEND_DIR, "artifacts")
+CHECKPOINTS_DIR = os.path.join(BACKEND_DIR, "checkpoints")
+
+# Une session par analyste (X-Session-ID ou ?session=), sous budget mémoire global (0 = illimité),
+# au plus SESSION_MAX_LOADED pipelines nommés en mémoire, supprimées après SESSION_TTL_S d'inactivité (0 = jamais)
+SESSIONS_DIR = os.path.join(BACKEND_DIR, "sessions")
+SESSION_MEMORY_MB = int(os.environ.get("CAN2025_SESSION_MEMORY_MB", "0"))
+SESSION_MAX_LOADED = int(os.environ.get("CAN2025_SESSION_MAX_LOADED", "16"))
+SESSION_TTL_S = int(os.environ.get("CAN2025_SESSION_TTL_S", "86400"))
+SESSION_INPUT_CSV = "dataset_can_2025_realiste.csv"
+
+def create_session_pipeline(session_id, session_dir, state_kind=STATE_STORE):
+    """Pipeline d'une session nommée : son propre dataset (copie du dataset par défaut tant qu'aucun upload) et ses fichiers"""
+    input_csv = os.path.join(session_dir, SESSION_INPUT_CSV)
+    if not os.path.exists(input_csv) and os.path.exists(INPUT_CSV):
+        try:
+            # Lien physique : pas de copie sur disque (les uploads remplacent le fichier, ils ne l'écrivent pas en place)
+            os.link(INPUT_CSV, input_csv)
+        except OSError:
+            shutil.copyfile(INPUT_CSV, input_csv)
+    session_pipeline = PreprocessingPipeline(
+        input_csv,
+        os.path.join(session_dir, "dataset_can_2025_FULL_CLEANED.csv"),
+        artifacts_dir=os.path.join(session_dir, "artifacts"),
+        checkpoints_dir=os.path.join(session_dir, "checkpoints"),
+        state_store=create_state_store(state_kind, session_dir),
+        catalog=catalog,
+        on_step=observe_step)
+    session_pipeline.sync_state()
+    if session_pipeline.artifacts_version is None and session_pipeline.restore_artifacts():
+        session_pipeline.publish_state()
+    return session_pipeline
+
+class AppState:
+    """État d'une application (cf. create_app) : deux applications d'un même processus ne partagent ni
+    store d'état, ni jobs, ni pipeline par défaut, ni sessions, ni navigateurs"""
+
+    def __init__(self, config):
+        self.state_store = create_state_store(config["STATE_STORE"], config["STATE_DIR"])
+        self.jobs = JobManager(max_workers=config["JOB_WORKERS"], store=self.state_store)
+        self.browser_pool = BrowserPool(size=config["BROWSER_POOL_SIZE"])
+        self.pipeline = PreprocessingPipeline(INPUT_CSV, config["OUTPUT_CSV"], artifacts_dir=config["ARTIFACTS_DIR"],
+                                              checkpoints_dir=config["CHECKPOINTS_DIR"], state_store=self.state_store,
+                                              catalog=catalog, on_step=observe_step)
+        self.sessions = SessionManager(config["SESSIONS_DIR"],
+                                       functools.partial(create_session_pipeline, state_kind=config["STATE_STORE"]),
+                                       self.pipeline, max_bytes=config["SESSION_MEMORY_MB"] * 1024 * 1024 or None,
+                                       max_sessions=config["SESSION_MAX_LOADED"] or None,
+                                       ttl_s=config["SESSION_TTL_S"] or None)
+
+def app_state():
+    """État de l'application qui traite la requête"""
+    return current_app.extensions["can2025"]
+
+def session_id():
+    """Identifiant de session de la requête (en-tête X-Session-ID ou ?session=), session par défaut sinon"""
+    return request.headers.get("X-Session-ID") or request.args.get("session") or DEFAULT_SESSION
+
+def session_pipeline():
+    """Pipeline de la session de la requête (ValueError si l'identifiant est invalide)"""
+    return app_state().sessions.get(session_id())
+
+def warm_start(pipeline):
+    """Démarrage à chaud : on relit l'état partagé ou le manifest, les artefacts sont chargés en arrière-plan"""
+    pipeline.sync_state()
+    if pipeline.artifacts_version is None and pipeline.restore_artifacts():
+        pipeline.publish_state()
+    if pipeline.artifacts_version is not None:
+        print(f"♻️  Artefacts restaurés (version {pipeline.artifacts_version})")
+        threading.Thread(target=pipeline.load_pending_artifacts, daemon=True).start()
+
+@api.route('/api/workflow/status', methods=['GET'])
 def workflow_status():
-    """Retourne l'état d'avancement du workflow"""
-    return jsonify(pipeline.get_workflow_status())
+    """Retourne l'état d'avancement du workflow de la session"""
+    try:
+        return jsonify(session_pipeline().get_workflow_status())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-@app.route('/api/scrape/stadiums', methods=['POST'])
+@api.route('/api/scrape/stadiums', methods=['POST'])
 def scrape_stadiums():
     """Simule le scraping des stades et sauvegarde en CSV"""
     try:
@@ -203,6 +335,7 @@ def scrape_stadiums():
         }
         df_stadiums = pd.DataFrame(stadiums_data)
         df_stadiums.to_csv(f"{DATA_PATH}CAN_2025_StadiumTerrain.csv", index=False)
+        catalog.record(f"{DATA_PATH}CAN_2025_StadiumTerrain.csv", df_stadiums)
         return jsonify({
             "message": "Données des stades extraites avec succès",
             "data": df_stadiums.to_dict(orient='records')
@@ -210,7 +343,7 @@ def scrape_stadiums():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/scrape/tickets', methods=['POST'])
+@api.route('/api/scrape/tickets', methods=['POST'])
 def scrape_tickets():
     """Simule le scraping des tickets et sauvegarde en CSV"""
     try:
@@ -238,6 +371,7 @@ def scrape_tickets():
                 })
         df_tickets = pd.DataFrame(tickets_rows)
         df_tickets.to_csv(f"{DATA_PATH}CAN_2025_Tickets.csv", index=False)
+        catalog.record(f"{DATA_PATH}CAN_2025_Tickets.csv", df_tickets)
         return jsonify({
             "message": "Données des tickets extraites avec succès",
             "data": df_tickets.to_dict(orient='records')
@@ -247,83 +381,122 @@ def scrape_tickets():
 
 
 # ============================================
-
-
-
+# TÂCHES 3 À 6: NETTOYAGE, SÉLECTION, TRANSFORMATION, RÉDUCTION
 # ============================================
 
+def step_params():
+    """Paramètres de l'étape envoyés dans le corps JSON (hors option async)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for k, v in data.items() if k != 'async'}
+
+def run_pipeline_step(kind, method_name):
+    """Exécute une étape du pipeline de la session (mémoïsée), en direct ou en job avec ?async=1"""
+    params = step_params()
+    sid = session_id()
+    sessions = app_state().sessions
+    try:
+        method = getattr(sessions.get(sid), method_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def run(job):
+        try:
+            result = method(params=params, progress=job.update)
+            return result, (400 if "error" in result else 200)
+        except Exception as e:
+            return {"error": str(e)}, 500
+        finally:
+            # Les nouvelles sorties comptent dans le budget : les sessions inactives libèrent les leurs
+            sessions.enforce_budget(keep=sid)
+
+    # Un même job peut tourner en parallèle dans deux sessions différentes, ou avec des paramètres différents
+    job_kind = kind if sid == DEFAULT_SESSION else f"{kind}@{sid}"
+    return run_task(job_kind, run, key=f"{job_kind}:{step_key(kind, None, params)[:16]}")
+
+@api.route('/api/task3_clean', methods=['POST'])
+def task3_clean():
+    """Étape 3: Nettoyage des données"""
+    return run_pipeline_step("task3_clean", "clean_data")
+
+@api.route('/api/task4_select', methods=['POST'])
+def task4_select():
+    """Étape 4: Sélection des variables"""
+    return run_pipeline_step("task4_select", "select_features")
+
+@api.route('/api/task5_transform', methods=['POST'])
+def task5_transform():
+    """Étape 5: Transformation des données"""
+    return run_pipeline_step("task5_transform", "transform_data")
+
+@api.route('/api/task6_reduce', methods=['POST'])
+def task6_reduce():
+    """Étape 6: Réduction de dimensionnalité"""
+    return run_pipeline_step("task6_reduce", "reduce_dimensions")
 
 
 # ============================================
-
-
-
+# TÂCHE 7: MODÉLISATION IA ET PRÉDICTION
 # ============================================
 
+# Taille maximale d'un lot de prédiction
+MAX_PREDICT_ROWS = 100_000
 
+@api.route('/api/task7_ai', methods=['POST'])
+def task7_ai():
+    """Étape 7: Entraînement du modèle RandomForest (?async=1 pour l'exécuter en job)"""
+    return run_pipeline_step("task7_ai", "train_model")
 
-
+@api.route('/api/predict', methods=['POST'])
+def predict_price():
+    """Prédit le prix d'un ou plusieurs billets (objet unique ou liste de lignes)"""
+    try:
+        current = session_pipeline()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        if not current.has_model():
+            return jsonify({"error": "Modèle non entraîné. Exécutez d'abord la Tâche 7 (Modélisation IA)."}), 503
+
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and isinstance(payload.get("rows"), list):
+            payload = payload["rows"]
+        single = isinstance(payload, dict)
+        rows = [payload] if single else payload
+
+        if not isinstance(rows, list) or not rows or not all(isinstance(r, dict) for r in rows):
+            return jsonify({"error": "Corps JSON invalide: objet ou liste d'objets attendu"}), 400
+        if len(rows) > MAX_PREDICT_ROWS:
+            return jsonify({"error": f"Lot trop volumineux (max {MAX_PREDICT_ROWS} lignes)"}), 413
+
+        # Encodage vectorisé de tout le lot ; table de prix, puis un seul appel au RandomForest pour le reste
+        prices, found = current.predict_with_source(pd.DataFrame.from_records(rows))
+        prices = np.round(prices, 2)
+        hits = int(found.sum())
+        predicted_rows.inc(hits, source="table")
+        predicted_rows.inc(len(rows) - hits, source="model")
+
+        if single:
+            return jsonify({"predicted_price": float(prices[0])})
+        return jsonify({"count": len(rows), "predictions": prices.tolist()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 
 # ============================================
 # TÂCHE 8: VISUALISATIONS AVANCÉES (GÉNÉRATION CSV)
 # ============================================
 
-@app.route('/api/viz/generate-all', methods=['POST'])
+@api.route('/api/viz/generate-all', methods=['POST'])
 def viz_generate_all():
     """Génère tous les fichiers CSV de visualisation à partir du dataset nettoyé"""
     try:
-        df = load_dataset()
-        if df is None:
+        artifacts = get_viz_artifacts()
+        if artifacts is None:
             return jsonify({"error": "Dataset non disponible pour la génération"}), 404
         
-        results = []
-
-        # 1. Price Distribution
-        if 'Prix_Final_MAD' in df.columns:
-            counts, bins = np.histogram(df['Prix_Final_MAD'], bins=15)
-            dist_data = []
-            for i in range(len(counts)):
-                dist_data.append({
-                    "label": f"{int(bins[i])}-{int(bins[i+1])}",
-                    "count": int(counts[i])
-                })
-            pd.DataFrame(dist_data).to_csv(f"{DATA_PATH}viz_price_distribution.csv", index=False)
-            results.append("viz_price_distribution.csv")
-
-        # 2. Category Pricing
-        if 'Categorie' in df.columns:
-            cat_pricing = df.groupby('Categorie')['Prix_Final_MAD'].agg(['min', 'mean', 'median', 'max']).reset_index()
-            cat_pricing.to_csv(f"{DATA_PATH}viz_category_pricing.csv", index=False)
-            results.append("viz_category_pricing.csv")
-
-        # 3. Morocco Effect
-        if 'Effet_Maroc' in df.columns:
-            morocco_effect = df.groupby('Effet_Maroc').agg({
-                'Prix_Final_MAD': 'mean',
-                'Indice_Demande': 'mean'
-            }).reset_index()
-            morocco_effect['Effet_Maroc'] = morocco_effect['Effet_Maroc'].map({1: 'Maroc', 0: 'Autres'})
-            morocco_effect.to_csv(f"{DATA_PATH}viz_morocco_effect.csv", index=False)
-            results.append("viz_morocco_effect.csv")
-
-        # 4. Venue Stats
-        if 'Ville' in df.columns:
-            venue_stats = df.groupby('Ville').agg({
-                'Prix_Final_MAD': 'mean',
-                'Indice_Demande': 'mean'
-            }).reset_index().sort_values(by='Prix_Final_MAD', ascending=False)
-            venue_stats.to_csv(f"{DATA_PATH}viz_venue_stats.csv", index=False)
-            results.append("viz_venue_stats.csv")
-
-        # 5. Day Demand
-        if 'Jour_Semaine' in df.columns:
-            day_order = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-            day_demand = df.groupby('Jour_Semaine')['Indice_Demande'].mean()
-            existing_days = [day for day in day_order if day in day_demand.index]
-            day_demand = day_demand.reindex(existing_days).reset_index()
-            day_demand.to_csv(f"{DATA_PATH}viz_day_demand.csv", index=False)
-            results.append("viz_day_demand.csv")
+        results = export_csv(artifacts, DATA_PATH, catalog=catalog)
 
         return jsonify({
             "status": "success",
@@ -333,143 +506,236 @@ def viz_generate_all():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/viz/price-distribution', methods=['GET'])
+def viz_artifact_response(name, error="Dataset non disponible"):
+    """Sert un agrégat précalculé au format JSON (ETag = version du dataset, 304 si inchangé)"""
+    def build():
+        artifacts = get_viz_artifacts()
+        if artifacts is None or name not in artifacts:
+            return {"error": error}, 404
+        return artifacts[name].to_dict(orient='records'), 200
+    return conditional_json(dataset_version(), build)
+
+@api.route('/api/viz/price-distribution', methods=['GET'])
 def viz_price_distribution():
-    # Gardé pour compatibilité, mais redirige vers le CSV si possible
-    df = load_dataset()
-    if df is None or 'Prix_Final_MAD' not in df.columns:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    counts, bins = np.histogram(df['Prix_Final_MAD'], bins=15)
-    dist_data = []
-    for i in range(len(counts)):
-        dist_data.append({
-            "label": f"{int(bins[i])}-{int(bins[i+1])}",
-            "count": int(counts[i])
-        })
-    return jsonify(dist_data)
+    return viz_artifact_response("price_distribution")
 
-@app.route('/api/viz/category-pricing', methods=['GET'])
+@api.route('/api/viz/category-pricing', methods=['GET'])
 def viz_category_pricing():
-    df = load_dataset()
-    if df is None or 'Categorie' not in df.columns:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    cat_pricing = df.groupby('Categorie')['Prix_Final_MAD'].agg(['min', 'mean', 'median', 'max']).reset_index()
-    return jsonify(cat_pricing.to_dict(orient='records'))
-
-@app.route('/api/viz/morocco-effect', methods=['GET'])
+    return viz_artifact_response("category_pricing")
+
+def viz_cube_response(group_by, columns, post=None):
+    """Version filtrée d'un agrégat, calculée depuis le cube OLAP (mêmes colonnes que l'agrégat complet)"""
+    filters = cube_filters()
+
+    def build():
+        cube = cube_store.get(dataset_version(), load_dataset)
+        if cube is None:
+            return {"error": "Dataset non disponible"}, 404
+        try:
+            # Le cube ne garde que les dimensions présentes dans le dataset chargé
+            result = cube.query(filters, [group_by])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        rows = [{c: row.get(c) for c in [group_by] + columns} for row in result]
+        return (post(rows) if post else rows), 200
+    return conditional_json(dataset_version(), build)
+
+@api.route('/api/viz/morocco-effect', methods=['GET'])
 def viz_morocco_effect():
-    df = load_dataset()
-    if df is None or 'Effet_Maroc' not in df.columns:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    morocco_effect = df.groupby('Effet_Maroc').agg({
-        'Prix_Final_MAD': 'mean',
-        'Indice_Demande': 'mean'
-    }).reset_index()
-    morocco_effect['Effet_Maroc'] = morocco_effect['Effet_Maroc'].map({1: 'Maroc', 0: 'Autres'})
-    return jsonify(morocco_effect.to_dict(orient='records'))
-
-@app.route('/api/viz/venue-stats', methods=['GET'])
+    if cube_filters():
+        labels = {1: 'Maroc', 0: 'Autres'}
+        return viz_cube_response('Effet_Maroc', ['Prix_Final_MAD', 'Indice_Demande'],
+                                 lambda rows: [dict(r, Effet_Maroc=labels.get(r['Effet_Maroc'])) for r in rows])
+    return viz_artifact_response("morocco_effect")
+
+@api.route('/api/viz/venue-stats', methods=['GET'])
 def viz_venue_stats():
-    df = load_dataset()
-    if df is None or 'Ville' not in df.columns:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    venue_stats = df.groupby('Ville').agg({
-        'Prix_Final_MAD': 'mean',
-        'Indice_Demande': 'mean'
-    }).reset_index().sort_values(by='Prix_Final_MAD', ascending=False)
-    return jsonify(venue_stats.to_dict(orient='records'))
-
-@app.route('/api/viz/correlation', methods=['GET'])
+    if cube_filters():
+        return viz_cube_response('Ville', ['Prix_Final_MAD', 'Indice_Demande'],
+                                 lambda rows: sorted(rows, key=lambda r: r['Prix_Final_MAD'], reverse=True))
+    return viz_artifact_response("venue_stats")
+
+@api.route('/api/viz/correlation', methods=['GET'])
 def viz_correlation():
-    df = load_dataset()
-    if df is None:
+    if dataset_version() is None:
         return jsonify({"error": "Dataset non disponible"}), 404
-    
-    cols = ['Prix_Final_MAD', 'Indice_Demande', 'Taux_Rareté', 'Score_Visibilite',
-            'Score_Rivalite', 'Valeur_Marchande_Totale_MEUR', 'Index_Stars_Total']
-    available_cols = [c for c in cols if c in df.columns]
-    
-    if not available_cols:
-        return jsonify({"error": "Colonnes non disponibles"}), 404
-        
-    corr_matrix = df[available_cols].corr().round(2)
-    corr_unstacked = corr_matrix.stack().reset_index()
-    corr_unstacked.columns = ['var1', 'var2', 'correlation']
-    return jsonify(corr_unstacked.to_dict(orient='records'))
+    return viz_artifact_response("correlation", error="Colonnes non disponibles")
 
-@app.route('/api/viz/day-demand', methods=['GET'])
+@api.route('/api/viz/day-demand', methods=['GET'])
 def viz_day_demand():
-    df = load_dataset()
-    if df is None or 'Jour_Semaine' not in df.columns:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    day_order = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-    day_demand = df.groupby('Jour_Semaine')['Indice_Demande'].mean()
-    # On filtre les jours qui existent dans le dataset
-    existing_days = [day for day in day_order if day in day_demand.index]
-    day_demand = day_demand.reindex(existing_days).reset_index()
-    return jsonify(day_demand.to_dict(orient='records'))
-
-@app.route('/api/viz/scatter', methods=['GET'])
+    if cube_filters():
+        return viz_cube_response('Jour_Semaine', ['Indice_Demande'],
+                                 lambda rows: sorted(rows, key=lambda r: DAY_ORDER.index(r['Jour_Semaine'])
+                                                     if r['Jour_Semaine'] in DAY_ORDER else len(DAY_ORDER)))
+    return viz_artifact_response("day_demand")
+
+@api.route('/api/viz/cube', methods=['GET'])
+def viz_cube():
+    """Requête libre sur le cube : ?group_by=Ville,Categorie&Categorie=Cat 1&Jour_Semaine=Samedi,Dimanche"""
+    group_by = [d for d in request.args.get('group_by', '').split(',') if d]
+    unknown = [d for d in group_by if d not in CUBE_DIMENSIONS]
+    if unknown:
+        return jsonify({"error": f"Dimension inconnue: {', '.join(unknown)} (disponibles: {', '.join(CUBE_DIMENSIONS)})"}), 400
+    filters = cube_filters()
+
+    def build():
+        cube = cube_store.get(dataset_version(), load_dataset)
+        if cube is None:
+            return {"error": "Dataset non disponible"}, 404
+        try:
+            # Le cube ne garde que les dimensions présentes dans le dataset chargé
+            rows = cube.query(filters, group_by)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"group_by": group_by, "filters": filters, "rows": rows}, 200
+    return conditional_json(dataset_version(), build)
+
+@api.route('/api/viz/scatter', methods=['GET'])
 def viz_scatter():
-    df = load_dataset()
-    if df is None:
-        return jsonify({"error": "Dataset non disponible"}), 404
-    
-    cols = ['Indice_Demande', 'Prix_Final_MAD', 'Categorie', 'Effet_Maroc']
-    available_cols = [c for c in cols if c in df.columns]
-    
-    scatter_data = df[available_cols].sample(n=min(500, len(df)))
-    return jsonify(scatter_data.to_dict(orient='records'))
+    """Demande × prix : échantillon stratifié (mode=sample) ou densité agrégée (mode=grid|hex)"""
+    mode = request.args.get('mode', 'sample')
+    if mode not in SCATTER_MODES:
+        return jsonify({"error": f"Mode inconnu: {mode} (attendu: {', '.join(SCATTER_MODES)})"}), 400
+    n = request.args.get('n', 500, type=int)
+    seed = request.args.get('seed', 42, type=int)
+    bins = request.args.get('bins', 30, type=int)
+
+    def build():
+        df = load_dataset()
+        if df is None:
+            return {"error": "Dataset non disponible"}, 404
+        if mode == 'sample':
+            return scatter_sample(df, n=n, seed=seed).to_dict(orient='records'), 200
+        return scatter_density(df, mode=mode, bins=bins), 200
+
+    # Résultat déterministe pour (dataset, paramètres) : servi avec ETag comme les autres viz
+    return conditional_json(dataset_version(), build)
 
 
 # ============================================
 # ROUTES UTILITAIRES
 # ============================================
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Vérifie que le serveur est en ligne"""
     return jsonify({"status": "ok", "message": "Serveur Flask CAN 2025 opérationnel"})
 
 
-@app.route('/api/data/summary', methods=['GET'])
+@api.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Liste les jobs en arrière-plan récents"""
+    return jsonify(app_state().jobs.list())
+
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """État, progression, durée des étapes et résultat d'un job"""
+    job = app_state().jobs.snapshot(job_id)
+    if job is None:
+        return jsonify({"error": f"Job inconnu: {job_id}"}), 404
+    return jsonify(job)
+
+
+@api.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    """Sessions ouvertes dans ce processus, mémoire occupée par leurs DataFrames et évictions"""
+    return jsonify(app_state().sessions.stats())
+
+
+@metrics.collector
+def collect_runtime_metrics():
+    """Compteurs déjà tenus par le cache des datasets et les sessions, lus au moment du scrape"""
+    sessions = app_state().sessions
+    cache = dataset_cache.stats()
+    cache_events = Counter("can2025_dataset_cache_events_total", "Accès au cache des datasets", ["result"])
+    for result in ("hits", "misses", "evictions"):
+        cache_events.inc(cache[result], result=result)
+    cache_hit_rate = Gauge("can2025_dataset_cache_hit_ratio", "Taux de succès du cache des datasets")
+    cache_hit_rate.set(cache["hit_rate"])
+    cache_bytes = Gauge("can2025_dataset_cache_bytes", "Mémoire occupée par les datasets en cache")
+    cache_bytes.set(cache["bytes"])
+
+    # Mémoire des DataFrames de chaque pipeline (pipeline.df et sorties des étapes)
+    pipeline_bytes = Gauge("can2025_pipeline_dataframe_bytes", "Mémoire des DataFrames du pipeline", ["session"])
+    for sid, size in sessions.memory_usage().items():
+        pipeline_bytes.set(size, session=sid)
+    evictions = Counter("can2025_session_evictions_total", "Libérations mémoire de sessions inactives")
+    evictions.inc(sessions.evictions)
+    unloaded = Counter("can2025_session_unloads_total", "Pipelines de sessions déchargés (au-delà du plafond)")
+    unloaded.inc(sessions.unloaded)
+    expired = Counter("can2025_session_expired_total", "Sessions supprimées après expiration")
+    expired.inc(sessions.expired)
+    loaded = Gauge("can2025_subsystem_loaded", "Dépendances du sous-système importées (1) ou non (0)", ["subsystem"])
+    for name, state in subsystems_status().items():
+        loaded.set(int(state["loaded"]), subsystem=name)
+    metrics_list = [cache_events, cache_hit_rate, cache_bytes, pipeline_bytes, evictions, unloaded, expired, loaded]
+    if profiler is not None:
+        profiles = Counter("can2025_slow_request_profiles_total", "Profils de requêtes lentes écrits")
+        profiles.inc(profiler.dumped)
+        metrics_list.append(profiles)
+    return metrics_list
+
+
+@api.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métriques du processus au format texte Prometheus"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@api.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Retourne les compteurs du cache des datasets (hits, misses, évictions)"""
+    return jsonify(dataset_cache.stats())
+
+
+@api.route('/api/data/summary', methods=['GET'])
 def data_summary():
-    """Retourne un résumé des données disponibles"""
-    # Note: load_data() n'est pas défini ici, on utilise load_dataset() ou des lectures directes
+    """Retourne un résumé des données disponibles (métadonnées du catalogue, sans relire les CSV)"""
+    files = {
+        "matches": f"{DATA_PATH}CAN_2025_Matches.csv",
+        "stadiums": f"{DATA_PATH}CAN_2025_StadiumTerrain.csv",
+        "tickets": f"{DATA_PATH}CAN_2025_Tickets.csv",
+    }
+    # Le dataset principal est le premier fichier présent dans les chemins de recherche
+    files["dataset"] = next((path for path in DATASET_SEARCH_PATHS if catalog.get(path) is not None),
+                            DATASET_SEARCH_PATHS[0])
+
+    def build():
+        return {"datasets": {name: catalog.rows(path) for name, path in files.items()}}, 200
+
     try:
-        summary = {
-            "matches": 0,
-            "stadiums": 0,
-            "tickets": 0,
-            "dataset": 0
-        }
-        
-        if os.path.exists(f"{DATA_PATH}CAN_2025_Matches.csv"):
-            summary["matches"] = len(pd.read_csv(f"{DATA_PATH}CAN_2025_Matches.csv"))
-        if os.path.exists(f"{DATA_PATH}CAN_2025_StadiumTerrain.csv"):
-            summary["stadiums"] = len(pd.read_csv(f"{DATA_PATH}CAN_2025_StadiumTerrain.csv"))
-        if os.path.exists(f"{DATA_PATH}CAN_2025_Tickets.csv"):
-            summary["tickets"] = len(pd.read_csv(f"{DATA_PATH}CAN_2025_Tickets.csv"))
-            
-        df = load_dataset()
-        if df is not None:
-            summary["dataset"] = len(df)
-            
-        return jsonify({"datasets": summary})
+        # Version = hash de contenu de chaque fichier (un fichier absent compte aussi)
+        version = "|".join(str(catalog.version(path)) for path in files.values())
+        return conditional_json(version, build)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/workflow/reset', methods=['POST'])
+@api.route('/api/data/catalog', methods=['GET'])
+def data_catalog():
+    """Métadonnées de tous les fichiers connus : lignes, schéma, taille, hash, date de génération"""
+    try:
+        return jsonify({"files": catalog.entries(), "rebuilds": catalog.rebuilds})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route('/api/workflow/reset', methods=['POST'])
 def reset_workflow():
     """Supprime les fichiers générés pour réinitialiser le workflow (total ou par page)"""
     try:
+        state = app_state()
+        sid = session_id()
+        if sid != DEFAULT_SESSION:
+            # Session nommée : son pipeline et ses fichiers (dataset uploadé compris) sont supprimés
+            state.sessions.drop(sid)
+            return jsonify({"status": "success", "message": f"Session '{sid}' supprimée."})
+
         # Réinitialiser aussi le statut du pipeline Python
-        pipeline.reset_workflow()
+        state.pipeline.reset_workflow()
+        dataset_cache.invalidate()
+        viz_store.invalidate()
+        cube_store.invalidate()
         
         # Récupérer le type de données à réinitialiser depuis le corps de la requête
         data = request.get_json(silent=True) or {}
@@ -480,13 +746,7 @@ def reset_workflow():
             'stadiums': [f"{DATA_PATH}CAN_2025_StadiumTerrain.csv"],
             'tickets': [f"{DATA_PATH}CAN_2025_Tickets.csv"],
             'preprocessing': [f"{DATA_PATH}dataset_can_2025_FULL_CLEANED.csv"],
-            'viz': [
-                f"{DATA_PATH}viz_price_distribution.csv",
-                f"{DATA_PATH}viz_category_pricing.csv",
-                f"{DATA_PATH}viz_morocco_effect.csv",
-                f"{DATA_PATH}viz_venue_stats.csv",
-                f"{DATA_PATH}viz_day_demand.csv"
-            ]
+            'viz': [f"{DATA_PATH}{filename}" for filename in VIZ_FILES.values()]
         }
         
         files_to_delete = []
@@ -500,9 +760,9 @@ def reset_workflow():
             
         deleted_count = 0
         for file_path in files_to_delete:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                deleted_count += 1
+            # Supprime aussi l'éventuel jumeau colonnaire (.feather)
+            deleted_count += remove_dataset(file_path)
+            catalog.forget(file_path)
                 
         return jsonify({
             "status": "success", 
@@ -512,35 +772,53 @@ def reset_workflow():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/task_import', methods=['POST'])
+@api.route('/api/task_import', methods=['POST'])
 def task_import():
     """Étape 1: Importation du dataset (Legacy/Internal)"""
-    try:
-        result = pipeline.import_dataset()
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return run_pipeline_step("task_import", "import_dataset")
+
+# Taille maximale d'un upload (en Mo, 0 = illimitée)
+UPLOAD_MAX_MB = int(os.environ.get("CAN2025_UPLOAD_MAX_MB", "0"))
 
-@app.route('/api/upload_dataset', methods=['POST'])
+@api.route('/api/upload_dataset', methods=['POST'])
 def upload_dataset():
-    """Endpoint pour permettre à l'utilisateur d'uploader son propre dataset"""
+    """Endpoint pour permettre à l'utilisateur d'uploader son propre dataset (dans sa session)
+
+    Formulaire multipart (champ file) ou corps brut text/csv (?filename=...), lu en flux dans les deux cas.
+    """
     try:
-        if 'file' not in request.files:
-            return jsonify({"error": "Aucun fichier envoyé"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
+        current = session_pipeline()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        if request.mimetype in ('text/csv', 'application/octet-stream'):
+            # Corps brut : lu directement depuis la socket, sans mise en tampon par Flask
+            source, filename = request.stream, request.args.get('filename', 'upload.csv')
+        else:
+            if 'file' not in request.files:
+                return jsonify({"error": "Aucun fichier envoyé"}), 400
+            file = request.files['file']
+            source, filename = file.stream, file.filename
+        if filename == '':
             return jsonify({"error": "Nom de fichier vide"}), 400
         
-        if file and file.filename.endswith('.csv'):
-            # On sauvegarde le fichier uploade à la place du input_csv attendu par le pipeline
-            file.save(INPUT_CSV)
+        if filename.endswith('.csv'):
+            # Fichier temporaire validé par morceaux puis renommé sur le input_csv de la session : un upload
+            # rejeté ou interrompu ne laisse rien, et les sessions liées à l'ancien fichier le gardent intact
+            input_csv = current.input_path
+            try:
+                frame, upload = stream_upload(source, input_csv, max_bytes=UPLOAD_MAX_MB * 1024 * 1024 or None)
+            except ValueError as e:
+                return jsonify({"error": f"Fichier rejeté: {e}"}), 400
+            dataset_cache.invalidate(input_csv)
+            catalog.record(input_csv, rows=upload["rows"], schema=upload["schema"], sha256=upload["sha256"])
             
-            # On déclenche l'importation dans le pipeline
-            result = pipeline.import_dataset()
+            # On déclenche l'importation dans le pipeline, sur les données déjà lues pendant le flux
+            result = current.import_dataset(frame=frame)
             return jsonify({
                 "message": "Fichier uploadé et importé avec succès",
-                "filename": file.filename,
+                "filename": filename,
+                "upload": {k: v for k, v in upload.items() if k != "schema"},
                 "pipeline_result": result
             })
         else:
@@ -550,6 +828,68 @@ def upload_dataset():
         return jsonify({"error": str(e)}), 500
 
 
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profile_token = profiler.start() if profiler is not None else None
+
+def record_request(status):
+    """Latence, compteurs et éventuel profil de la requête (une seule fois par requête)"""
+    if getattr(g, "request_start", None) is None:
+        return
+    duration = time.perf_counter() - g.request_start
+    g.request_start = None
+    # Libellé = règle de routage (et non l'URL) : un nombre de séries borné
+    route = request.url_rule.rule if request.url_rule is not None else "<non trouvée>"
+    http_latency.observe(duration, method=request.method, route=route)
+    http_requests.inc(method=request.method, route=route, status=status)
+    if status >= 500:
+        http_errors.inc(method=request.method, route=route)
+    if g.profile_token is not None:
+        path = profiler.stop(g.profile_token, duration, f"{request.method} {route}")
+        if path:
+            print(f"🐢 Requête lente {request.method} {request.path} ({duration * 1000:.0f} ms) : profil {path}")
+
+def finish_request(response):
+    record_request(response.status_code)
+    return response
+
+def abort_request(exc):
+    # Exception non gérée (propagée en debug) : comptée comme une erreur 500
+    if exc is not None:
+        record_request(500)
+
+def create_app(config=None):
+    """Fabrique de l'application : appelée une fois par processus (chaque worker gunicorn)
+
+    config : surcharges de la configuration (dossiers d'état, d'artefacts, de checkpoints, de sessions...),
+    ex. create_app({"STATE_STORE": "memory", "SESSIONS_DIR": "/tmp/sessions"}) pour une application de test.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(
+        STATE_STORE=STATE_STORE, STATE_DIR=STATE_DIR, JOB_WORKERS=JOB_WORKERS, BROWSER_POOL_SIZE=BROWSER_POOL_SIZE,
+        OUTPUT_CSV=OUTPUT_CSV, ARTIFACTS_DIR=ARTIFACTS_DIR, CHECKPOINTS_DIR=CHECKPOINTS_DIR,
+        SESSIONS_DIR=SESSIONS_DIR, SESSION_MEMORY_MB=SESSION_MEMORY_MB, SESSION_MAX_LOADED=SESSION_MAX_LOADED,
+        SESSION_TTL_S=SESSION_TTL_S)
+    app.config.update(config or {})
+    state = app.extensions["can2025"] = AppState(app.config)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})  # Permet toutes les origines pour le développement
+    swaggerui_blueprint = get_swaggerui_blueprint(
+        SWAGGER_URL,
+        API_URL,
+        config={
+            'app_name': "CAN 2025 Analysis API"
+        }
+    )
+    app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
+    app.register_blueprint(api)
+    app.before_request(start_request_timer)
+    app.after_request(finish_request)
+    app.teardown_request(abort_request)
+    warm_start(state.pipeline)
+    preload_in_background(PRELOAD_SUBSYSTEMS)
+    return app
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("🏆 Serveur Flask - CAN 2025 Analysis")
@@ -557,4 +897,4 @@ if __name__ == '__main__':
     print("📍 URL: http://127.0.0.1:5001")
     print("📊 Health check: http://127.0.0.1:5001/api/health")
     print("=" * 50)
-    app.run(debug=True, host='127.0.0.1', port=5001)
+    create_app().run(debug=True, host='127.0.0.1', port=5001)
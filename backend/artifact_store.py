@@ -0,0 +1,103 @@
+"""
+Stockage versionné des artefacts du pipeline
+============================================
+Chaque sauvegarde crée un dossier <timestamp>-<hash des données> contenant un
+fichier joblib par artefact (imputer, encodeurs, scalers, PCA, modèle...) et un
+manifest.json (variables, étapes terminées, hash des données). Le fichier
+CURRENT pointe vers la dernière version complète : il est écrit en dernier, de
+façon atomique, pour qu'une sauvegarde interrompue ne soit jamais chargée.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+ARTIFACT_FORMAT = 1
+
+
+def hash_dataframe(df):
+    """Hash de contenu (sha256) d'un DataFrame : valeurs, index et colonnes"""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ArtifactStore:
+    def __init__(self, root, keep_versions=3):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    @property
+    def _current_file(self):
+        return os.path.join(self.root, "CURRENT")
+
+    def current_version(self):
+        try:
+            with open(self._current_file, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def save(self, artifacts, manifest):
+        """Sauvegarde les artefacts dans une nouvelle version et la rend courante"""
+        data_hash = manifest.get("data_hash") or "nohash"
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{data_hash[:12]}"
+        version_dir = os.path.join(self.root, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        for name, obj in artifacts.items():
+            # Pas de compression : nécessaire pour pouvoir les recharger en mmap
+            joblib.dump(obj, os.path.join(version_dir, f"{name}.joblib"))
+
+        manifest = dict(manifest, format=ARTIFACT_FORMAT, version=version,
+                        artifacts=sorted(artifacts), created_at=datetime.now().isoformat())
+        with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        tmp_path = self._current_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_path, self._current_file)
+        self._prune()
+        return version
+
+    def load_manifest(self):
+        """Lit le manifest de la version courante (rapide, sans charger les artefacts)"""
+        version = self.current_version()
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(self.root, version, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            return None
+        return manifest
+
+    def load(self, name, version=None, mmap=True):
+        """Charge un artefact ; les tableaux numpy sont mappés en mémoire (lecture seule)"""
+        version = version or self.current_version()
+        path = os.path.join(self.root, version, f"{name}.joblib")
+        return joblib.load(path, mmap_mode="r" if mmap else None)
+
+    def clear(self):
+        """Supprime toutes les versions sauvegardées"""
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _prune(self):
+        """Ne conserve que les dernières versions"""
+        versions = sorted(
+            d for d in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, d))
+        )
+        current = self.current_version()
+        for old in versions[:-self.keep_versions]:
+            if old != current:
+                shutil.rmtree(os.path.join(self.root, old), ignore_errors=True)
@@ -0,0 +1,277 @@
+"""
+Benchmark des endpoints et du pipeline sur des datasets synthétiques
+====================================================================
+Pour chaque taille (10k lignes par défaut ; 1M et 10M avec --sizes), génère un
+dataset synthétique (cf. synthetic_dataset.py) puis mesure, dans le processus
+(client de test Flask, sans réseau) :
+
+- upload_dataset (flux + validation + import compact), import standard et import
+  restauré depuis son checkpoint
+- chaque étape du pipeline (task3 à task7) à froid, puis restaurée depuis son checkpoint
+- viz/generate-all, data/summary et tous les endpoints /api/viz/* : premier appel
+  (calcul des agrégats / du cube) puis --repeat appels
+
+Pour chaque mesure : latences p50/p90/p95/p99/max, débit (requêtes/s et lignes/s)
+et pic de RSS du processus pendant la mesure (échantillonné toutes les 5 ms).
+Tout s'exécute dans un dossier temporaire (cf. isolate_app) : public/data, les
+caches, l'état, les artefacts, les checkpoints et les sessions du backend ne sont
+ni lus ni modifiés. Les résultats (avec le commit git) sont écrits
+en JSON ; --compare affiche l'écart avec un fichier de résultats précédent.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_api.py [--sizes 10000 1000000 10000000] [--repeat 20] [--json resultats.json]
+                                   [--skip-steps] [--compare benchmarks/results/ancien.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_dataset import SyntheticDataset  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SESSION = "bench"
+
+VIZ_ENDPOINTS = [
+    "/api/viz/price-distribution",
+    "/api/viz/category-pricing",
+    "/api/viz/morocco-effect",
+    "/api/viz/morocco-effect?Categorie=Cat 1",
+    "/api/viz/venue-stats",
+    "/api/viz/venue-stats?Jour_Semaine=Samedi,Dimanche",
+    "/api/viz/day-demand",
+    "/api/viz/correlation",
+    "/api/viz/cube?group_by=Ville,Categorie",
+    "/api/viz/scatter?mode=sample&n=1000",
+    "/api/viz/scatter?mode=grid&bins=50",
+    "/api/viz/scatter?mode=hex&bins=50",
+]
+PIPELINE_STEPS = ["task3_clean", "task4_select", "task5_transform", "task6_reduce", "task7_ai"]
+
+
+class RssSampler:
+    """Pic de RSS (octets) du processus pendant un bloc, échantillonné dans un thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        except OSError:
+            # Hors Linux : pic depuis le démarrage du processus (ko sous Linux, octets sous macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+
+def isolate_app(workdir):
+    """Importe l'application et la construit avec tous ses fichiers dans workdir ; retourne (module, application)
+
+    Données, caches, store d'état et jobs, artefacts et checkpoints du pipeline par défaut, sessions.
+    Le dataset source (backend/dataset_can_2025_realiste.csv) n'est que lu.
+    """
+    import app as backend
+    from data_catalog import DataCatalog
+
+    # Fichiers de données et caches partagés par le module
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    backend.DATA_PATH = data_dir + "/"
+    backend.catalog = DataCatalog(os.path.join(workdir, "cache", "data_catalog.json"))
+    backend.viz_store.store_path = os.path.join(workdir, "cache", "viz_aggregates.json")
+    backend.cube_store.store_path = os.path.join(workdir, "cache", "olap_cube.npz")
+
+    # État propre à l'application (store, jobs, pipeline par défaut, sessions) : construit par create_app
+    app = backend.create_app({
+        "STATE_DIR": os.path.join(workdir, "state"),
+        "OUTPUT_CSV": os.path.join(data_dir, "dataset_can_2025_FULL_CLEANED.csv"),
+        "ARTIFACTS_DIR": os.path.join(workdir, "artifacts"),
+        "CHECKPOINTS_DIR": os.path.join(workdir, "checkpoints"),
+        "SESSIONS_DIR": os.path.join(workdir, "sessions"),
+    })
+    return backend, app
+
+
+def summarize(name, size, timings, rss_peak, status_codes, rows=None):
+    timings = np.asarray(timings)
+    total = float(timings.sum())
+    result = {
+        "name": name,
+        "rows": size,
+        "calls": int(len(timings)),
+        "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 3),
+        "p90_ms": round(float(np.percentile(timings, 90)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(timings, 99)) * 1000, 3),
+        "max_ms": round(float(timings.max()) * 1000, 3),
+        "throughput_rps": round(len(timings) / total, 2) if total else None,
+        "rows_per_s": round(rows * len(timings) / total) if rows and total else None,
+        "peak_rss_mb": round(rss_peak / 1e6, 1),
+        "status_codes": sorted(set(status_codes)),
+    }
+    print(f"{size:>10} {name:<52} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f} "
+          f"{result['throughput_rps'] or 0:>9.2f} {result['peak_rss_mb']:>9.1f}")
+    return result
+
+
+def measure(name, size, call, repeat=1, rows=None):
+    """Exécute call() repeat fois ; call retourne la réponse Flask"""
+    timings, codes = [], []
+    with RssSampler() as rss:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = call()
+            timings.append(time.perf_counter() - start)
+            codes.append(response.status_code)
+    if any(code >= 400 for code in codes):
+        print(f"⚠️ {name}: réponse {codes[-1]} {response.get_data(as_text=True)[:200]}")
+    return summarize(name, size, timings, rss.peak, codes, rows)
+
+
+def bench_size(app, backend, size, workdir, args):
+    client = app.test_client()
+    results = []
+    csv_path = os.path.join(workdir, f"can2025_{size}.csv")
+    start = time.perf_counter()
+    with RssSampler() as rss:
+        nbytes = SyntheticDataset().write_csv(csv_path, size, seed=args.seed)
+    results.append(summarize("generate_synthetic_csv", size, [time.perf_counter() - start], rss.peak, [200], size))
+    headers = {"X-Session-ID": SESSION}
+
+    # Upload en flux (validation + import compact) dans une session dédiée
+    def upload():
+        with open(csv_path, "rb") as f:
+            return client.post("/api/upload_dataset?filename=bench.csv", headers=headers, input_stream=f,
+                               content_type="text/csv", content_length=nbytes)
+    results.append(measure("upload_dataset (stream + import compact)", size, upload, rows=size))
+    results.append(measure("import_dataset (standard)", size, lambda: client.post(
+        "/api/task_import", headers=headers, json={"dtypes": "standard"}), rows=size))
+    results.append(measure("import_dataset (checkpoint)", size, lambda: client.post(
+        "/api/task_import", headers=headers, json={"dtypes": "compact"}), rows=size))
+
+    if not args.skip_steps:
+        for step in PIPELINE_STEPS:
+            results.append(measure(step, size, lambda: client.post(f"/api/{step}", headers=headers), rows=size))
+        for step in PIPELINE_STEPS:
+            results.append(measure(f"{step} (checkpoint)", size, lambda: client.post(f"/api/{step}", headers=headers),
+                                   repeat=args.repeat, rows=size))
+
+    # Visualisations et résumé sur le dataset généré
+    backend.DATASET_SEARCH_PATHS[:] = [csv_path]
+    results.append(measure("data_summary (first)", size, lambda: client.get("/api/data/summary")))
+    results.append(measure("data_summary", size, lambda: client.get("/api/data/summary"), repeat=args.repeat))
+    results.append(measure("viz_generate_all (first)", size, lambda: client.post("/api/viz/generate-all"), rows=size))
+    results.append(measure("viz_generate_all", size, lambda: client.post("/api/viz/generate-all"),
+                           repeat=args.repeat, rows=size))
+    for url in VIZ_ENDPOINTS:
+        results.append(measure(f"GET {url} (first)", size, lambda: client.get(url)))
+        results.append(measure(f"GET {url}", size, lambda: client.get(url), repeat=args.repeat))
+
+    app.extensions["can2025"].sessions.drop(SESSION)
+    os.remove(csv_path)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, path):
+    """Affiche le rapport p50 actuel / p50 de référence pour les mesures communes"""
+    with open(path, encoding="utf-8") as f:
+        reference = json.load(f)
+    previous = {(r["name"], r["rows"]): r for r in reference["results"]}
+    print(f"\nComparaison avec {path} (commit {reference.get('commit')})")
+    print(f"{'lignes':>10} {'mesure':<52} {'p50 réf.':>10} {'p50':>10} {'ratio':>7}")
+    for r in results:
+        old = previous.get((r["name"], r["rows"]))
+        if old and old["p50_ms"]:
+            ratio = r["p50_ms"] / old["p50_ms"]
+            flag = " ⚠️" if ratio > 1.2 else ""
+            print(f"{r['rows']:>10} {r['name']:<52} {old['p50_ms']:>10.2f} {r['p50_ms']:>10.2f} {ratio:>7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--repeat", type=int, default=20, help="Appels par mesure à chaud")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-steps", action="store_true", help="Ne mesure pas les étapes task3 à task7")
+    parser.add_argument("--json", help="Fichier de résultats (par défaut benchmarks/results/<commit>-<date>.json)")
+    parser.add_argument("--compare", help="Fichier de résultats de référence")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="can2025-bench-")
+    try:
+        backend, app = isolate_app(workdir)
+        print(f"{'lignes':>10} {'mesure':<52} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} "
+              f"{'req/s':>9} {'RSS (Mo)':>9}")
+        results = []
+        for size in args.sizes:
+            results.extend(bench_size(app, backend, size, workdir, args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sizes": args.sizes,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    path = args.json
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit or 'nogit'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
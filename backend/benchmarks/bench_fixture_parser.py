@@ -0,0 +1,112 @@
+"""
+Benchmark du parseur de matchs (fixture_parser)
+===============================================
+Construit des pages de calendrier de 50, 500 et 5 000 fixtures à partir des
+pages sauvegardées dans backend/fixtures/, vérifie que tous les backends
+donnent le même résultat, puis mesure le temps de parsing par page.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_fixture_parser.py [--sizes 50 500 5000] [--repeat 5] [--json resultats.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fixture_parser import BACKENDS, HAS_LXML, parse_fixtures  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BACKEND_DIR, "fixtures")
+SAVED_PAGES = ["caf_calendar.html", "caf_calendar_scheduled.html"]
+FIXTURE_BLOCK = re.compile(r'(<div class="Opta-fixture".*?\n      </div>)', re.S)
+
+
+def load_saved_fixtures():
+    """Blocs HTML .Opta-fixture des pages sauvegardées"""
+    blocks = []
+    for name in SAVED_PAGES:
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            blocks.extend(FIXTURE_BLOCK.findall(f.read()))
+    return blocks
+
+
+def build_page(blocks, n):
+    """Page de calendrier de n fixtures (les blocs sont répétés avec de nouveaux identifiants)"""
+    body = []
+    for i in range(n):
+        block = blocks[i % len(blocks)]
+        block = re.sub(r'data-match="\d+"', f'data-match="{9000000 + i}"', block, count=1)
+        body.append(re.sub(r'id="Opta_\d+"', f'id="Opta_{i}"', block, count=1))
+    return ("<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>"
+            "<div class=\"Opta Opta-Widget\"><div class=\"Opta-fixtures\">\n"
+            + "\n".join(body) + "\n</div></div></body></html>")
+
+
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        if name == "lxml" and not HAS_LXML:
+            continue
+        if name == "bs4":
+            try:
+                import bs4  # noqa: F401
+            except ImportError:
+                continue
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Fichier de sortie des résultats (JSON)")
+    args = parser.parse_args()
+
+    blocks = load_saved_fixtures()
+    backends = available_backends()
+    results = []
+
+    print(f"{'fixtures':>9} {'backend':>8} {'médiane (ms)':>13} {'min (ms)':>9} {'fixtures/s':>11}")
+    for n in args.sizes:
+        page = build_page(blocks, n)
+        reference = None
+        for backend in backends:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                matches = parse_fixtures(page, backend=backend)
+                timings.append(time.perf_counter() - start)
+
+            if len(matches) != n:
+                raise SystemExit(f"❌ {backend}: {len(matches)} matchs extraits au lieu de {n}")
+            if reference is None:
+                reference = matches
+            elif matches != reference:
+                raise SystemExit(f"❌ {backend}: résultat différent des autres backends pour {n} fixtures")
+
+            median = statistics.median(timings)
+            results.append({
+                "fixtures": n,
+                "backend": backend,
+                "page_bytes": len(page.encode("utf-8")),
+                "median_ms": round(median * 1000, 3),
+                "min_ms": round(min(timings) * 1000, 3),
+                "fixtures_per_s": round(n / median),
+            })
+            r = results[-1]
+            print(f"{n:>9} {backend:>8} {r['median_ms']:>13.2f} {r['min_ms']:>9.2f} {r['fixtures_per_s']:>11}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark du scraping des pages de détail des matchs (match_details)
+====================================================================
+Démarre le site CAF local (fixtures/stand_in_server.py) avec une latence et un
+taux d'erreurs 503 simulés, puis, pour chaque niveau de concurrence :
+
+1. premier scraping dans un CSV vide : toutes les pages de détail sont
+   téléchargées (retries compris), les lignes ajoutées au fil des réponses ;
+2. second scraping sur le même CSV : les matchs terminés dont le stade est connu
+   sont sautés, seules les pages des matchs à venir sont re-téléchargées.
+
+Affiche durée, requêtes, retries, pic de requêtes simultanées vu par le serveur
+et débit moyen (borné par la limitation de débit par hôte).
+
+Usage (depuis backend/) :
+    python benchmarks/bench_match_details.py [--concurrency 1 4 16] [--latency-ms 100] [--fail-rate 0.1]
+                                             [--rate 50] [--json resultats.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "fixtures"))
+
+from fixture_parser import parse_fixtures  # noqa: E402
+from match_details import DetailFetcher, update_matches  # noqa: E402
+from stand_in_server import start_stand_in  # noqa: E402
+
+
+def scrape(base_url, csv_path, concurrency, rate):
+    calendar_url = f"{base_url}/caf_calendar.html"
+    html = urllib.request.urlopen(calendar_url).read().decode("utf-8")
+    fetcher = DetailFetcher(concurrency=concurrency, rate_per_host=rate)
+    matches, stats = update_matches(parse_fixtures(html), html, calendar_url, csv_path, fetcher=fetcher)
+    missing = sum(1 for m in matches if not m.get("stadium"))
+    return dict(stats, matches=len(matches), missing_stadium=missing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--rate", type=float, default=50.0, help="Requêtes par seconde et par hôte")
+    parser.add_argument("--json", help="Fichier de sortie des résultats (JSON)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'concurrence':>11} {'passage':>8} {'durée (s)':>10} {'requêtes':>9} {'retries':>8} {'échecs':>7} "
+          f"{'sautés':>7} {'sans stade':>11} {'pic simultané':>14} {'req/s':>7}")
+    for concurrency in args.concurrency:
+        server, base_url = start_stand_in(latency_s=args.latency_ms / 1000, fail_rate=args.fail_rate, seed=concurrency)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "CAN_2025_Matches.csv")
+            for run in ("1er", "2e"):
+                with server.lock:
+                    server.stats.update(max_in_flight=0, min_interval_ms=None)
+                    server._last_request = None
+                stats = scrape(base_url, csv_path, concurrency, args.rate)
+                row = dict(stats, concurrency=concurrency, run=run, server=dict(server.stats))
+                results.append(row)
+                print(f"{concurrency:>11} {run:>8} {stats['elapsed_s']:>10.2f} {stats['requests']:>9} "
+                      f"{stats['retries']:>8} {stats['failed']:>7} {stats['skipped_final']:>7} "
+                      f"{stats['missing_stadium']:>11} {server.stats['max_in_flight']:>14} "
+                      f"{stats['requests'] / stats['elapsed_s'] if stats['elapsed_s'] else 0:>7.1f}")
+        server.shutdown()
+        server.server_close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
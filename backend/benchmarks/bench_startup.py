@@ -0,0 +1,104 @@
+"""
+Rapport de temps de démarrage du backend
+========================================
+Chaque mesure tourne dans un processus Python neuf (comme un worker gunicorn) :
+
+- import de app.py, create_app(), puis première requête (/api/health) : ce que
+  paie chaque worker avant de servir ;
+- coût du premier usage de chaque sous-système (scraping, selection,
+  transformation, reduction, modeling), c'est-à-dire l'import de ses dépendances ;
+- « tout précharger » : démarrage + import de toutes les dépendances, soit le
+  coût d'un démarrage où tout est importé d'emblée (comportement avant les
+  imports paresseux).
+
+Usage (depuis backend/) :
+    python benchmarks/bench_startup.py [--runs 5] [--json resultats.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from lazy_imports import SUBSYSTEMS  # noqa: E402
+
+# Exécuté dans le processus mesuré ; imprime un objet JSON
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.create_app().test_client()
+created = time.perf_counter()
+client.get("/api/health")
+served = time.perf_counter()
+modules = len(sys.modules)
+import lazy_imports
+preload = lazy_imports.preload({subsystems!r})
+with open("/proc/self/statm") as f:
+    rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+print(json.dumps({{
+    "import_app_s": imported - start,
+    "create_app_s": created - imported,
+    "ready_s": served - start,
+    "modules_at_ready": modules,
+    "preload_s": preload,
+    "rss_mb": rss / 1e6,
+}}))
+"""
+
+
+def probe(subsystems):
+    # Pas de préchargement en arrière-plan : il fausserait les mesures
+    env = dict(os.environ, CAN2025_PRELOAD="")
+    out = subprocess.run([sys.executable, "-c", PROBE.format(subsystems=subsystems)], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Fichier de sortie des résultats (JSON)")
+    args = parser.parse_args()
+
+    scenarios = {"démarrage": []}
+    scenarios.update({f"1er usage {name}": [name] for name in SUBSYSTEMS})
+    scenarios["tout précharger"] = list(SUBSYSTEMS)
+
+    results = []
+    print(f"{'scénario':<26} {'import app (ms)':>16} {'prêt (ms)':>10} {'dépendances (ms)':>17} {'total (ms)':>11} "
+          f"{'modules':>8} {'RSS (Mo)':>9}")
+    for name, subsystems in scenarios.items():
+        runs = [probe(subsystems) for _ in range(args.runs)]
+        ready = statistics.median(r["ready_s"] for r in runs)
+        deps = statistics.median(sum(r["preload_s"].values()) for r in runs)
+        row = {
+            "scenario": name,
+            "subsystems": subsystems,
+            "import_app_ms": round(statistics.median(r["import_app_s"] for r in runs) * 1000, 1),
+            "ready_ms": round(ready * 1000, 1),
+            "dependencies_ms": round(deps * 1000, 1),
+            "total_ms": round((ready + deps) * 1000, 1),
+            "modules_at_ready": runs[0]["modules_at_ready"],
+            "rss_mb": round(statistics.median(r["rss_mb"] for r in runs), 1),
+        }
+        results.append(row)
+        print(f"{name:<26} {row['import_app_ms']:>16.1f} {row['ready_ms']:>10.1f} {row['dependencies_ms']:>17.1f} "
+              f"{row['total_ms']:>11.1f} {row['modules_at_ready']:>8} {row['rss_mb']:>9.1f}")
+
+    eager = results[-1]["total_ms"]
+    print(f"\nPrêt à servir en {results[0]['ready_ms']:.0f} ms au lieu de {eager:.0f} ms "
+          f"si toutes les dépendances étaient importées au démarrage ({eager / results[0]['ready_ms']:.1f}x)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Générateur de datasets synthétiques CAN 2025 (10k, 1M, 10M lignes...)
+======================================================================
+Reproduit le schéma et les distributions jointes de
+backend/dataset_can_2025_realiste.csv par bootstrap lissé, entièrement vectorisé :
+chaque ligne synthétique est une ligne source tirée au hasard (les relations
+entre colonnes — stade/ville/capacité, catégorie/zone, demande/prix... — sont
+donc conservées), puis les variables continues reçoivent un bruit gaussien
+faible (jitter × écart-type), borné à leur intervalle observé et arrondi à leur
+précision d'origine. Match_ID est renuméroté (1..n, unique comme dans la source).
+
+Le fichier est produit par morceaux : la mémoire ne dépend pas du nombre de lignes.
+
+Usage (depuis backend/) :
+    python benchmarks/synthetic_dataset.py --rows 1000000 --output /tmp/can2025_1M.csv [--seed 42]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_CSV = os.path.join(BACKEND_DIR, "dataset_can_2025_realiste.csv")
+
+ID_COLUMN = "Match_ID"
+# Au-delà de ce nombre de valeurs distinctes, une colonne numérique est traitée comme continue
+CONTINUOUS_MIN_UNIQUE = 20
+DEFAULT_JITTER = 0.02
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def _decimals(values, max_decimals=6):
+    for decimals in range(max_decimals + 1):
+        if np.allclose(np.round(values, decimals), values, rtol=0, atol=1e-9):
+            return decimals
+    return max_decimals
+
+
+class SyntheticDataset:
+    def __init__(self, source=None, jitter=DEFAULT_JITTER):
+        source = pd.read_csv(SOURCE_CSV) if source is None else source
+        self.columns = list(source.columns)
+        self.jitter = jitter
+        # Textes en catégories : le tirage ne copie que des codes entiers
+        self.source = source.apply(lambda s: s.astype("category") if not pd.api.types.is_numeric_dtype(s) else s)
+        self.continuous = {}
+        for col in source.select_dtypes(include="number").columns:
+            values = source[col].dropna().to_numpy(dtype=float)
+            if col == ID_COLUMN or len(np.unique(values)) < CONTINUOUS_MIN_UNIQUE:
+                continue
+            integer = pd.api.types.is_integer_dtype(source[col])
+            self.continuous[col] = {
+                "scale": jitter * float(values.std()),
+                "low": float(values.min()),
+                "high": float(values.max()),
+                "decimals": 0 if integer else _decimals(values),
+                "integer": integer,
+            }
+
+    def chunk(self, n, rng, first_id=1):
+        """n lignes synthétiques (DataFrame), Match_ID à partir de first_id"""
+        idx = rng.integers(0, len(self.source), size=n)
+        out = self.source.iloc[idx].reset_index(drop=True)
+        for col, spec in self.continuous.items():
+            values = out[col].to_numpy(dtype=float)
+            noisy = np.clip(values + rng.normal(0.0, spec["scale"], size=n), spec["low"], spec["high"])
+            noisy = np.round(noisy, spec["decimals"])
+            # Les valeurs manquantes de la source restent manquantes
+            noisy[np.isnan(values)] = np.nan
+            out[col] = noisy.astype(np.int64) if spec["integer"] and not np.isnan(noisy).any() else noisy
+        if ID_COLUMN in out.columns:
+            out[ID_COLUMN] = np.arange(first_id, first_id + n, dtype=np.int64)
+        return out[self.columns]
+
+    def iter_chunks(self, n_rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS):
+        rng = np.random.default_rng(seed)
+        produced = 0
+        while produced < n_rows:
+            n = min(chunk_rows, n_rows - produced)
+            yield self.chunk(n, rng, first_id=produced + 1)
+            produced += n
+
+    def write_csv(self, path, n_rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Écrit n_rows lignes dans path (par morceaux) ; retourne la taille du fichier en octets"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            for i, chunk in enumerate(self.iter_chunks(n_rows, seed, chunk_rows)):
+                chunk.to_csv(f, index=False, header=(i == 0))
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    size = SyntheticDataset(jitter=args.jitter).write_csv(args.output, args.rows, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {args.rows} lignes ({size / 1e6:.1f} Mo) écrites dans {args.output} en {elapsed:.1f} s "
+          f"({args.rows / elapsed:,.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Pool de navigateurs Playwright pour le scraping
+===============================================
+Chromium est lancé une seule fois par worker et garde un contexte préchauffé
+entre les requêtes. Images, polices, médias et traceurs tiers sont bloqués au
+niveau du routage, et on attend seulement le sélecteur utile (.Opta-fixture)
+au lieu de « networkidle ».
+
+L'API sync de Playwright est liée au thread qui l'a créée : chaque worker du
+pool possède donc son propre thread, et les appelants (requêtes Flask, jobs)
+lui soumettent leurs pages via une file.
+"""
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "adservice.google.com", "facebook.net", "facebook.com", "connect.facebook.net",
+    "hotjar.com", "clarity.ms", "scorecardresearch.com", "cookielaw.org", "onetrust.com",
+    "tiktok.com", "analytics.twitter.com", "ads-twitter.com", "quantserve.com", "criteo.com",
+)
+
+
+def should_block(resource_type, url):
+    """Faut-il bloquer cette requête (ressource lourde ou traceur tiers) ?"""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(url).hostname or ""
+    return any(host == t or host.endswith("." + t) for t in TRACKER_HOSTS)
+
+
+class BrowserPool:
+    def __init__(self, size=1, headless=True, user_agent=USER_AGENT):
+        self.size = size
+        self.headless = headless
+        self.user_agent = user_agent
+        self.stats = {"fetches": 0, "errors": 0, "blocked_requests": 0, "browser_launches": 0}
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        """Démarre les workers (idempotent) ; chacun lance Chromium et préchauffe un contexte"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.size):
+                worker = threading.Thread(target=self._worker, name=f"can2025-browser-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            atexit.register(self.close)
+
+    def fetch_html(self, url, wait_selector=".Opta-fixture", goto_timeout_ms=60000, selector_timeout_ms=15000):
+        """Charge la page dans un contexte préchauffé et retourne son HTML une fois le sélecteur présent"""
+        self.start()
+        future = Future()
+        self._tasks.put((url, wait_selector, goto_timeout_ms, selector_timeout_ms, future))
+        return future.result()
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _route(self, route):
+        request = route.request
+        if should_block(request.resource_type, request.url):
+            self._count("blocked_requests")
+            route.abort()
+        else:
+            route.continue_()
+
+    def _new_context(self, browser):
+        context = browser.new_context(user_agent=self.user_agent)
+        context.route("**/*", self._route)
+        return context
+
+    def _worker(self):
+        # Import paresseux : Playwright n'est chargé qu'au premier scraping
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = None
+            context = None
+            while True:
+                try:
+                    if browser is None or not browser.is_connected():
+                        browser = p.chromium.launch(headless=self.headless)
+                        self._count("browser_launches")
+                        context = None
+                    if context is None:
+                        context = self._new_context(browser)
+                except Exception as e:
+                    print(f"⚠️ Impossible de préparer le navigateur: {e}")
+                    browser = context = None
+
+                task = self._tasks.get()
+                if task is None:
+                    break
+                url, wait_selector, goto_timeout_ms, selector_timeout_ms, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if context is None:
+                    future.set_exception(RuntimeError("Navigateur Playwright indisponible"))
+                    continue
+
+                page = None
+                try:
+                    page = context.new_page()
+                    page.goto(url, wait_until="domcontentloaded", timeout=goto_timeout_ms)
+                    page.wait_for_selector(wait_selector, timeout=selector_timeout_ms)
+                    future.set_result(page.content())
+                    self._count("fetches")
+                except Exception as e:
+                    self._count("errors")
+                    # Le contexte a pu être corrompu : il sera recréé avant la prochaine tâche
+                    try:
+                        context.close()
+                    except Exception:
+                        pass
+                    context = None
+                    future.set_exception(e)
+                finally:
+                    if page is not None and context is not None:
+                        try:
+                            page.close()
+                        except Exception:
+                            pass
+
+            if browser is not None:
+                browser.close()
@@ -0,0 +1,234 @@
+"""
+Stockage colonnaire optionnel (Arrow IPC / Feather)
+===================================================
+Chaque CSV du pipeline peut avoir un « jumeau » binaire (.feather, même nom)
+écrit sans compression, relu en memory-map quasiment sans copie et qui conserve
+les types (catégories comprises). Le CSV reste la source d'échange avec le
+frontend : le jumeau n'est utilisé que s'il a été écrit depuis ce CSV précis
+(mtime_ns et taille du CSV enregistrés dans ses métadonnées, comme la clé de
+dataset_cache), et il est écrit de façon atomique (fichier temporaire + os.replace).
+
+Nécessite pyarrow ; sans pyarrow (ou avec CAN2025_COLUMNAR=0) tout retombe sur
+pd.read_csv.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow est optionnel
+    pa = feather = None
+
+COLUMNAR_ENABLED = feather is not None and os.environ.get("CAN2025_COLUMNAR", "1") != "0"
+# Métadonnée du jumeau : "mtime_ns:taille" du CSV dont il est issu
+SOURCE_METADATA_KEY = b"can2025_source"
+
+# Schéma explicite du dataset CAN 2025 (les colonnes absentes sont ignorées)
+CATEGORICAL_COLUMNS = [
+    "Equipe_1", "Equipe_2", "Stade", "Ville", "Categorie", "Jour_Semaine", "Heure_Match"
+]
+DATASET_SCHEMA = {
+    "Match_ID": "int64",
+    "Phase_Competition": "int64",
+    "Capacite_Stade": "int64",
+    "Prestige_Stade": "float64",
+    "Poids_Zone": "float64",
+    "Score_Visibilite": "float64",
+    "Distance_Pelouse_m": "int64",
+    "Zone_Couverte": "int64",
+    "Classement_FIFA_Moyen": "int64",
+    "Valeur_Marchande_Totale_MEUR": "float64",
+    "Index_Stars_Total": "int64",
+    "Score_Rivalite": "float64",
+    "Lead_Time_Jours": "int64",
+    "Is_Weekend": "int64",
+    "Effet_Maroc": "int64",
+    "Offre_Restante": "int64",
+    "Indice_Demande": "int64",
+    "Taux_Rareté": "float64",
+    "Prix_Final_MAD": "float64",
+}
+DATASET_SCHEMA.update({col: "category" for col in CATEGORICAL_COLUMNS})
+
+
+# Mode d'import compact : une colonne texte devient catégorielle si ses valeurs se répètent assez
+COMPACT_CATEGORY_MAX_RATIO = 0.5
+# Décimales au-delà desquelles on garde le float64 (données mesurées, pas saisies)
+COMPACT_MAX_DECIMALS = 6
+
+
+def _decimals(values):
+    """Plus petit nombre de décimales qui représente toutes les valeurs, ou None au-delà de COMPACT_MAX_DECIMALS"""
+    tolerance = 1e-9 * np.maximum(np.abs(values), 1.0)
+    for decimals in range(COMPACT_MAX_DECIMALS + 1):
+        if np.all(np.abs(np.round(values, decimals) - values) <= tolerance):
+            return decimals
+    return None
+
+
+def compact_schema(df, schema=None, exact=()):
+    """Schéma compact : catégories pour les textes répétés, plus petits entiers, float32 si la précision le permet
+
+    Part du schéma déclaré (DATASET_SCHEMA par défaut) : catégories déclarées gardées, entiers réduits au plus
+    petit type qui contient leurs valeurs, flottants passés en float32 seulement si l'arrondi à leur nombre de
+    décimales redonne exactement les valeurs d'origine. Les colonnes non déclarées suivent les mêmes règles.
+    Les colonnes de exact (ex : la cible du modèle) gardent leurs flottants en float64.
+    """
+    schema = DATASET_SCHEMA if schema is None else schema
+    compact = {}
+    for col in df.columns:
+        series = df[col]
+        declared = schema.get(col)
+        if declared == "category" or isinstance(series.dtype, pd.CategoricalDtype):
+            compact[col] = "category"
+        elif pd.api.types.is_bool_dtype(series):
+            continue
+        elif pd.api.types.is_integer_dtype(series):
+            compact[col] = str(pd.to_numeric(series, downcast="integer").dtype)
+        elif pd.api.types.is_float_dtype(series) and col not in exact:
+            values = series.dropna().to_numpy(dtype=np.float64)
+            if declared == "int64" and len(values) == len(series) and np.all(values == np.round(values)):
+                compact[col] = str(pd.to_numeric(series.astype(np.int64), downcast="integer").dtype)
+                continue
+            decimals = _decimals(values) if len(values) else 0
+            if decimals is not None and np.all(
+                    np.abs(values.astype(np.float32).astype(np.float64) - values) < 0.5 * 10.0 ** -decimals):
+                compact[col] = "float32"
+        elif len(series) and series.nunique(dropna=True) <= COMPACT_CATEGORY_MAX_RATIO * len(series):
+            compact[col] = "category"
+    return compact
+
+
+def memory_footprint(df):
+    """Octets occupés par le DataFrame (chaînes comprises)"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def read_compact(csv_path, schema=None, exact=()):
+    """Lit un CSV puis le compacte ; retourne (DataFrame, rapport mémoire avant/après)"""
+    return compact_frame(pd.read_csv(csv_path), schema, exact)
+
+
+def compact_frame(df, schema=None, exact=()):
+    """Applique le schéma compact à un DataFrame déjà lu ; retourne (DataFrame, rapport mémoire avant/après)"""
+    before = memory_footprint(df)
+    dtypes_before = {str(c): str(t) for c, t in df.dtypes.items()}
+    df = apply_schema(df, compact_schema(df, schema, exact))
+    after = memory_footprint(df)
+    report = {
+        "before_bytes": before,
+        "after_bytes": after,
+        "reduction_pct": round(100 * (1 - after / before), 1) if before else 0.0,
+        "dtypes": {
+            str(c): {"before": dtypes_before[str(c)], "after": str(t)}
+            for c, t in df.dtypes.items() if str(t) != dtypes_before[str(c)]
+        },
+    }
+    return df, report
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".feather"
+
+
+def apply_schema(df, schema=None):
+    """Applique le schéma déclaré ; une colonne qui ne s'y conforme pas garde son type"""
+    schema = DATASET_SCHEMA if schema is None else schema
+    casts = {}
+    for col, dtype in schema.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        # Les entiers avec valeurs manquantes restent en float64
+        if dtype == "int64" and df[col].isna().any():
+            continue
+        casts[col] = dtype
+    for col, dtype in casts.items():
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def source_signature(csv_path):
+    """ "mtime_ns:taille" du CSV (None s'il n'existe pas) : un remplacement avec mtime préservé change la taille"""
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def write_columnar(df, path, source=None):
+    """Écrit un DataFrame en Feather non compressé (lisible en memory-map), de façon atomique
+
+    source : signature du CSV d'origine (cf. source_signature), enregistrée dans les métadonnées.
+    """
+    table = pa.Table.from_pandas(df)
+    if source is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_METADATA_KEY: source.encode()})
+    # Fichier temporaire propre à l'écrivain : deux workers ne s'écrasent pas, un lecteur ne voit que des fichiers complets
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_columnar(path):
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def _read_fresh_twin(binary_path, csv_path):
+    """DataFrame du jumeau s'il a été écrit depuis la version actuelle du CSV, sinon None"""
+    if not os.path.exists(binary_path):
+        return None
+    table = feather.read_table(binary_path, memory_map=True)
+    signature = source_signature(csv_path)
+    # Pas de CSV : le format binaire fait foi
+    if signature is not None and (table.schema.metadata or {}).get(SOURCE_METADATA_KEY) != signature.encode():
+        return None
+    return table.to_pandas(split_blocks=True)
+
+
+def read_dataset(csv_path, schema=None, cache_columnar=True):
+    """Lit un dataset : jumeau colonnaire s'il est à jour, sinon le CSV (converti pour la prochaine lecture)"""
+    binary_path = columnar_path(csv_path)
+    if COLUMNAR_ENABLED:
+        df = _read_fresh_twin(binary_path, csv_path)
+        if df is not None:
+            return df
+
+    # Signature prise avant la lecture : si le CSV change pendant ce temps, le jumeau sera jugé périmé
+    source = source_signature(csv_path)
+    df = apply_schema(pd.read_csv(csv_path), schema)
+    if COLUMNAR_ENABLED and cache_columnar:
+        try:
+            write_columnar(df, binary_path, source=source)
+        except (OSError, ValueError, TypeError, pa.ArrowException) as e:
+            print(f"⚠️ Conversion colonnaire impossible pour {csv_path}: {e}")
+    return df
+
+
+def write_dataset(df, csv_path, schema=None):
+    """Écrit le CSV (pour le frontend) puis son jumeau colonnaire"""
+    df.to_csv(csv_path, index=False)
+    if COLUMNAR_ENABLED:
+        write_columnar(apply_schema(df.copy(), schema), columnar_path(csv_path), source=source_signature(csv_path))
+
+
+def remove_dataset(csv_path):
+    """Supprime un CSV et son jumeau colonnaire ; retourne le nombre de fichiers supprimés"""
+    deleted = 0
+    for path in (csv_path, columnar_path(csv_path)):
+        if os.path.exists(path):
+            os.remove(path)
+            deleted += 1
+    return deleted
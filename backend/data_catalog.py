@@ -0,0 +1,169 @@
+"""
+Catalogue des fichiers de données
+=================================
+Pour chaque CSV produit par l'application (scraping, upload, dataset nettoyé,
+CSV de visualisation), le catalogue garde : nombre de lignes, schéma (colonne
+-> type), taille en octets, hash de contenu (sha256) et date de génération.
+Les écrivains l'enregistrent juste après la sauvegarde, à partir du DataFrame
+qu'ils ont déjà en mémoire : seul le hash relit le fichier, sans le parser.
+
+Les endpoints de résumé et de validation de cache lisent ces métadonnées au
+lieu de relire les CSV. Chaque entrée mémorise aussi (mtime, taille) : si le
+fichier a été modifié hors de l'application, l'entrée est reconstruite au
+prochain accès (lecture par morceaux), puis resservie telle quelle.
+
+Le catalogue est un fichier JSON partagé entre workers (écritures sous verrou
+fichier, remplacement atomique).
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from step_cache import hash_file
+from workflow_store import FileLock
+
+INSPECT_CHUNK_ROWS = 100_000
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _merge_dtype(left, right):
+    """Type commun de deux morceaux d'une même colonne (numérique -> float64, sinon object)"""
+    if left == right:
+        return left
+    numeric = ("int", "uint", "float", "bool")
+    if left.startswith(numeric) and right.startswith(numeric):
+        return "float64"
+    return "object"
+
+
+def inspect_csv(path):
+    """Nombre de lignes et schéma d'un CSV, lu par morceaux (mémoire bornée)"""
+    rows, schema = 0, None
+    for chunk in pd.read_csv(path, chunksize=INSPECT_CHUNK_ROWS):
+        rows += len(chunk)
+        dtypes = {str(c): str(t) for c, t in chunk.dtypes.items()}
+        schema = dtypes if schema is None else {c: _merge_dtype(schema[c], dtypes.get(c, t)) for c, t in schema.items()}
+    if schema is None:
+        # Fichier vide ou en-tête seul
+        schema = {str(c): "object" for c in pd.read_csv(path, nrows=0).columns}
+    return rows, schema
+
+
+class DataCatalog:
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock(path + ".lock")
+        self._thread_lock = threading.Lock()
+        self._entries = {}
+        self._file_stat = None
+        self.rebuilds = 0
+
+    # ------------------------------------------------------------------
+    # Fichier JSON partagé
+    # ------------------------------------------------------------------
+    def _reload(self):
+        """Relit le catalogue sur disque si un autre processus l'a modifié"""
+        stat = _stat(self.path)
+        if stat == self._file_stat:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+        self._file_stat = stat
+
+    def _update(self, key, entry):
+        with self._lock.hold():
+            self._reload()
+            if entry is None:
+                if self._entries.pop(key, None) is None:
+                    return
+            else:
+                self._entries[key] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._file_stat = _stat(self.path)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def record(self, path, df=None, rows=None, schema=None, sha256=None):
+        """Enregistre un fichier qui vient d'être écrit
+
+        df = contenu déjà en mémoire ; rows/schema/sha256 = métadonnées déjà calculées par l'écrivain
+        (ex : upload en flux). Ce qui manque est obtenu en relisant le fichier.
+        """
+        key = os.path.realpath(path)
+        stat = _stat(key)
+        if stat is None:
+            self.forget(path)
+            return None
+        if df is not None:
+            rows, schema = len(df), {str(c): str(t) for c, t in df.dtypes.items()}
+        elif rows is None or schema is None:
+            rows, schema = inspect_csv(key)
+        entry = {
+            "path": key,
+            "rows": int(rows),
+            "schema": schema,
+            "bytes": stat[1],
+            "sha256": sha256 or hash_file(key),
+            "generated_at": datetime.fromtimestamp(stat[0] / 1e9).isoformat(),
+            "mtime_ns": stat[0],
+        }
+        with self._thread_lock:
+            self._update(key, entry)
+        return entry
+
+    def forget(self, path):
+        """Retire un fichier supprimé du catalogue"""
+        with self._thread_lock:
+            self._update(os.path.realpath(path), None)
+
+    def get(self, path):
+        """Métadonnées du fichier, ou None s'il n'existe pas ; reconstruites s'il a changé hors de l'application"""
+        key = os.path.realpath(path)
+        stat = _stat(key)
+        with self._thread_lock:
+            self._reload()
+            entry = self._entries.get(key)
+        if stat is None:
+            if entry is not None:
+                self.forget(key)
+            return None
+        if entry is not None and (entry["mtime_ns"], entry["bytes"]) == stat:
+            return entry
+        if entry is not None:
+            print(f"🔄 Catalogue : {os.path.basename(key)} modifié hors de l'application, métadonnées reconstruites")
+            self.rebuilds += 1
+        return self.record(key)
+
+    def rows(self, path):
+        entry = self.get(path)
+        return entry["rows"] if entry else 0
+
+    def version(self, path):
+        """Hash de contenu du fichier (None s'il n'existe pas), pour les ETags et les clés de cache"""
+        entry = self.get(path)
+        return entry["sha256"] if entry else None
+
+    def entries(self):
+        """Toutes les entrées, vérifiées (les fichiers supprimés ou modifiés hors de l'application sont mis à jour)"""
+        with self._thread_lock:
+            self._reload()
+            paths = list(self._entries)
+        return [entry for entry in (self.get(p) for p in paths) if entry is not None]
@@ -0,0 +1,94 @@
+"""
+Cache en mémoire des datasets CSV
+=================================
+Les DataFrames sont indexés par (chemin résolu, mtime, taille) : dès qu'un
+fichier est réécrit ou supprimé, l'entrée correspondante est invalidée au
+prochain accès, sans relire le disque tant que le fichier ne change pas.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class DatasetCache:
+    def __init__(self, max_bytes=None, loader=None):
+        # max_bytes=None => pas de plafond mémoire (éviction LRU désactivée)
+        self.max_bytes = max_bytes
+        self.loader = loader or pd.read_csv
+        self._entries = OrderedDict()  # chemin -> (signature, df, nb_octets)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def signature(path):
+        """Retourne (chemin résolu, mtime_ns, taille) ou None si le fichier n'existe pas"""
+        real_path = os.path.realpath(path)
+        try:
+            st = os.stat(real_path)
+        except OSError:
+            return None
+        return (real_path, st.st_mtime_ns, st.st_size)
+
+    @property
+    def current_bytes(self):
+        return sum(entry[2] for entry in self._entries.values())
+
+    def get(self, path):
+        """Retourne le DataFrame du fichier (depuis le cache si inchangé), ou None s'il n'existe pas.
+
+        Le DataFrame retourné est partagé : les appelants ne doivent pas le modifier en place.
+        """
+        signature = self.signature(path)
+        with self._lock:
+            if signature is None:
+                self._entries.pop(os.path.realpath(path), None)
+                return None
+
+            real_path = signature[0]
+            entry = self._entries.get(real_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(real_path)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            df = self.loader(real_path)
+            nbytes = int(df.memory_usage(deep=True).sum())
+            self._entries[real_path] = (signature, df, nbytes)
+            self._entries.move_to_end(real_path)
+            self._evict()
+            return df
+
+    def _evict(self):
+        """Évince les entrées les moins récemment utilisées au-delà du plafond mémoire"""
+        if self.max_bytes is None:
+            return
+        # On garde toujours au moins l'entrée la plus récente, même si elle dépasse le plafond
+        while len(self._entries) > 1 and self.current_bytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, path=None):
+        """Invalide un fichier précis, ou tout le cache si path est None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.realpath(path), None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
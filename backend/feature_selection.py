@@ -0,0 +1,115 @@
+"""
+Sélection séquentielle de variables (forward / backward) rapide
+===============================================================
+Même critère que SequentialFeatureSelector(LinearRegression(), cv=k) : R² moyen
+sur k plis (KFold sans mélange). Mais au lieu de réajuster un modèle par
+candidat et par pli :
+
+- les statistiques suffisantes de chaque pli (XᵀX, Xᵀy, yᵀy des parties
+  apprentissage et test) sont calculées une seule fois ; évaluer un
+  sous-ensemble ne coûte plus qu'un petit système linéaire, quel que soit le
+  nombre de lignes ;
+- les candidats d'un tour sont évalués en parallèle (threads, numpy libère le GIL) ;
+- un pré-filtre optionnel (information mutuelle ou corrélation) réduit la liste
+  des candidats avant la recherche.
+"""
+import numpy as np
+from joblib import Parallel, delayed
+
+# scikit-learn est importé à la première sélection (cf. lazy_imports)
+
+PRESCREEN_METHODS = ("mi", "correlation")
+DIRECTIONS = ("forward", "backward")
+# En dessous, le coût de répartition sur plusieurs threads dépasse le gain
+PARALLEL_MIN_CANDIDATES = 16
+
+
+def prescreen(X, y, method="correlation", keep=30):
+    """Indices des `keep` variables les plus liées à la cible, triés par score décroissant"""
+    if method == "mi":
+        from sklearn.feature_selection import mutual_info_regression
+
+        scores = mutual_info_regression(X, y, random_state=42)
+    elif method == "correlation":
+        Xc = X - X.mean(axis=0)
+        yc = y - y.mean()
+        denom = np.sqrt((Xc ** 2).sum(axis=0) * (yc ** 2).sum())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.abs(np.where(denom > 0, Xc.T @ yc / denom, 0.0))
+    else:
+        raise ValueError(f"Pré-filtre inconnu: {method} (attendu: {', '.join(PRESCREEN_METHODS)})")
+    order = np.argsort(-np.nan_to_num(scores), kind="stable")
+    return order[:keep], scores
+
+
+class _FoldStats:
+    """Statistiques suffisantes d'un pli (la colonne 0 est la constante de l'intercept)"""
+
+    def __init__(self, A, y, train, test):
+        A_tr, A_te = A[train], A[test]
+        y_tr, y_te = y[train], y[test]
+        self.G_tr = A_tr.T @ A_tr
+        self.b_tr = A_tr.T @ y_tr
+        self.G_te = A_te.T @ A_te
+        self.b_te = A_te.T @ y_te
+        self.yy_te = float(y_te @ y_te)
+        self.sst_te = float(((y_te - y_te.mean()) ** 2).sum())
+
+    def r2(self, cols):
+        coef = np.linalg.lstsq(self.G_tr[np.ix_(cols, cols)], self.b_tr[cols], rcond=None)[0]
+        # SSE = yᵀy - 2 coefᵀAᵀy + coefᵀAᵀA coef, calculé sur le pli de test
+        sse = self.yy_te - 2 * coef @ self.b_te[cols] + coef @ self.G_te[np.ix_(cols, cols)] @ coef
+        if self.sst_te == 0:
+            return 1.0 if sse <= 1e-12 else 0.0
+        return 1.0 - max(sse, 0.0) / self.sst_te
+
+
+class SequentialSelector:
+    def __init__(self, n_features_to_select, direction="forward", cv=5, n_jobs=-1):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction inconnue: {direction} (attendu: {', '.join(DIRECTIONS)})")
+        self.n_features_to_select = n_features_to_select
+        self.direction = direction
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.evaluations = 0
+
+    def _score(self, subset):
+        # Pas de cache : en forward comme en backward, chaque tour n'évalue que des sous-ensembles nouveaux
+        cols = [0] + [i + 1 for i in sorted(subset)]
+        return float(np.mean([fold.r2(cols) for fold in self._folds]))
+
+    def _best(self, subsets):
+        self.evaluations += len(subsets)
+        if self.n_jobs not in (None, 1) and len(subsets) >= PARALLEL_MIN_CANDIDATES:
+            scores = Parallel(n_jobs=self.n_jobs, prefer="threads")(delayed(self._score)(s) for s in subsets)
+        else:
+            scores = [self._score(s) for s in subsets]
+        return subsets[int(np.argmax(scores))]
+
+    def fit(self, X, y, progress=None):
+        from sklearn.model_selection import KFold
+
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        A = np.hstack([np.ones((len(X), 1)), X])
+        self._folds = [_FoldStats(A, y, train, test) for train, test in KFold(n_splits=self.cv).split(A)]
+
+        n = X.shape[1]
+        current = set() if self.direction == "forward" else set(range(n))
+        rounds = abs(n - self.n_features_to_select) if self.direction == "backward" else self.n_features_to_select
+        for r in range(rounds):
+            remaining = [j for j in range(n) if j not in current]
+            if self.direction == "forward":
+                subsets = [current | {j} for j in remaining]
+            else:
+                subsets = [current - {j} for j in sorted(current)]
+            current = self._best(subsets)
+            if progress:
+                progress(10 + int(80 * (r + 1) / max(rounds, 1)))
+
+        self.support_ = np.array([j in current for j in range(n)])
+        return self
+
+    def get_support(self):
+        return self.support_
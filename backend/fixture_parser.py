@@ -0,0 +1,225 @@
+"""
+Parseur rapide des matchs scrapés (widget Opta du site de la CAF)
+=================================================================
+N'extrait que les sous-arbres .Opta-fixture et construit les enregistrements
+de matchs en une fois. Trois backends produisent exactement le même résultat :
+
+- "lxml"   : parseur C, une seule passe par sous-arbre (par défaut si lxml est installé)
+- "stream" : tokenizer en streaming (html.parser de la stdlib), sans arbre DOM
+- "bs4"    : implémentation historique BeautifulSoup, gardée comme référence
+"""
+import importlib.util
+from datetime import datetime
+from html.parser import HTMLParser
+
+# lxml est optionnel, et importé seulement au premier parsing (cf. lazy_imports)
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+FIXTURE_CLASS = "Opta-fixture"
+
+# Champs bruts extraits de chaque fixture, dans cet ordre
+RAW_FIELDS = ("match_id", "date_ms", "status", "stage", "winner_side",
+              "home_team", "away_team", "home_score", "away_score")
+
+
+def _to_score(text):
+    return int(text) if text and text.isdigit() else None
+
+
+def build_matches(raw_rows):
+    """Construit les enregistrements de matchs à partir des tuples bruts (RAW_FIELDS)"""
+    matches = []
+    for match_id, date_ms, status, stage, winner_side, home_team, away_team, home_score, away_score in raw_rows:
+        matches.append({
+            "match_id": match_id,
+            "date": datetime.fromtimestamp(int(date_ms) / 1000).isoformat() if date_ms else None,
+            "status": status or "Scheduled",
+            "stage": stage or "Group",
+            "home_team": home_team,
+            "away_team": away_team,
+            "home_score": _to_score(home_score),
+            "away_score": _to_score(away_score),
+            "winner_side": winner_side,
+            "is_draw": home_score is not None and away_score is not None and home_score == away_score,
+            "stadium": None
+        })
+    return matches
+
+
+# ----------------------------------------------------------------------------
+# Backend lxml
+# ----------------------------------------------------------------------------
+def _text(el):
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _fields_for(tag, classes, ancestor_classes):
+    """Champs que cet élément renseigne, d'après sa balise, ses classes et celles de ses ancêtres"""
+    fields = []
+    if tag == "abbr":
+        fields.append("status")
+    if "Opta-TeamName" in classes:
+        if any("Opta-Home" in anc for anc in ancestor_classes):
+            fields.append("home_team")
+        if any("Opta-Away" in anc for anc in ancestor_classes):
+            fields.append("away_team")
+    if "Opta-Team-Score" in classes:
+        if any("Opta-Score" in anc and "Opta-Home" in anc for anc in ancestor_classes):
+            fields.append("home_score")
+        if any("Opta-Score" in anc and "Opta-Away" in anc for anc in ancestor_classes):
+            fields.append("away_score")
+    return fields
+
+
+def _raw_rows_lxml(html):
+    from lxml import html as lxml_html
+
+    root = lxml_html.fromstring(html)
+    for f in root.find_class(FIXTURE_CLASS):
+        get = f.get
+        found = {}
+        # Une seule passe sur le sous-arbre ; le premier élément correspondant l'emporte
+        for el in f.iterdescendants():
+            tag = el.tag
+            if not isinstance(tag, str):  # commentaires, instructions
+                continue
+            cls = el.get("class")
+            if tag != "abbr" and not cls:
+                continue
+            classes = cls.split() if cls else ()
+            if tag != "abbr" and "Opta-TeamName" not in classes and "Opta-Team-Score" not in classes:
+                continue
+            ancestors = []
+            for anc in el.iterancestors():
+                if anc is f:
+                    break
+                ancestors.append((anc.get("class") or "").split())
+            for field in _fields_for(tag, classes, ancestors):
+                if field not in found:
+                    found[field] = _text(el)
+        yield (
+            get("data-match"), get("data-date"), found.get("status"),
+            get("data-competition_stage"), get("data-match_winner_side"),
+            found.get("home_team"), found.get("away_team"),
+            found.get("home_score"), found.get("away_score"),
+        )
+
+
+# ----------------------------------------------------------------------------
+# Backend streaming (stdlib)
+# ----------------------------------------------------------------------------
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+              "link", "meta", "param", "source", "track", "wbr"}
+
+
+class _FixtureTokenizer(HTMLParser):
+    """Ne construit aucun arbre : suit seulement la pile des classes à l'intérieur d'une fixture"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._stack = None  # pile de (tag, classes) à l'intérieur de la fixture courante
+        self._fields = None
+        self._captures = []  # [(champ, profondeur, morceaux de texte)]
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if self._stack is None:
+            if FIXTURE_CLASS in classes:
+                self._stack = [] if tag in VOID_TAGS else [(tag, classes)]
+                self._fields = {
+                    "match_id": attrs.get("data-match"), "date_ms": attrs.get("data-date"),
+                    "stage": attrs.get("data-competition_stage"), "winner_side": attrs.get("data-match_winner_side"),
+                }
+                if not self._stack:
+                    self._finish()
+            return
+
+        fields = ()
+        if tag == "abbr" or "Opta-TeamName" in classes or "Opta-Team-Score" in classes:
+            # Les ancêtres considérés sont ceux situés sous la fixture (comme pour lxml)
+            fields = _fields_for(tag, classes, [c for _, c in self._stack[1:]])
+        depth = len(self._stack) + 1
+        for field in fields:
+            if field not in self._fields and all(c[0] != field for c in self._captures):
+                self._captures.append((field, depth, []))
+        if tag not in VOID_TAGS:
+            self._stack.append((tag, classes))
+        elif fields:
+            self._close_captures(depth)
+
+    def handle_endtag(self, tag):
+        if self._stack is None or tag in VOID_TAGS:
+            return
+        # Tolère les balises mal fermées : on dépile jusqu'à la balise correspondante
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                self._close_captures(depth + 1)
+                del self._stack[depth:]
+                break
+        if not self._stack:
+            self._finish()
+
+    def handle_data(self, data):
+        for _, _, chunks in self._captures:
+            chunks.append(data.strip())
+
+    def _close_captures(self, depth):
+        remaining = []
+        for field, field_depth, chunks in self._captures:
+            if field_depth >= depth:
+                self._fields[field] = "".join(chunks)
+            else:
+                remaining.append((field, field_depth, chunks))
+        self._captures = remaining
+
+    def _finish(self):
+        self._close_captures(0)
+        fields = self._fields
+        self.rows.append(tuple(fields.get(name) for name in RAW_FIELDS))
+        self._stack = None
+        self._fields = None
+
+
+def _raw_rows_stream(html):
+    tokenizer = _FixtureTokenizer()
+    tokenizer.feed(html)
+    tokenizer.close()
+    return tokenizer.rows
+
+
+# ----------------------------------------------------------------------------
+# Backend BeautifulSoup (implémentation historique de scrape_matches)
+# ----------------------------------------------------------------------------
+def _raw_rows_bs4(html):
+    from bs4 import BeautifulSoup
+
+    def safe_text(el):
+        return el.get_text(strip=True) if el else None
+
+    soup = BeautifulSoup(html, "html.parser")
+    for f in soup.find_all(class_=FIXTURE_CLASS):
+        yield (
+            f.get("data-match"), f.get("data-date"), safe_text(f.select_one("abbr")),
+            f.get("data-competition_stage"), f.get("data-match_winner_side"),
+            safe_text(f.select_one(".Opta-Home .Opta-TeamName")), safe_text(f.select_one(".Opta-Away .Opta-TeamName")),
+            safe_text(f.select_one(".Opta-Score.Opta-Home .Opta-Team-Score")),
+            safe_text(f.select_one(".Opta-Score.Opta-Away .Opta-Team-Score")),
+        )
+
+
+BACKENDS = {
+    "lxml": _raw_rows_lxml,
+    "stream": _raw_rows_stream,
+    "bs4": _raw_rows_bs4,
+}
+DEFAULT_BACKEND = "lxml" if HAS_LXML else "stream"
+
+
+def parse_fixtures(html, backend=None):
+    """Extrait la liste des matchs d'une page de calendrier"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "lxml" and not HAS_LXML:
+        raise ImportError("lxml n'est pas installé (pip install lxml)")
+    return build_matches(BACKENDS[backend](html))
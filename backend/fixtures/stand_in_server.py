@@ -0,0 +1,164 @@
+"""
+Serveur HTTP local qui imite le site de la CAF pour tester le scraping
+=====================================================================
+- /caf_calendar.html, /caf_calendar_scheduled.html : pages sauvegardées, où
+  chaque fixture reçoit un lien vers sa page de détail (/match/<id>.html) ;
+- /match/<id>.html : page de détail générée (stade, ville, coup d'envoi) ;
+- /stats : requêtes reçues, pic de requêtes simultanées, erreurs injectées.
+
+Latence et erreurs 503 aléatoires (--latency-ms, --fail-rate) permettent
+d'exercer la concurrence, les retries et la limitation de débit du scraper.
+
+Usage (depuis backend/) :
+    python fixtures/stand_in_server.py [--port 8765] [--latency-ms 100] [--fail-rate 0.1]
+    CAN2025_MATCHES_URL=http://127.0.0.1:8765/caf_calendar.html python app.py
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+CALENDAR_PAGES = ["caf_calendar.html", "caf_calendar_scheduled.html"]
+# Stades de dataset_can_2025_realiste.csv
+VENUES = [
+    ("Complexe Prince Moulay Abdellah", "Rabat"), ("Stade Mohammed V", "Casablanca"),
+    ("Grand Stade Tanger", "Tanger"), ("Grand Stade Marrakech", "Marrakech"), ("Grand Stade Agadir", "Agadir"),
+    ("Complexe Fès", "Fès"), ("Stade El Barid", "Rabat"), ("Complexe Prince Héritier", "Rabat"),
+    ("Stade Annexe", "Rabat"),
+]
+MOROCCO_TZ = timezone(timedelta(hours=1))
+FIXTURE_TAG = re.compile(r'(<div class="Opta-fixture"[^>]*data-match="(\d+)"[^>]*>)')
+
+DETAIL_PAGE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Match {match_id}</title></head>
+<body>
+  <div class="Opta Opta-MatchHeader" data-match="{match_id}">
+    <div class="Opta-Kickoff"><time datetime="{kickoff}">{kickoff_label}</time></div>
+    <div class="Opta-VenueInfo"><span class="Opta-Venue">{stadium}</span>, <span class="Opta-City">{city}</span></div>
+  </div>
+</body></html>
+"""
+
+
+def load_calendars():
+    """{page: HTML avec liens} et {match_id: timestamp ms} des pages sauvegardées"""
+    pages, dates = {}, {}
+    for name in CALENDAR_PAGES:
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            html = f.read()
+        for match_id, date_ms in re.findall(r'data-match="(\d+)" data-date="(\d+)"', html):
+            dates[match_id] = int(date_ms)
+        pages[name] = FIXTURE_TAG.sub(r'\1<a class="Opta-MatchLink" href="/match/\2.html"></a>', html)
+    return pages, dates
+
+
+def detail_page(match_id, dates):
+    stadium, city = VENUES[int(match_id) % len(VENUES)]
+    kickoff = (datetime.fromtimestamp(dates[match_id] / 1000, MOROCCO_TZ) if match_id in dates
+               else datetime(2026, 1, 18, 20, 0, tzinfo=MOROCCO_TZ))
+    return DETAIL_PAGE.format(match_id=match_id, stadium=stadium, city=city, kickoff=kickoff.isoformat(),
+                              kickoff_label=kickoff.strftime("%d/%m/%Y %H:%M"))
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_s=0.0, fail_rate=0.0, seed=0):
+        super().__init__(address, StandInHandler)
+        self.pages, self.dates = load_calendars()
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "detail_requests": 0, "injected_errors": 0, "in_flight": 0,
+                      "max_in_flight": 0, "min_interval_ms": None}
+        self._last_request = None
+
+    def enter(self):
+        with self.lock:
+            now = time.perf_counter()
+            if self._last_request is not None:
+                interval = (now - self._last_request) * 1000
+                if self.stats["min_interval_ms"] is None or interval < self.stats["min_interval_ms"]:
+                    self.stats["min_interval_ms"] = round(interval, 2)
+            self._last_request = now
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            return self.random.random() < self.fail_rate
+
+    def leave(self):
+        with self.lock:
+            self.stats["in_flight"] -= 1
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?")[0].lstrip("/")
+        if path == "stats":
+            with server.lock:
+                return self._send(200, json.dumps(server.stats), "application/json")
+        fail = server.enter()
+        try:
+            time.sleep(server.latency_s)
+            match = re.fullmatch(r"match/(\d+)\.html", path)
+            if match:
+                with server.lock:
+                    server.stats["detail_requests"] += 1
+                if fail:
+                    with server.lock:
+                        server.stats["injected_errors"] += 1
+                    return self._send(503, "Service indisponible", headers={"Retry-After": "0"})
+                return self._send(200, detail_page(match.group(1), server.dates))
+            if path in server.pages:
+                return self._send(200, server.pages[path])
+            return self._send(404, "Introuvable")
+        finally:
+            server.leave()
+
+
+def start_stand_in(port=0, latency_s=0.0, fail_rate=0.0, seed=0):
+    """Démarre le serveur dans un thread ; retourne (serveur, URL de base)"""
+    server = StandInServer(("127.0.0.1", port), latency_s, fail_rate, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StandInServer(("127.0.0.1", args.port), args.latency_ms / 1000, args.fail_rate, args.seed)
+    print(f"🌐 Site CAF local sur http://127.0.0.1:{args.port}/caf_calendar.html (statistiques : /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
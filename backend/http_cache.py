@@ -0,0 +1,108 @@
+"""
+Cache HTTP des réponses JSON déterministes (viz, résumé des données)
+====================================================================
+- ETag fort dérivé de la version des données (chemin, mtime, taille) et de l'URL
+- If-None-Match -> 304 Not Modified sans recalculer ni resérialiser la réponse
+- Cache-Control (revalidation obligatoire, durée configurable)
+- Compression brotli (si le module est installé) ou gzip selon Accept-Encoding ;
+  les corps encodés sont mémorisés par (ETag, encodage)
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel, gzip sert de repli
+    brotli = None
+
+MAX_AGE = int(os.environ.get("CAN2025_HTTP_MAX_AGE", "0"))
+MIN_COMPRESS_BYTES = 1024
+MAX_ENCODED_BODIES = 128
+
+_bodies = OrderedDict()
+_bodies_lock = threading.Lock()
+
+
+def make_etag(version, key=None):
+    """ETag fort : hash de la version des données et de la ressource (chemin + paramètres)"""
+    key = key if key is not None else request.full_path
+    return hashlib.sha256(f"{key}|{version}".encode("utf-8")).hexdigest()[:32]
+
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def _encode(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def _cached_body(etag, encoding):
+    with _bodies_lock:
+        body = _bodies.get((etag, encoding))
+        if body is not None:
+            _bodies.move_to_end((etag, encoding))
+        return body
+
+
+def _remember_body(etag, encoding, body):
+    with _bodies_lock:
+        _bodies[(etag, encoding)] = body
+        while len(_bodies) > MAX_ENCODED_BODIES:
+            _bodies.popitem(last=False)
+
+
+def _set_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, must-revalidate"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def conditional_json(version, build, key=None):
+    """Réponse JSON conditionnelle pour une donnée déterministe à version donnée
+
+    build() -> (payload, code HTTP) n'est appelé que si la réponse n'est ni en cache
+    chez le client (304) ni déjà sérialisée ici. Seules les réponses 200 sont mises en cache.
+    Sans version (données absentes), la réponse est servie sans cache.
+    """
+    if version is None:
+        payload, status_code = build()
+        return current_app.json.response(payload), status_code
+
+    etag = make_etag(version, key)
+    if request.if_none_match.contains(etag):
+        return _set_cache_headers(current_app.response_class(status=304), etag)
+
+    raw = _cached_body(etag, "identity")
+    if raw is None:
+        payload, status_code = build()
+        if status_code != 200:
+            return current_app.json.response(payload), status_code
+        raw = current_app.json.dumps(payload).encode("utf-8")
+        _remember_body(etag, "identity", raw)
+
+    encoding = choose_encoding() if len(raw) >= MIN_COMPRESS_BYTES else "identity"
+    body = _cached_body(etag, encoding)
+    if body is None:
+        body = _encode(raw, encoding)
+        _remember_body(etag, encoding, body)
+
+    response = current_app.response_class(body, mimetype="application/json")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    return _set_cache_headers(response, etag)
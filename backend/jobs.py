@@ -0,0 +1,166 @@
+"""
+Exécution des tâches longues en arrière-plan
+============================================
+Un POST soumet le travail à un pool de threads et renvoie immédiatement un
+identifiant de job ; /api/jobs/<id> expose l'état, la progression, la durée de
+chaque étape et le résultat. Un seul job actif par clé (type de tâche, et
+paramètres s'ils sont fournis) : soumettre à nouveau la même tâche avec les
+mêmes paramètres pendant qu'elle tourne renvoie le job existant.
+
+Avec un store partagé (cf. workflow_store), chaque changement d'un job y est
+recopié : n'importe quel worker peut alors répondre sur son état.
+"""
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = kind  # clé de déduplication (cf. JobManager.submit)
+        self.state = QUEUED
+        self.progress = 0
+        self.steps = []  # [{"name", "started_at", "duration_s"}]
+        self.result = None
+        self.status_code = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._step_start = None
+        self._lock = threading.Lock()
+        self.listener = None  # appelé avec le job après chaque changement
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    def update(self, progress, step=None):
+        """Met à jour la progression (0-100) ; un nom d'étape clôt l'étape précédente"""
+        with self._lock:
+            self.progress = max(0, min(100, int(progress)))
+            if step is not None:
+                self._close_step()
+                self.steps.append({"name": step, "started_at": datetime.now().isoformat(), "duration_s": None})
+                self._step_start = time.perf_counter()
+        self._notify()
+
+    def _notify(self):
+        if self.listener is not None:
+            try:
+                self.listener(self)
+            except Exception as e:
+                print(f"⚠️ Impossible de publier l'état du job {self.id}: {e}")
+
+    def _close_step(self):
+        if self.steps and self.steps[-1]["duration_s"] is None:
+            self.steps[-1]["duration_s"] = round(time.perf_counter() - self._step_start, 3)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "state": self.state,
+                "progress": self.progress,
+                "steps": [dict(s) for s in self.steps],
+                "result": self.result,
+                "status_code": self.status_code,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    def __init__(self, max_workers=4, max_history=200, store=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="can2025-job")
+        self.max_history = max_history
+        self.store = store
+        self._jobs = {}
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, key=None):
+        """Soumet fn(job) -> (résultat, code HTTP) ; renvoie (job, créé ou non)
+
+        key (par défaut kind) identifie les jobs équivalents : un job actif de même clé est renvoyé tel quel.
+        """
+        key = key or kind
+        with self._lock:
+            existing = self._active_by_key.get(key)
+            if existing is not None and existing.active:
+                return existing, False
+            job = Job(kind)
+            job.key = key
+            if self.store is not None:
+                job.listener = lambda j: self.store.put_job(j.to_dict())
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job
+            self._prune()
+        job._notify()
+        self.executor.submit(self._run, job, fn)
+        return job, True
+
+    def _run(self, job, fn):
+        job.state = RUNNING
+        job.started_at = datetime.now().isoformat()
+        job._notify()
+        try:
+            result, status_code = fn(job)
+            with job._lock:
+                job._close_step()
+                job.result = result
+                job.status_code = status_code
+                job.state = SUCCEEDED if status_code < 400 else FAILED
+                if job.state == FAILED and isinstance(result, dict):
+                    job.error = result.get("error")
+                job.progress = 100
+        except Exception as e:
+            traceback.print_exc()
+            with job._lock:
+                job._close_step()
+                job.state = FAILED
+                job.status_code = 500
+                job.error = str(e)
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            with self._lock:
+                if self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+            job._notify()
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        """État d'un job (dict), lancé par ce processus ou par un autre worker via le store"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.get_job(job_id) if self.store is not None else None
+
+    def list(self):
+        with self._lock:
+            jobs = {job.id: job.to_dict() for job in self._jobs.values()}
+        if self.store is not None:
+            for job in self.store.list_jobs():
+                jobs.setdefault(job["id"], job)
+        return sorted(jobs.values(), key=lambda j: j["created_at"])
+
+    def _prune(self):
+        """Oublie les jobs terminés les plus anciens au-delà de max_history"""
+        finished = [j for j in self._jobs.values() if not j.active]
+        for job in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job.id]
@@ -0,0 +1,96 @@
+"""
+Dépendances lourdes chargées à la première utilisation
+======================================================
+scikit-learn, lxml et Playwright ne sont pas importés au démarrage : chaque
+sous-système les importe dans la fonction qui s'en sert (le coût n'est payé
+qu'une fois par processus, les imports suivants sont une simple recherche
+dans sys.modules). Le démarrage d'un worker ne charge que Flask, pandas et numpy.
+
+preload() importe à l'avance les modules d'un ou plusieurs sous-systèmes ;
+l'application peut le lancer en arrière-plan une fois prête à servir
+(CAN2025_PRELOAD), pour que la première étape ne paie pas l'import.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+# Sous-système -> modules importés par ses fonctions
+SUBSYSTEMS = {
+    "scraping": ("lxml.html", "playwright.sync_api"),
+    "selection": ("sklearn.feature_selection", "sklearn.model_selection"),
+    "transformation": ("sklearn.preprocessing",),
+    "reduction": ("sklearn.decomposition", "sklearn.manifold", "sklearn.neighbors"),
+    "modeling": ("sklearn.impute", "sklearn.preprocessing", "sklearn.ensemble", "sklearn.metrics",
+                 "sklearn.model_selection"),
+}
+
+_lock = threading.Lock()
+_preload_seconds = {}
+_installed_packages = {}
+
+
+def parse_subsystems(value):
+    """Liste de sous-systèmes depuis "all", "0"/"" ou "modeling,reduction" (ValueError si inconnu)"""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "none", "false", "no"):
+        return []
+    if value in ("1", "all", "true", "yes"):
+        return list(SUBSYSTEMS)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SUBSYSTEMS]
+    if unknown:
+        raise ValueError(f"Sous-système(s) inconnu(s): {', '.join(unknown)} (choix: {', '.join(SUBSYSTEMS)})")
+    return names
+
+
+def _installed(module):
+    # find_spec d'un sous-module importerait le paquet parent : on ne teste que le paquet racine
+    package = module.partition(".")[0]
+    if package not in _installed_packages:
+        _installed_packages[package] = importlib.util.find_spec(package) is not None
+    return _installed_packages[package]
+
+
+def preload(subsystems=None):
+    """Importe les modules des sous-systèmes (tous par défaut) ; retourne {sous-système: secondes}"""
+    timings = {}
+    for name in subsystems if subsystems is not None else SUBSYSTEMS:
+        start = time.perf_counter()
+        for module in SUBSYSTEMS[name]:
+            # Dépendance optionnelle absente : le sous-système signalera l'erreur à son premier usage
+            if _installed(module):
+                importlib.import_module(module)
+        timings[name] = time.perf_counter() - start
+        with _lock:
+            _preload_seconds.setdefault(name, timings[name])
+    return timings
+
+
+def preload_in_background(subsystems):
+    """Lance preload() dans un thread démon (rien si la liste est vide) ; retourne le thread"""
+    if not subsystems:
+        return None
+
+    def run():
+        timings = preload(subsystems)
+        print(f"📦 Dépendances préchargées en {sum(timings.values()):.2f} s : "
+              + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in timings.items()))
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    """État de chaque sous-système : modules déjà importés (par preload ou par un premier usage)"""
+    with _lock:
+        seconds = dict(_preload_seconds)
+    return {
+        name: {
+            "loaded": all(module in sys.modules for module in modules if _installed(module)),
+            "preload_seconds": round(seconds[name], 4) if name in seconds else None,
+        }
+        for name, modules in SUBSYSTEMS.items()
+    }
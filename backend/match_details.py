@@ -0,0 +1,333 @@
+"""
+Scraping concurrent des pages de détail des matchs
+==================================================
+Le calendrier ne donne ni le stade ni l'heure officielle du coup d'envoi : ils
+sont lus sur la page de détail de chaque match. Les liens sont relevés dans
+les fixtures du calendrier (premier <a href> de chaque .Opta-fixture), ou
+construits depuis un gabarit d'URL ({match_id}).
+
+Les pages sont récupérées par une boucle asyncio :
+- concurrence bornée (sémaphore) ; les appels HTTP bloquants (urllib) tournent
+  dans un pool de threads de même taille ;
+- limitation de débit par hôte (intervalle minimal entre deux requêtes), retries
+  compris ;
+- retries avec backoff exponentiel et jitter sur erreurs réseau, 429 et 5xx
+  (Retry-After respecté).
+
+Les matchs déjà terminés dont on connaît le stade ne sont pas re-téléchargés.
+Chaque résultat est écrit dès qu'il arrive : les nouveaux matchs sont ajoutés
+en fin de CSV ; le fichier n'est réécrit (une fois, atomiquement) que si des
+lignes existantes ont changé.
+"""
+import asyncio
+import csv
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+from browser_pool import USER_AGENT
+from fixture_parser import FIXTURE_CLASS, VOID_TAGS
+
+# Statuts affichés par le widget une fois le match joué (les matchs reportés ne sont pas terminés)
+FINAL_STATUSES = {"Match Terminé", "Ap. Prol.", "Ap. TAB", "FT", "FT+P", "AET"}
+DETAIL_FIELDS = ["stadium", "city", "kickoff"]
+MATCH_COLUMNS = ["match_id", "date", "status", "stage", "home_team", "away_team", "home_score", "away_score",
+                 "winner_side", "is_draw"] + DETAIL_FIELDS
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_HOST = 4.0
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT_S = 15.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_S = 0.5
+MAX_RETRY_AFTER_S = 30.0
+
+
+# ----------------------------------------------------------------------------
+# Parsing (calendrier et page de détail)
+# ----------------------------------------------------------------------------
+class _FixtureLinkParser(HTMLParser):
+    """Premier lien <a href> à l'intérieur de chaque fixture"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = {}
+        self._match_id = None
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._match_id is None:
+            if FIXTURE_CLASS in (attrs.get("class") or "").split() and attrs.get("data-match"):
+                self._match_id, self._depth = attrs["data-match"], 1
+            return
+        if tag == "a" and attrs.get("href") and self._match_id not in self.links:
+            self.links[self._match_id] = attrs["href"]
+        if tag not in VOID_TAGS:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if self._match_id is not None and tag not in VOID_TAGS:
+            self._depth -= 1
+            if self._depth == 0:
+                self._match_id = None
+
+
+def fixture_links(html, base_url):
+    """{match_id: URL absolue de la page de détail} pour les fixtures qui contiennent un lien"""
+    parser = _FixtureLinkParser()
+    parser.feed(html)
+    parser.close()
+    return {match_id: urljoin(base_url, href) for match_id, href in parser.links.items()}
+
+
+class _MatchDetailParser(HTMLParser):
+    """Stade (.Opta-Venue), ville (.Opta-City) et coup d'envoi (<time datetime>) d'une page de match"""
+
+    CLASSES = {"Opta-Venue": "stadium", "Opta-City": "city"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields = {}
+        self._capture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "time" and attrs.get("datetime") and "kickoff" not in self.fields:
+            self.fields["kickoff"] = attrs["datetime"]
+        for cls in (attrs.get("class") or "").split():
+            field = self.CLASSES.get(cls)
+            if field and field not in self.fields:
+                self._capture = (field, tag, [])
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._capture[2].append(data)
+
+    def handle_endtag(self, tag):
+        if self._capture is not None and tag == self._capture[1]:
+            field, _, chunks = self._capture
+            self.fields[field] = " ".join("".join(chunks).split()) or None
+            self._capture = None
+
+
+def parse_match_detail(html):
+    parser = _MatchDetailParser()
+    parser.feed(html)
+    parser.close()
+    return {field: parser.fields.get(field) for field in DETAIL_FIELDS}
+
+
+# ----------------------------------------------------------------------------
+# Téléchargement concurrent
+# ----------------------------------------------------------------------------
+class FetchError(Exception):
+    pass
+
+
+class HostRateLimiter:
+    """Au plus rate requêtes par seconde et par hôte (intervalle minimal entre deux départs)"""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host else 0.0
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+
+def _http_get(url, timeout):
+    """GET bloquant (exécuté dans le pool de threads) ; retourne (statut, Retry-After, texte)"""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return response.status, None, response.read().decode(charset, errors="replace")
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("Retry-After"), ""
+
+
+def _retry_delay(attempt, retry_after):
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_AFTER_S)
+        except ValueError:
+            pass
+    delay = BACKOFF_BASE_S * 2 ** attempt
+    return delay + random.uniform(0, delay)
+
+
+class DetailFetcher:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+                 retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT_S):
+        self.concurrency = max(1, int(concurrency))
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.retries = retries
+        self.timeout = timeout
+        self.stats = {"requests": 0, "retries": 0, "fetched": 0, "failed": 0}
+
+    async def fetch(self, url, executor):
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait(host)
+            self.stats["requests"] += 1
+            try:
+                status, retry_after, text = await loop.run_in_executor(executor, _http_get, url, self.timeout)
+            except (urllib.error.URLError, OSError) as e:
+                status, retry_after, text, error = None, None, "", str(getattr(e, "reason", e))
+            else:
+                if status == 200:
+                    return text
+                error = f"HTTP {status}"
+                if status not in RETRY_STATUSES:
+                    raise FetchError(f"{url}: {error}")
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(_retry_delay(attempt, retry_after))
+        raise FetchError(f"{url}: {error} après {self.retries + 1} tentatives")
+
+    async def run(self, urls, on_result):
+        """Télécharge {match_id: url} ; on_result(match_id, détails ou None, erreur ou None) dès chaque réponse"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(match_id, url):
+            async with semaphore:
+                try:
+                    return match_id, parse_match_detail(await self.fetch(url, executor)), None
+                except FetchError as e:
+                    return match_id, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="match-details") as executor:
+            for task in asyncio.as_completed([one(m, u) for m, u in urls.items()]):
+                match_id, detail, error = await task
+                self.stats["fetched" if error is None else "failed"] += 1
+                on_result(match_id, detail, error)
+
+
+# ----------------------------------------------------------------------------
+# CSV des matchs, mis à jour de façon incrémentale
+# ----------------------------------------------------------------------------
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+class MatchStore:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.rows = {}
+        self.header_ok = False
+        self.dirty = False
+        self.appended = 0
+        if os.path.exists(csv_path):
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                self.header_ok = reader.fieldnames == MATCH_COLUMNS
+                for row in reader:
+                    # En-tête étranger : les lignes sans match_id ne peuvent pas être reprises
+                    if row.get("match_id"):
+                        self.rows[row["match_id"]] = {c: row.get(c) or "" for c in MATCH_COLUMNS}
+            # Ancien format ou en-tête étranger (même sans lignes) : une seule réécriture complète à la fin
+            self.dirty = not self.header_ok
+
+    def get(self, match_id):
+        return self.rows.get(str(match_id))
+
+    def put(self, match):
+        """Ajoute la ligne en fin de fichier si le match est nouveau ; sinon la réécriture finale la prendra"""
+        row = {c: _cell(match.get(c)) for c in MATCH_COLUMNS}
+        key = row["match_id"]
+        previous = self.rows.get(key)
+        self.rows[key] = row
+        if previous is not None:
+            self.dirty |= previous != row
+        elif not self.dirty:
+            new_file = not os.path.exists(self.csv_path)
+            with open(self.csv_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=MATCH_COLUMNS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+            self.header_ok = True
+            self.appended += 1
+
+    def flush(self):
+        """Réécrit le CSV (fichier temporaire + os.replace) si des lignes existantes ont changé"""
+        if not self.dirty:
+            return False
+        tmp_path = f"{self.csv_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=MATCH_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows.values())
+        os.replace(tmp_path, self.csv_path)
+        self.dirty = False
+        return True
+
+
+def needs_detail(match, stored):
+    """Un match terminé dont le stade est connu ne change plus : inutile de retélécharger sa page"""
+    return not (match["status"] in FINAL_STATUSES and stored and stored.get("stadium"))
+
+
+def update_matches(matches, calendar_html, calendar_url, csv_path, url_template=None, fetcher=None,
+                   progress=None):
+    """Complète les matchs du calendrier avec leur page de détail et met à jour csv_path au fil de l'eau
+
+    Retourne (matchs complétés, statistiques).
+    """
+    progress = progress or (lambda pct: None)
+    fetcher = fetcher or DetailFetcher()
+    store = MatchStore(csv_path)
+    links = fixture_links(calendar_html, calendar_url)
+    by_id = {str(m["match_id"]): dict(m) for m in matches}
+    urls, skipped, no_link = {}, 0, 0
+    for match_id, match in by_id.items():
+        stored = store.get(match_id)
+        for field in DETAIL_FIELDS:
+            match[field] = (stored or {}).get(field) or match.get(field)
+        url = links.get(match_id) or (url_template.format(match_id=match_id) if url_template else None)
+        if not needs_detail(match, stored):
+            skipped += 1
+        elif url is None:
+            no_link += 1
+        else:
+            urls[match_id] = url
+            continue
+        store.put(match)
+
+    errors = []
+
+    def on_result(match_id, detail, error):
+        match = by_id[match_id]
+        if detail is not None:
+            match.update({field: value for field, value in detail.items() if value})
+        else:
+            errors.append(error)
+        store.put(match)
+        done = fetcher.stats["fetched"] + fetcher.stats["failed"]
+        progress(int(100 * done / len(urls)))
+
+    start = time.perf_counter()
+    if urls:
+        asyncio.run(fetcher.run(urls, on_result))
+    rewritten = store.flush()
+    stats = dict(fetcher.stats, to_fetch=len(urls), skipped_final=skipped, without_link=no_link,
+                 appended=store.appended, rewritten=rewritten, elapsed_s=round(time.perf_counter() - start, 3),
+                 errors=errors[:10])
+    return list(by_id.values()), stats
@@ -0,0 +1,177 @@
+"""
+Cube OLAP précalculé pour les requêtes de visualisation filtrées
+================================================================
+Un tableau numpy dense par mesure et par statistique (count, sum, sumsq, min,
+max), indexé par Ville × Categorie × Phase_Competition × Jour_Semaine ×
+Effet_Maroc. Le cube est construit une fois par version du dataset (une passe
+np.bincount, sans groupby) ; une requête filtrée et agrégée (ex : « prix moyen
+par ville en Cat 1 le week-end ») se résume ensuite à un découpage np.ix_ et à
+quelques réductions sur quelques milliers de cellules au plus.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['Ville', 'Categorie', 'Phase_Competition', 'Jour_Semaine', 'Effet_Maroc']
+CUBE_MEASURES = ['Prix_Final_MAD', 'Indice_Demande']
+CUBE_STATS = ('count', 'sum', 'sumsq', 'min', 'max')
+
+
+def _label(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+class OlapCube:
+    def __init__(self, labels, arrays):
+        self.labels = labels  # dimension -> liste ordonnée des valeurs
+        self.dimensions = list(labels)
+        self.arrays = arrays  # "<mesure>__<stat>" -> ndarray de forme (len(labels[d]) for d in dimensions)
+        self.measures = sorted({name.split("__")[0] for name in arrays}, key=CUBE_MEASURES.index)
+        # Les filtres arrivent en texte (query string) : correspondance sur str(valeur)
+        self._positions = {d: {str(v): i for i, v in enumerate(values)} for d, values in labels.items()}
+
+    @classmethod
+    def build(cls, df):
+        dims = [d for d in CUBE_DIMENSIONS if d in df.columns]
+        labels, codes = {}, []
+        for d in dims:
+            code, uniques = pd.factorize(df[d], sort=True, use_na_sentinel=False)
+            labels[d] = [None if pd.isna(v) else _label(v) for v in uniques]
+            codes.append(code)
+        shape = tuple(len(labels[d]) for d in dims)
+        size = int(np.prod(shape)) if dims else 1
+        flat = np.ravel_multi_index(codes, shape) if dims else np.zeros(len(df), dtype=np.int64)
+
+        arrays = {}
+        for m in [m for m in CUBE_MEASURES if m in df.columns]:
+            values = df[m].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            idx, v = flat[valid], values[valid]
+            minimum = np.full(size, np.inf)
+            maximum = np.full(size, -np.inf)
+            np.minimum.at(minimum, idx, v)
+            np.maximum.at(maximum, idx, v)
+            stats = {
+                'count': np.bincount(idx, minlength=size).astype(float),
+                'sum': np.bincount(idx, weights=v, minlength=size),
+                'sumsq': np.bincount(idx, weights=v * v, minlength=size),
+                'min': minimum,
+                'max': maximum,
+            }
+            for stat, arr in stats.items():
+                arrays[f"{m}__{stat}"] = arr.reshape(shape)
+        return cls(labels, arrays)
+
+    def query(self, filters=None, group_by=None):
+        """Agrège les cellules sélectionnées par filters {dimension: [valeurs]} sur les dimensions group_by
+
+        Retourne une ligne par combinaison non vide : dimensions, count, puis pour chaque mesure
+        la moyenne (nom de la mesure), _std (ddof=1), _min, _max et _sum.
+        """
+        filters = filters or {}
+        group_by = list(group_by or [])
+        for d in list(filters) + group_by:
+            if d not in self._positions:
+                raise ValueError(f"Dimension inconnue: {d} (disponibles: {', '.join(self.dimensions)})")
+
+        selection = []
+        for d in self.dimensions:
+            if d in filters:
+                wanted = [self._positions[d][str(v)] for v in filters[d] if str(v) in self._positions[d]]
+                selection.append(np.array(sorted(set(wanted)), dtype=np.int64))
+            else:
+                selection.append(np.arange(len(self.labels[d])))
+        index = np.ix_(*selection)
+        # Axes à réduire, puis réordonnés dans l'ordre demandé par group_by
+        reduce_axes = tuple(i for i, d in enumerate(self.dimensions) if d not in group_by)
+        kept = [d for d in self.dimensions if d in group_by]
+        order = [kept.index(d) for d in group_by]
+
+        reduced = {}
+        for name, arr in self.arrays.items():
+            sub = arr[index]
+            stat = name.split("__")[1]
+            if stat == 'min':
+                out = sub.min(axis=reduce_axes, initial=np.inf)
+            elif stat == 'max':
+                out = sub.max(axis=reduce_axes, initial=-np.inf)
+            else:
+                out = sub.sum(axis=reduce_axes)
+            reduced[name] = np.transpose(out, order) if order else out
+
+        group_labels = [[self.labels[d][i] for i in selection[self.dimensions.index(d)]] for d in group_by]
+        count_key = f"{self.measures[0]}__count" if self.measures else None
+        rows = []
+        for cell in np.ndindex(*[len(g) for g in group_labels]):
+            if count_key is None or reduced[count_key][cell] == 0:
+                continue
+            row = {d: group_labels[k][i] for k, (d, i) in enumerate(zip(group_by, cell))}
+            row['count'] = int(reduced[count_key][cell])
+            for m in self.measures:
+                n = reduced[f"{m}__count"][cell]
+                total = reduced[f"{m}__sum"][cell]
+                sumsq = reduced[f"{m}__sumsq"][cell]
+                row[m] = float(total / n) if n else None
+                row[f"{m}_std"] = float(np.sqrt(max((sumsq - total * total / n) / (n - 1), 0.0))) if n > 1 else 0.0
+                row[f"{m}_min"] = float(reduced[f"{m}__min"][cell]) if n else None
+                row[f"{m}_max"] = float(reduced[f"{m}__max"][cell]) if n else None
+                row[f"{m}_sum"] = float(total)
+            rows.append(row)
+        return rows
+
+    def save(self, path, version):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        meta = json.dumps({"version": version, "labels": self.labels}, ensure_ascii=False)
+        np.savez(tmp_path, __meta__=np.array(meta), **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, version):
+        """Cube sauvegardé pour cette version du dataset, ou None"""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["__meta__"]))
+                if meta["version"] != version:
+                    return None
+                arrays = {name: data[name] for name in data.files if name != "__meta__"}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(meta["labels"], arrays)
+
+
+class OlapCubeStore:
+    """Cube courant en mémoire et sur disque, reconstruit seulement quand la version du dataset change"""
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        self.version = None
+        self.cube = None
+        self.builds = 0
+        self._lock = threading.Lock()
+
+    def get(self, version, load_df):
+        with self._lock:
+            if version is None:
+                return None
+            if self.version == version:
+                return self.cube
+            cube = OlapCube.load(self.store_path, version)
+            if cube is None:
+                df = load_df()
+                if df is None:
+                    return None
+                cube = OlapCube.build(df)
+                cube.save(self.store_path, version)
+                self.builds += 1
+            self.cube = cube
+            self.version = version
+            return cube
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+            self.cube = None
@@ -1,25 +1,112 @@
 import pandas as pd
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, LabelEncoder, OneHotEncoder
-from sklearn.feature_selection import SequentialFeatureSelector
-from sklearn.linear_model import LinearRegression
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE, LocallyLinearEmbedding
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
 import os
 import json
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from artifact_store import ArtifactStore, hash_dataframe
+from columnar_storage import apply_schema, compact_frame, memory_footprint, read_compact, read_dataset, write_dataset
+from feature_selection import DIRECTIONS, PRESCREEN_METHODS, SequentialSelector, prescreen
+from price_surface import PriceSurface
+from reduction_engine import EMBEDDING_MAX_INPUT_DIM, EMBEDDING_METHODS, PCA_STRATEGIES, fit_embedding, fit_pca
+from step_cache import StepCheckpointStore, step_key, hash_file
+from workflow_store import MemoryStateStore
+
+# scikit-learn est importé à la première étape qui s'en sert (cf. lazy_imports) : démarrage rapide
+
+# Variables utilisées par le modèle de prix (cf. formulaire PredictPrice.tsx)
+MODEL_FEATURES = [
+    "Capacite_Stade", "Prestige_Stade", "Score_Visibilite", "Distance_Pelouse_m",
+    "Classement_FIFA_Moyen", "Valeur_Marchande_Totale_MEUR", "Score_Rivalite",
+    "Effet_Maroc", "Indice_Demande", "Categorie"
+]
+CATEGORICAL_FEATURES = ["Categorie"]
+TARGET = "Prix_Final_MAD"
+ID_COLUMNS = ["Match_ID"]
+# "compact" : catégories, petits entiers et float32 (cf. columnar_storage.compact_schema) ; "standard" : schéma déclaré
+IMPORT_DTYPES = ("compact", "standard")
+
+STEP_ORDER = ["import", "cleaning", "selection", "transformation", "reduction", "modeling"]
+# Étape -> étape dont la sortie sert d'entrée (le modèle s'entraîne sur les données nettoyées,
+# avec les variables brutes du formulaire de prédiction)
+STEP_INPUTS = {
+    "cleaning": "import",
+    "selection": "cleaning",
+    "transformation": "selection",
+    "reduction": "transformation",
+    "modeling": "cleaning",
+}
+STEP_METHODS = {
+    "import": "import_dataset",
+    "cleaning": "clean_data",
+    "selection": "select_features",
+    "transformation": "transform_data",
+    "reduction": "reduce_dimensions",
+    "modeling": "train_model",
+}
+DEFAULT_PARAMS = {
+    "import": {"dtypes": "compact"},
+    "cleaning": {},
+    "selection": {"n_features": 8, "direction": "forward", "cv": 5, "prescreen": None, "prescreen_keep": 30},
+    "transformation": {"scaler": "standard"},
+    "reduction": {"n_components": 5, "method": "tsne", "sample": 500, "strategy": "auto",
+                  "time_budget_s": None, "memory_budget_mb": None, "project": True},
+    "modeling": {"n_estimators": 100, "test_size": 0.2, "price_surface": True},
+}
+
+# Artefacts ajustés persistés après l'entraînement (attribut du pipeline -> nom du fichier)
+PERSISTED_ARTIFACTS = {
+    "imputer": "imputer",
+    "encoders": "encoders",
+    "scalers": "scalers",
+    "pca": "pca",
+    "model": "random_forest",
+    "price_surface": "price_surface",
+}
 
 class PreprocessingPipeline:
-    def __init__(self, input_path, output_path):
+    def __init__(self, input_path, output_path, artifacts_dir=None, checkpoints_dir=None, state_store=None,
+                 catalog=None, on_step=None):
         self.input_path = input_path
         self.output_path = output_path
         self.df = None
         self.log = []
         self.model = None
+        self.price_surface = None
         self.features = []
+        self.encoders = {}
+        self.scalers = {}
+        self.pca = None
+        self.imputer = None
+        self.data_hash = None
+        self.artifact_store = ArtifactStore(artifacts_dir) if artifacts_dir else None
+        self.artifacts_version = None
+        self._pending_artifacts = []
+        # Attribut -> id de la valeur écrite dans la version courante (libérable, rechargée à la demande)
+        self._stored_artifacts = {}
+        self._artifacts_lock = threading.Lock()
+
+        # Sortie, clé de checkpoint et hashes (entrée/sortie) de chaque étape exécutée
+        self.frames = {}
+        self._frame_bytes = {}
+        self.step_state = {}
+        self.checkpoints = StepCheckpointStore(checkpoints_dir)
+        self._step_lock = threading.RLock()
+        self._depth = 0
+
+        # État partagé entre workers (cf. workflow_store) et révision vue par ce processus
+        self.state_store = state_store or MemoryStateStore()
+        self._state_revision = None
+        self._exclusive_depth = 0
+
+        # Catalogue des fichiers (cf. data_catalog) : hash de l'entrée sans la relire, sortie enregistrée
+        self.catalog = catalog
+
+        # on_step(step, cached, wall_s, cpu_s) : appelé après chaque étape (cf. métriques de app.py)
+        self.on_step = on_step
         
         # État du workflow
         self.steps_completed = {
@@ -32,10 +119,111 @@ class PreprocessingPipeline:
         }
 
     def get_workflow_status(self):
+        self.sync_state()
         return self.steps_completed
 
+    # ------------------------------------------------------------------
+    # Synchronisation avec l'état partagé (plusieurs workers)
+    # ------------------------------------------------------------------
+    def sync_state(self):
+        """Recharge l'état partagé si un autre worker l'a modifié depuis notre dernière lecture"""
+        if self.state_store.revision() == self._state_revision:
+            return False
+        with self._step_lock:
+            revision, state = self.state_store.load()
+            if state is not None:
+                shared_steps = state.get("step_state", {})
+                # Les sorties gardées en mémoire ne sont valides que si la clé du checkpoint est la même ;
+                # les autres seront restaurées à la demande depuis les checkpoints
+                for step in list(self.frames):
+                    if shared_steps.get(step, {}).get("key") != self.step_state.get(step, {}).get("key"):
+                        del self.frames[step]
+                self.step_state = shared_steps
+                self.steps_completed.update(state.get("steps_completed", {}))
+                version = state.get("artifacts_version")
+                if version != self.artifacts_version:
+                    self.model = None
+                    self.price_surface = None
+                    self._pending_artifacts = []
+                    self._stored_artifacts = {}
+                    self.artifacts_version = None
+                    if version is not None:
+                        self.restore_artifacts()
+            self._state_revision = revision
+        return True
+
+    def publish_state(self):
+        """Écrit l'état du workflow dans le store partagé"""
+        self._state_revision = self.state_store.save({
+            "steps_completed": self.steps_completed,
+            "step_state": self.step_state,
+            "artifacts_version": self.artifacts_version,
+        })
+
+    @contextmanager
+    def _exclusive(self):
+        """Une seule exécution d'étape à la fois (threads et workers), sur l'état partagé le plus récent"""
+        with self.state_store.lock():
+            self._exclusive_depth += 1
+            try:
+                if self._exclusive_depth == 1:
+                    self.sync_state()
+                yield
+            finally:
+                self._exclusive_depth -= 1
+                if self._exclusive_depth == 0:
+                    self.publish_state()
+
+    # ------------------------------------------------------------------
+    # Mémoire (budget global des sessions, cf. sessions.SessionManager)
+    # ------------------------------------------------------------------
+    def memory_usage(self):
+        """Octets occupés par les DataFrames gardés en mémoire (sorties des étapes)"""
+        frames = {id(df): df for df in list(self.frames.values()) + [self.df] if df is not None}
+        total = 0
+        for key, df in frames.items():
+            # Les sorties ne sont jamais modifiées en place : taille calculée une fois par DataFrame
+            if key not in self._frame_bytes:
+                self._frame_bytes[key] = int(df.memory_usage(deep=True).sum())
+            total += self._frame_bytes[key]
+        self._frame_bytes = {key: size for key, size in self._frame_bytes.items() if key in frames}
+        return total
+
+    def busy(self):
+        """Une étape est-elle en cours d'exécution sur ce pipeline ?"""
+        return self._exclusive_depth > 0
+
+    def release_memory(self):
+        """Libère les sorties des étapes et les artefacts ajustés si aucune étape n'est en cours
+
+        Chaque sortie a son checkpoint sur disque : _resolve_input la restaure à la prochaine utilisation.
+        Les artefacts (modèle, encodeurs...) identiques à la version sauvegardée sont rechargés à la demande
+        (cf. load_pending_artifacts). Retourne les octets de DataFrames libérés.
+        """
+        with self._step_lock:
+            if self._exclusive_depth:
+                return 0
+            freed = self.memory_usage()
+            self.frames = {}
+            self.df = None
+            self._frame_bytes = {}
+            with self._artifacts_lock:
+                for attr, stored in self._stored_artifacts.items():
+                    value = getattr(self, attr)
+                    if id(value) != stored:
+                        continue
+                    setattr(self, attr, {} if isinstance(value, dict) else None)
+                    if attr not in self._pending_artifacts:
+                        self._pending_artifacts.append(attr)
+                self._stored_artifacts = {}
+            return freed
+
     def reset_workflow(self):
-        """Réinitialise tout le workflow"""
+        """Réinitialise tout le workflow (les checkpoints sont conservés pour les prochaines exécutions)"""
+        with self._exclusive():
+            return self._reset_workflow()
+
+    def _reset_workflow(self):
         self.steps_completed = {
             "import": False,
             "cleaning": False,
@@ -44,39 +232,504 @@ class PreprocessingPipeline:
             "reduction": False,
             "modeling": False
         }
+        self.model = None
+        self.price_surface = None
+        self.frames = {}
+        self.step_state = {}
+        self._pending_artifacts = []
+        self._stored_artifacts = {}
+        self.artifacts_version = None
+        if self.artifact_store is not None:
+            self.artifact_store.clear()
         self.log = ["Workflow réinitialisé."]
-        # On pourrait aussi supprimer le fichier output_path si on veut un reset physique
-        if os.path.exists(self.output_path):
-            try:
-                # Optionnel: On ne le supprime pas forcément pour éviter les erreurs de lecture, 
-                # mais on peut le vider ou laisser les étapes le réécrire.
-                pass
-            except Exception:
-                pass
         return {"message": "Workflow réinitialisé avec succès", "status": self.steps_completed}
 
-    def import_dataset(self):
-        """Étape 1: Importation du dataset initial"""
-        self.log = []
-        if os.path.exists(self.input_path):
-            self.df = pd.read_csv(self.input_path)
-            self.steps_completed["import"] = True
-            self.log.append(f"Dataset importé avec succès: {self.input_path}")
-            return {
-                "message": "Importation réussie",
-                "logs": self.log,
-                "shape": self.df.shape,
-                "columns": list(self.df.columns),
-                "preview": self.df.head().to_dict(orient='records')
-            }
+    # ------------------------------------------------------------------
+    # Exécution mémoïsée des étapes
+    # ------------------------------------------------------------------
+    def _resolve_input(self, step):
+        """Retourne (DataFrame, hash) de l'entrée de l'étape, en relançant l'amont si nécessaire"""
+        if step == "import":
+            if not os.path.exists(self.input_path):
+                return None, None, {"error": f"Fichier non trouvé: {self.input_path}"}
+            input_hash = self.catalog.version(self.input_path) if self.catalog else hash_file(self.input_path)
+            return None, input_hash, None
+
+        parent = STEP_INPUTS[step]
+        if parent not in self.frames:
+            # Étape amont absente de la mémoire : relancée (depuis son checkpoint si l'entrée n'a pas changé)
+            previous = self.step_state.get(parent, {})
+            result = getattr(self, STEP_METHODS[parent])(params=previous.get("params"))
+            if "error" in result:
+                return None, None, result
+        return self.frames[parent], self.step_state[parent]["output"], None
+
+    def _run_step(self, step, params, compute, progress=None):
+        """Exécute une étape ; si (entrée, paramètres) sont inchangés, restaure son checkpoint"""
+        with self._exclusive():
+            return self._run_step_locked(step, params, compute, progress)
+
+    def _run_step_locked(self, step, params, compute, progress):
+        progress = progress or (lambda pct, step=None: None)
+        # Seuls les paramètres connus de l'étape entrent dans la clé du checkpoint
+        params = {k: (params or {}).get(k, default) for k, default in DEFAULT_PARAMS[step].items()}
+        if self._depth == 0:
+            self.log = []
+        self._depth += 1
+        try:
+            input_df, input_hash, error = self._resolve_input(step)
+            if error is not None:
+                return dict(error, logs=self.log)
+
+            # Temps propre à l'étape : l'éventuelle relance de l'amont (_resolve_input) est mesurée à part
+            wall_start, cpu_start = time.perf_counter(), time.thread_time()
+            key = step_key(step, input_hash, params)
+            payload = self.checkpoints.load(step, key)
+            cached = payload is not None
+            if cached:
+                self.log.append(f"Étape '{step}' inchangée : résultat restauré depuis le checkpoint")
+                progress(100)
+            else:
+                output, result, state = compute(input_df, params, progress)
+                if "error" in result:
+                    return dict(result, logs=self.log)
+                payload = {"output": output, "result": result, "state": state}
+                self.checkpoints.save(step, key, payload)
+
+            with self._step_lock:
+                for attr, value in payload["state"].items():
+                    setattr(self, attr, value)
+                # Valeurs restaurées depuis la sortie de l'étape : la version des artefacts ne doit plus les écraser
+                with self._artifacts_lock:
+                    self._pending_artifacts = [a for a in self._pending_artifacts if a not in payload["state"]]
+                output = payload["output"]
+                output_hash = hash_dataframe(output) if output is not None else None
+                if output is not None:
+                    self.frames[step] = output
+                    self.df = output
+                # CPU du thread de l'étape (les threads internes de numpy / scikit-learn ne sont pas comptés)
+                wall_s, cpu_s = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+                self.step_state[step] = {"key": key, "input": input_hash, "output": output_hash, "params": params,
+                                         "wall_s": round(wall_s, 4), "cpu_s": round(cpu_s, 4)}
+                self.steps_completed[step] = True
+                self._invalidate_downstream(step, output_hash)
+
+            if self.on_step is not None:
+                self.on_step(step, cached, wall_s, cpu_s)
+
+            return dict(payload["result"], logs=self.log, cached=cached)
+        finally:
+            self._depth -= 1
+
+    def _invalidate_downstream(self, step, output_hash):
+        """Invalide les étapes dont l'entrée ne correspond plus à la nouvelle sortie de step"""
+        for child, parent in STEP_INPUTS.items():
+            if parent == step and child in self.step_state and self.step_state[child]["input"] != output_hash:
+                self._invalidate(child)
+
+    def _invalidate(self, step):
+        self.steps_completed[step] = False
+        self.frames.pop(step, None)
+        self.step_state.pop(step, None)
+        self.log.append(f"Étape '{step}' invalidée (entrée modifiée en amont)")
+        for child, parent in STEP_INPUTS.items():
+            if parent == step and (child in self.step_state or self.steps_completed[child]):
+                self._invalidate(child)
+
+    @staticmethod
+    def _preview(df, n=5):
+        return df.head(n).round(4).to_dict(orient='records')
+
+    # ------------------------------------------------------------------
+    # Étapes du workflow
+    # ------------------------------------------------------------------
+    def import_dataset(self, params=None, progress=None, frame=None):
+        """Étape 1: Importation du dataset initial
+
+        frame : contenu du fichier d'entrée déjà lu (ex : pendant un upload en flux), pour ne pas le relire.
+        """
+        return self._run_step("import", params, functools.partial(self._compute_import, frame=frame), progress)
+
+    def _compute_import(self, _, params, progress, frame=None):
+        if params["dtypes"] not in IMPORT_DTYPES:
+            return None, {"error": f"Mode d'import inconnu: {params['dtypes']} (attendu: {', '.join(IMPORT_DTYPES)})"}, {}
+        if params["dtypes"] == "compact":
+            # La cible reste en float64 : le modèle et ses métriques sont identiques au mode standard
+            if frame is not None:
+                df, memory = compact_frame(frame, exact=[TARGET])
+            else:
+                df, memory = read_compact(self.input_path, exact=[TARGET])
+            self.log.append(f"Types compacts: {memory['before_bytes'] / 1e6:.2f} Mo -> "
+                            f"{memory['after_bytes'] / 1e6:.2f} Mo (-{memory['reduction_pct']}%)")
         else:
-            return {"error": f"Fichier non trouvé: {self.input_path}"}
+            df = apply_schema(frame.copy()) if frame is not None else read_dataset(self.input_path)
+            footprint = memory_footprint(df)
+            memory = {"before_bytes": footprint, "after_bytes": footprint, "reduction_pct": 0.0, "dtypes": {}}
+        self.log.append(f"Dataset importé avec succès: {self.input_path}")
+        return df, {
+            "message": "Importation réussie",
+            "shape": list(df.shape),
+            "columns": list(df.columns),
+            "memory": memory,
+            "preview": df.head().to_dict(orient='records')
+        }, {}
 
-    def load_data(self):
+    def load_data(self, compact=True):
         if os.path.exists(self.input_path):
-            self.df = pd.read_csv(self.input_path)
+            self.df = read_compact(self.input_path, exact=[TARGET])[0] if compact else read_dataset(self.input_path)
             self.log.append(f"Chargement des données depuis {self.input_path}")
             return True
         else:
             self.log.append(f"Erreur: Le fichier {self.input_path} n'existe pas.")
             return False
+
+    def clean_data(self, params=None, progress=None):
+        """Étape 3: Nettoyage (doublons, valeurs manquantes) et export du dataset nettoyé"""
+        with self._exclusive():
+            result = self._run_step("cleaning", params, self._compute_cleaning, progress)
+            if "error" not in result and (not result["cached"] or not os.path.exists(self.output_path)):
+                write_dataset(self.frames["cleaning"], self.output_path)
+                if self.catalog is not None:
+                    self.catalog.record(self.output_path, self.frames["cleaning"])
+                self.log.append(f"Dataset nettoyé exporté: {self.output_path}")
+            return result
+
+    def _compute_cleaning(self, df, params, progress):
+        shape_before = list(df.shape)
+        out = df.drop_duplicates()
+        duplicates = shape_before[0] - len(out)
+
+        missing_target = 0
+        if TARGET in out.columns:
+            missing_target = int(out[TARGET].isna().sum())
+            out = out.dropna(subset=[TARGET])
+
+        numeric_cols = out.select_dtypes(include="number").columns
+        other_cols = out.columns.difference(numeric_cols)
+        missing_numeric = int(out[numeric_cols].isna().sum().sum())
+        missing_other = int(out[other_cols].isna().sum().sum())
+        fills = out[numeric_cols].median().to_dict()
+        for col in other_cols:
+            mode = out[col].mode(dropna=True)
+            if not mode.empty:
+                fills[col] = mode.iloc[0]
+        out = out.fillna(fills).reset_index(drop=True)
+
+        self.log.append(f"{duplicates} doublons supprimés, {missing_target} lignes sans prix retirées")
+        self.log.append(f"{missing_numeric + missing_other} valeurs manquantes imputées (médiane / mode)")
+        return out, {
+            "message": "Nettoyage terminé",
+            "shape_before": shape_before,
+            "shape_after": list(out.shape),
+            "resultat": {
+                "rows_processed": shape_before[0],
+                "duplicates_removed": duplicates,
+                "rows_without_target_removed": missing_target,
+                "missing_values_handled": missing_numeric + missing_other
+            },
+            "preview": self._preview(out)
+        }, {}
+
+    def select_features(self, params=None, progress=None):
+        """Étape 4: Sélection des variables (recherche séquentielle + régression linéaire, pré-filtre optionnel)"""
+        return self._run_step("selection", params, self._compute_selection, progress)
+
+    def _compute_selection(self, df, params, progress):
+        if TARGET not in df.columns:
+            return None, {"error": f"Colonne cible manquante: {TARGET}"}, {}
+        if params["prescreen"] and params["prescreen"] not in PRESCREEN_METHODS:
+            return None, {"error": f"Pré-filtre inconnu: {params['prescreen']} (attendu: {', '.join(PRESCREEN_METHODS)})"}, {}
+        if params["direction"] not in DIRECTIONS:
+            return None, {"error": f"Direction inconnue: {params['direction']} (attendu: {', '.join(DIRECTIONS)})"}, {}
+        candidates = [c for c in df.select_dtypes(include="number").columns if c != TARGET and c not in ID_COLUMNS]
+        n_features = min(int(params["n_features"]), max(len(candidates) - 1, 1))
+
+        X = df[candidates].to_numpy(dtype=float)
+        y = df[TARGET].to_numpy(dtype=float)
+        screened = candidates
+        if params["prescreen"] and len(candidates) > int(params["prescreen_keep"]):
+            progress(5, step=f"prescreen_{params['prescreen']}")
+            keep, _ = prescreen(X, y, params["prescreen"], max(int(params["prescreen_keep"]), n_features))
+            keep = np.sort(keep)
+            screened = [candidates[i] for i in keep]
+            X = X[:, keep]
+            self.log.append(f"Pré-filtre ({params['prescreen']}): {len(screened)} candidates conservées sur {len(candidates)}")
+
+        if len(screened) <= n_features:
+            selected = screened
+        else:
+            progress(10, step="sequential_selection")
+            selector = SequentialSelector(n_features, direction=params["direction"], cv=int(params["cv"]))
+            selector.fit(X, y, progress)
+            selected = [c for c, keep in zip(screened, selector.get_support()) if keep]
+            self.log.append(f"Recherche séquentielle: {selector.evaluations} sous-ensembles évalués")
+
+        categorical = [c for c in CATEGORICAL_FEATURES if c in df.columns]
+        out = df[selected + categorical + [TARGET]]
+        self.log.append(f"{len(selected)} variables retenues sur {len(candidates)}: {', '.join(selected)}")
+        return out, {
+            "message": "Sélection des variables terminée",
+            "shape_before": list(df.shape),
+            "shape_after": list(out.shape),
+            "resultat": {"selected_features": selected, "candidates": candidates, "screened": screened,
+                         "direction": params["direction"]},
+            "preview": self._preview(out)
+        }, {"selected_features": selected}
+
+    def transform_data(self, params=None, progress=None):
+        """Étape 5: Transformation (normalisation des variables numériques, one-hot des catégories)"""
+        return self._run_step("transformation", params, self._compute_transformation, progress)
+
+    def _compute_transformation(self, df, params, progress):
+        from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+
+        features = df.drop(columns=[TARGET], errors="ignore")
+        numeric_cols = list(features.select_dtypes(include="number").columns)
+        categorical_cols = [c for c in features.columns if c not in numeric_cols]
+
+        scaler = MinMaxScaler() if params["scaler"] == "minmax" else StandardScaler()
+        parts = [pd.DataFrame(scaler.fit_transform(features[numeric_cols]), columns=numeric_cols, index=df.index)]
+        transformations = [f"{type(scaler).__name__} appliqué sur {len(numeric_cols)} variables numériques"]
+
+        onehot = None
+        if categorical_cols:
+            onehot = OneHotEncoder(handle_unknown="ignore", sparse_output=False)
+            encoded = onehot.fit_transform(features[categorical_cols].astype(str))
+            parts.append(pd.DataFrame(encoded, columns=onehot.get_feature_names_out(categorical_cols), index=df.index))
+            for col, cats in zip(categorical_cols, onehot.categories_):
+                transformations.append(f"One-hot encoding de {col} ({len(cats)} modalités)")
+
+        if TARGET in df.columns:
+            parts.append(df[[TARGET]])
+        out = pd.concat(parts, axis=1)
+        self.log.extend(transformations)
+        return out, {
+            "message": "Transformation terminée",
+            "transformations": transformations,
+            "shape_before": list(df.shape),
+            "shape_after": list(out.shape),
+            "preview": self._preview(out)
+        }, {"scalers": {"numeric": scaler, "onehot": onehot}}
+
+    def reduce_dimensions(self, params=None, progress=None):
+        """Étape 6: Réduction de dimensionnalité (PCA + t-SNE/LLE pour la visualisation)"""
+        return self._run_step("reduction", params, self._compute_reduction, progress)
+
+    def _compute_reduction(self, df, params, progress):
+        if params["method"] not in EMBEDDING_METHODS:
+            return None, {"error": f"Méthode de réduction inconnue: {params['method']} (attendu: {', '.join(EMBEDDING_METHODS)})"}, {}
+        if params["strategy"] not in PCA_STRATEGIES:
+            return None, {"error": f"Stratégie PCA inconnue: {params['strategy']} (attendu: {', '.join(PCA_STRATEGIES)})"}, {}
+        features = df.drop(columns=[TARGET], errors="ignore")
+        X = features.to_numpy(dtype=float)
+        y = df[TARGET].to_numpy(dtype=float) if TARGET in df.columns else np.zeros(len(df))
+        n_components = max(1, min(int(params["n_components"]), X.shape[1], X.shape[0]))
+
+        progress(10, step="pca")
+        pca, Z, solver = fit_pca(X, n_components, params["strategy"], params["memory_budget_mb"])
+        out = pd.DataFrame(Z, columns=[f"PC{i + 1}" for i in range(n_components)], index=df.index)
+
+        # t-SNE et LLE sont ajustés sur un échantillon stratifié, les autres lignes sont projetées
+        progress(40, step=params["method"])
+        embed_input = X if X.shape[1] <= EMBEDDING_MAX_INPUT_DIM else Z
+        sample, embedding, embedding_all = fit_embedding(
+            embed_input, y, params["method"], params["sample"], params["time_budget_s"], params["project"])
+        if embedding_all is not None:
+            out["EMB1"] = embedding_all[:, 0]
+            out["EMB2"] = embedding_all[:, 1]
+        if TARGET in df.columns:
+            out[TARGET] = y
+
+        def points(coords, idx):
+            second = coords[:, 1] if coords.shape[1] > 1 else np.zeros(len(coords))
+            return [{"x": round(float(a), 4), "y": round(float(b), 4), "price": round(float(p), 2)}
+                    for a, b, p in zip(coords[:, 0], second, y[idx])]
+
+        explained = [round(float(v), 4) for v in pca.explained_variance_ratio_]
+        self.log.append(f"PCA ({solver}): {n_components} composantes, {round(sum(explained) * 100, 1)}% de variance expliquée")
+        return out, {
+            "message": "Réduction de dimensionnalité terminée",
+            "shape_before": list(df.shape),
+            "shape_after": list(out.shape),
+            "pca_data": points(Z[sample], sample),
+            "tsne_data": points(embedding, sample) if embedding is not None else [],
+            "resultat": {
+                "explained_variance_ratio": explained,
+                "n_components": n_components,
+                "pca_solver": solver,
+                "embedding_method": params["method"],
+                "sample_size": int(len(sample)),
+                "projected_rows": int(len(X) - len(sample)) if embedding_all is not None else 0
+            }
+        }, {"pca": pca}
+
+    def encode_features(self, df, fit=False):
+        """Encode toutes les lignes en une seule passe vectorisée (catégories -> codes, imputation)"""
+        if fit:
+            from sklearn.impute import SimpleImputer
+            from sklearn.preprocessing import LabelEncoder
+
+            self.features = [c for c in MODEL_FEATURES if c in df.columns]
+            self.encoders = {}
+
+        columns = {}
+        for col in self.features:
+            values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            if col in CATEGORICAL_FEATURES:
+                if fit:
+                    self.encoders[col] = LabelEncoder().fit(values.dropna().astype(str))
+                # Même codage que LabelEncoder, les catégories inconnues deviennent NaN (imputées)
+                codes = pd.Categorical(values.astype(str), categories=self.encoders[col].classes_).codes
+                columns[col] = np.where(codes >= 0, codes, np.nan)
+            else:
+                columns[col] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+        X = np.column_stack([columns[col] for col in self.features]) if self.features else np.empty((len(df), 0))
+        if fit:
+            self.imputer = SimpleImputer(strategy="median", keep_empty_features=True).fit(X)
+        return self.imputer.transform(X)
+
+    def train_model(self, params=None, progress=None):
+        """Étape 7: Modélisation IA (RandomForest) pour prédire le prix des billets
+
+        progress(pourcentage, step=nom) est appelé à chaque phase si fourni (jobs en arrière-plan).
+        """
+        with self._exclusive():
+            result = self._run_step("modeling", params, self._compute_modeling, progress)
+            # Modèle restauré d'un checkpoint : la version courante des artefacts peut venir d'un autre entraînement
+            if "error" not in result and (not result["cached"] or not self._artifacts_match_modeling()):
+                self.data_hash = self.step_state["modeling"]["input"]
+                self.save_artifacts(result["metrics"])
+            return result
+
+    def _artifacts_match_modeling(self):
+        """La version courante des artefacts a-t-elle été écrite par l'entraînement de la clé actuelle ?"""
+        if self.artifacts_version is None or self.artifact_store is None:
+            return False
+        manifest = self.artifact_store.load_manifest()
+        return (manifest is not None and manifest.get("version") == self.artifacts_version
+                and manifest.get("modeling_key") == self.step_state.get("modeling", {}).get("key"))
+
+    def _compute_modeling(self, df, params, progress):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from sklearn.model_selection import train_test_split
+
+        if TARGET not in df.columns:
+            return None, {"error": f"Colonne cible manquante: {TARGET}"}, {}
+
+        data = df.dropna(subset=[TARGET])
+        progress(10, step="encodage")
+        X = self.encode_features(data, fit=True)
+        y = data[TARGET].to_numpy(dtype=float)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=float(params["test_size"]), random_state=42)
+
+        progress(25, step="entrainement")
+        model = RandomForestRegressor(n_estimators=int(params["n_estimators"]), random_state=42, n_jobs=-1)
+        model.fit(X_train, y_train)
+        progress(80, step="evaluation")
+        y_pred = model.predict(X_test)
+
+        metrics = {
+            "mae": round(float(mean_absolute_error(y_test, y_pred)), 2),
+            "r2": round(float(r2_score(y_test, y_pred)), 4),
+            "n_train": int(len(y_train)),
+            "n_test": int(len(y_test))
+        }
+        feature_importance = sorted(
+            [{"name": f, "importance": round(float(imp), 4)} for f, imp in zip(self.features, model.feature_importances_)],
+            key=lambda x: x["importance"], reverse=True
+        )
+        self.log.append(f"RandomForest entraîné sur {len(self.features)} variables (MAE={metrics['mae']}, R²={metrics['r2']})")
+
+        surface = None
+        if params["price_surface"]:
+            # Prix de toutes les lignes du dataset, pour chaque catégorie de billet (cf. price_surface)
+            progress(85, step="table de prix")
+            expand = [self.features.index(c) for c in CATEGORICAL_FEATURES if c in self.features]
+            surface = PriceSurface.build(model, X, expand)
+            self.log.append(f"Table de prix précalculée : {surface.precomputed} entrées en {surface.build_s:.2f} s")
+        progress(95, step="sauvegarde")
+        # Le modèle est une étape terminale : pas de DataFrame de sortie
+        return None, {
+            "message": "Modèle entraîné avec succès",
+            "metrics": metrics,
+            "feature_importance": feature_importance[:5],
+            "price_surface": surface.summary() if surface is not None else None
+        }, {"model": model, "price_surface": surface, "imputer": self.imputer, "encoders": self.encoders,
+            "features": self.features}
+
+    def has_model(self):
+        self.sync_state()
+        return self.model is not None or "model" in self._pending_artifacts
+
+    def predict(self, rows):
+        """Prédit le prix pour un lot de lignes (DataFrame) en un seul appel au modèle"""
+        return self.predict_with_source(rows)[0]
+
+    def predict_with_source(self, rows):
+        """(prix, masque des lignes trouvées dans la table de prix) ; les autres passent par le RandomForest"""
+        self.sync_state()
+        # Chargement et encodage sous le verrou : release_memory ne peut pas libérer les artefacts entre les deux
+        with self._step_lock:
+            self.load_pending_artifacts()
+            model, surface = self.model, self.price_surface
+            if model is None:
+                raise RuntimeError("Modèle non entraîné. Exécutez d'abord la Tâche 7 (Modélisation IA).")
+            X = self.encode_features(rows)
+        if surface is None:
+            return model.predict(X), np.zeros(len(X), dtype=bool)
+        return surface.predict(X, model)
+
+    def save_artifacts(self, metrics=None):
+        """Sauvegarde une nouvelle version des artefacts ajustés sur disque"""
+        if self.artifact_store is None:
+            return None
+        # Artefacts libérés par release_memory : rechargés pour être recopiés dans la nouvelle version
+        self.load_pending_artifacts()
+        artifacts, stored = {}, {}
+        for attr, filename in PERSISTED_ARTIFACTS.items():
+            value = getattr(self, attr)
+            if value is None or (isinstance(value, dict) and not value):
+                continue
+            artifacts[filename] = value
+            stored[attr] = id(value)
+        manifest = {
+            "features": self.features,
+            "steps_completed": self.steps_completed,
+            "data_hash": self.data_hash,
+            "input_path": self.input_path,
+            "metrics": metrics,
+            "modeling_key": self.step_state.get("modeling", {}).get("key")
+        }
+        self.artifacts_version = self.artifact_store.save(artifacts, manifest)
+        self._stored_artifacts = stored
+        self.log.append(f"Artefacts sauvegardés (version {self.artifacts_version})")
+        return self.artifacts_version
+
+    def restore_artifacts(self):
+        """Restaure l'état du workflow depuis le manifest ; les artefacts sont chargés à la demande"""
+        if self.artifact_store is None:
+            return False
+        manifest = self.artifact_store.load_manifest()
+        if manifest is None:
+            return False
+        self.features = manifest["features"]
+        self.data_hash = manifest.get("data_hash")
+        self.steps_completed.update(manifest["steps_completed"])
+        self.artifacts_version = manifest["version"]
+        names = set(manifest["artifacts"])
+        self._pending_artifacts = [attr for attr, filename in PERSISTED_ARTIFACTS.items() if filename in names]
+        return True
+
+    def load_pending_artifacts(self):
+        """Charge (en mmap) les artefacts restaurés qui ne sont pas encore en mémoire"""
+        if not self._pending_artifacts:
+            return
+        with self._artifacts_lock:
+            for attr in list(self._pending_artifacts):
+                filename = PERSISTED_ARTIFACTS[attr]
+                value = self.artifact_store.load(filename, version=self.artifacts_version)
+                setattr(self, attr, value)
+                self._stored_artifacts[attr] = id(value)
+                self._pending_artifacts.remove(attr)
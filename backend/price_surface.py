@@ -0,0 +1,108 @@
+"""
+Table de prix précalculée, servie avec le RandomForest
+======================================================
+Un arbre compare chaque variable à des seuils : entre deux seuils consécutifs
+(une « cellule »), la prédiction de la forêt ne change pas. Une ligne encodée
+(les variables que reçoit /api/predict) se résume donc à son n-uplet de cellules,
+et toutes les lignes d'un même n-uplet ont exactement le même prix.
+
+La table associe n-uplet -> prix. Elle est remplie en un seul appel au modèle
+après l'entraînement, avec les lignes du dataset croisées avec chaque modalité
+des variables catégorielles (même match, autre catégorie de billet). Une ligne
+absente de la table est prédite par le RandomForest puis ajoutée à la table
+(jusqu'à MAX_ENTRIES) : une même requête du formulaire n'est calculée qu'une fois.
+"""
+import threading
+import time
+
+import numpy as np
+
+# Lignes servies par le modèle et ajoutées à la table, au-delà des lignes précalculées
+MAX_ENTRIES = 100_000
+
+
+def forest_thresholds(model, n_features):
+    """Seuils de coupure triés (sans doublons) de chaque variable, sur tous les arbres de la forêt"""
+    per_feature = [[] for _ in range(n_features)]
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        split = tree.feature >= 0
+        for f, threshold in zip(tree.feature[split], tree.threshold[split]):
+            per_feature[f].append(threshold)
+    return [np.unique(np.asarray(values, dtype=np.float64)) for values in per_feature]
+
+
+class PriceSurface:
+    def __init__(self, thresholds, prices, build_s=0.0, max_entries=MAX_ENTRIES):
+        # Par variable : seuils triés ; {n-uplet de cellules (bytes) : prix}
+        self.thresholds = thresholds
+        self.prices = prices
+        self.precomputed = len(prices)
+        self.build_s = build_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        if "prices" not in state:
+            # Ancien format (grille de quantiles) : table vide, remplie au fil des prédictions du modèle
+            state = {"thresholds": state["thresholds"], "prices": {}, "precomputed": 0,
+                     "build_s": 0.0, "max_entries": MAX_ENTRIES}
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, model, X, expand=()):
+        """Précalcule les prix des lignes de X, croisées avec chaque valeur observée des colonnes expand"""
+        start = time.perf_counter()
+        thresholds = forest_thresholds(model, X.shape[1])
+        grid = X
+        for f in expand:
+            levels = np.unique(X[:, f])
+            grid = np.repeat(grid, len(levels), axis=0)
+            grid[:, f] = np.tile(levels, len(grid) // len(levels))
+        surface = cls(thresholds, {})
+        keys = surface.keys(grid)
+        # Une seule ligne par n-uplet, puis un seul appel au modèle
+        unique = {}
+        for i, key in enumerate(keys):
+            unique.setdefault(key, i)
+        prices = model.predict(grid[list(unique.values())])
+        surface.prices = dict(zip(unique, prices.tolist()))
+        surface.precomputed = len(surface.prices)
+        surface.build_s = time.perf_counter() - start
+        return surface
+
+    def keys(self, X):
+        """n-uplet de cellules de chaque ligne (même règle que l'arbre : à gauche si x <= seuil)"""
+        cells = np.column_stack([np.searchsorted(cuts, X[:, f], side="left")
+                                 for f, cuts in enumerate(self.thresholds)]).astype(np.int32)
+        return [row.tobytes() for row in cells]
+
+    def predict(self, X, model):
+        """Prix de la table, RandomForest pour les lignes absentes (ajoutées ensuite) ; (prix, masque trouvé)"""
+        X = np.asarray(X, dtype=np.float64)
+        keys = self.keys(X)
+        found = [self.prices.get(key) for key in keys]
+        hit = np.array([price is not None for price in found], dtype=bool)
+        prices = np.array([price if price is not None else np.nan for price in found], dtype=np.float64)
+        if not hit.all():
+            missed = np.flatnonzero(~hit)
+            prices[missed] = model.predict(X[missed])
+            with self._lock:
+                for i in missed:
+                    if len(self.prices) >= self.precomputed + self.max_entries:
+                        break
+                    self.prices[keys[i]] = float(prices[i])
+        return prices, hit
+
+    def summary(self):
+        return {
+            "precomputed": self.precomputed,
+            "entries": len(self.prices),
+            "build_s": round(self.build_s, 3),
+        }
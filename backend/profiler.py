@@ -0,0 +1,82 @@
+"""
+Profileur par échantillonnage des requêtes lentes (optionnel)
+=============================================================
+Un seul thread d'arrière-plan relève, toutes les interval secondes, la pile
+Python de chaque requête en cours (sys._current_frames) : aucune trace
+d'exécution, le surcoût ne dépend pas du code profilé. À la fin d'une requête
+plus lente que le seuil, ses piles sont écrites au format « folded »
+(une ligne « racine;...;feuille nombre » par pile distincte), directement
+utilisable par flamegraph.pl, speedscope ou inferno ; sinon elles sont jetées.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+DEFAULT_INTERVAL_S = 0.01
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame):
+    """Pile d'appels d'un frame, de la racine à la feuille, séparée par des ;"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, out_dir, threshold_s, interval_s=DEFAULT_INTERVAL_S):
+        self.out_dir = out_dir
+        self.threshold_s = threshold_s
+        self.interval_s = interval_s
+        self.dumped = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Commence à échantillonner le thread courant ; retourne le jeton à passer à stop()"""
+        token = object()
+        with self._lock:
+            self._active[token] = (threading.get_ident(), Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        return token
+
+    def stop(self, token, duration_s, label):
+        """Arrête l'échantillonnage ; écrit le profil si la requête a dépassé le seuil (retourne son chemin)"""
+        with self._lock:
+            _, stacks = self._active.pop(token, (None, None))
+        if not stacks or duration_s < self.threshold_s:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "_", label).strip("_")
+        path = os.path.join(self.out_dir, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}-{int(duration_s * 1000)}ms.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.dumped += 1
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval_s)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.values():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own:
+                        stacks[fold_stack(frame)] += 1
+                del frames
@@ -0,0 +1,127 @@
+"""
+Moteur de réduction de dimensionnalité adapté à la taille des données
+=====================================================================
+- PCA : exacte sur les petits jeux, randomisée au-delà de EXACT_PCA_MAX_ROWS
+  lignes, incrémentale (par lots) si la matrice dépasse le budget mémoire.
+- t-SNE / LLE : ajustés sur un sous-échantillon stratifié (déciles de prix),
+  puis les autres lignes sont projetées hors échantillon (transform() pour LLE,
+  k plus proches voisins pondérés pour t-SNE qui n'a pas de transform()).
+- Budget de temps optionnel : la taille du sous-échantillon est bornée d'après
+  un débit indicatif de chaque méthode.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+# scikit-learn est importé à la première réduction (cf. lazy_imports)
+
+EXACT_PCA_MAX_ROWS = 50_000
+# Au-delà, le t-SNE/LLE est ajusté sur l'espace PCA plutôt que sur toutes les variables
+EMBEDDING_MAX_INPUT_DIM = 50
+# Débits indicatifs (lignes/s) pour borner le sous-échantillon avec un budget de temps
+ROWS_PER_SECOND = {"tsne": 1000, "lle": 2000}
+EMBEDDING_METHODS = tuple(ROWS_PER_SECOND)
+PCA_STRATEGIES = ("auto", "exact", "randomized", "incremental")
+MIN_EMBEDDING_ROWS = 50
+PROJECTION_BATCH_ROWS = 100_000
+
+
+def choose_pca_solver(n_rows, n_cols, strategy="auto", memory_budget_mb=None):
+    """Retourne ("exact" | "randomized" | "incremental", taille de lot ou None)"""
+    if strategy not in PCA_STRATEGIES:
+        raise ValueError(f"Stratégie PCA inconnue: {strategy} (attendu: {', '.join(PCA_STRATEGIES)})")
+    if strategy in ("exact", "randomized"):
+        return strategy, None
+    # Une SVD travaille sur environ trois copies de la matrice en float64
+    working_mb = 3 * n_rows * n_cols * 8 / 1e6
+    if strategy == "incremental" or (memory_budget_mb and working_mb > memory_budget_mb):
+        budget_mb = memory_budget_mb or 256
+        batch = int(budget_mb * 1e6 / (3 * max(n_cols, 1) * 8))
+        return "incremental", max(batch, n_cols, 1000)
+    return ("exact" if n_rows <= EXACT_PCA_MAX_ROWS else "randomized"), None
+
+
+def fit_pca(X, n_components, strategy="auto", memory_budget_mb=None):
+    """Ajuste la PCA et retourne (pca, composantes de toutes les lignes, solveur utilisé)"""
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    solver, batch = choose_pca_solver(len(X), X.shape[1], strategy, memory_budget_mb)
+    if solver == "incremental":
+        batch = max(batch, n_components)
+        pca = IncrementalPCA(n_components=n_components, batch_size=batch)
+        for start in range(0, len(X), batch):
+            chunk = X[start:start + batch]
+            # partial_fit exige au moins n_components lignes par lot
+            if len(chunk) >= n_components:
+                pca.partial_fit(chunk)
+        Z = np.vstack([pca.transform(X[start:start + batch]) for start in range(0, len(X), batch)])
+    else:
+        pca = PCA(n_components=n_components, svd_solver="full" if solver == "exact" else "randomized", random_state=42)
+        Z = pca.fit_transform(X)
+    return pca, Z, solver
+
+
+def stratified_sample(y, size, bins=10, seed=42):
+    """Indices (triés) d'un sous-échantillon stratifié sur les quantiles de y"""
+    n = len(y)
+    if size >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    strata = pd.qcut(pd.Series(y), q=bins, labels=False, duplicates="drop").fillna(-1).to_numpy()
+    chosen = []
+    for stratum in np.unique(strata):
+        members = np.flatnonzero(strata == stratum)
+        quota = max(1, int(round(size * len(members) / n)))
+        chosen.append(rng.choice(members, size=min(quota, len(members)), replace=False))
+    idx = np.concatenate(chosen)
+    if len(idx) > size:
+        idx = rng.choice(idx, size=size, replace=False)
+    return np.sort(idx)
+
+
+def embedding_sample_size(n_rows, method, sample, time_budget_s=None):
+    if method not in EMBEDDING_METHODS:
+        raise ValueError(f"Méthode de réduction inconnue: {method} (attendu: {', '.join(EMBEDDING_METHODS)})")
+    size = min(int(sample), n_rows)
+    if time_budget_s:
+        size = min(size, max(MIN_EMBEDDING_ROWS, int(time_budget_s * ROWS_PER_SECOND[method])))
+    return size
+
+
+def fit_embedding(X, y, method="tsne", sample=500, time_budget_s=None, project=True, seed=42):
+    """Ajuste t-SNE/LLE sur un sous-échantillon stratifié et projette les autres lignes
+
+    Retourne (indices de l'échantillon, coordonnées de l'échantillon, coordonnées de toutes les lignes ou None).
+    """
+    from sklearn.manifold import TSNE, LocallyLinearEmbedding
+    from sklearn.neighbors import KNeighborsRegressor
+
+    size = embedding_sample_size(len(X), method, sample, time_budget_s)
+    idx = stratified_sample(y, size, seed=seed)
+    if len(idx) <= 5:
+        return idx, None, None
+
+    X_fit = X[idx]
+    if method == "lle":
+        embedder = LocallyLinearEmbedding(n_components=2, n_neighbors=min(10, len(idx) - 1), random_state=seed)
+    elif method == "tsne":
+        embedder = TSNE(n_components=2, perplexity=min(30.0, (len(idx) - 1) / 3), random_state=seed)
+    else:
+        raise ValueError(f"Méthode de réduction inconnue: {method} (attendu: {', '.join(EMBEDDING_METHODS)})")
+    emb_sample = embedder.fit_transform(X_fit)
+
+    if not project:
+        return idx, emb_sample, None
+    if len(idx) == len(X):
+        return idx, emb_sample, emb_sample
+
+    if method == "lle":
+        project_batch = embedder.transform
+    else:
+        knn = KNeighborsRegressor(n_neighbors=min(10, len(idx)), weights="distance").fit(X_fit, emb_sample)
+        project_batch = knn.predict
+    emb_all = np.vstack([project_batch(X[s:s + PROJECTION_BATCH_ROWS]) for s in range(0, len(X), PROJECTION_BATCH_ROWS)])
+    emb_all[idx] = emb_sample
+    return idx, emb_sample, emb_all
+
@@ -0,0 +1,163 @@
+"""
+Pipelines par session
+=====================
+Chaque analyste travaille dans sa session (en-tête X-Session-ID ou ?session=) :
+un PreprocessingPipeline distinct, avec son propre dataset uploadé, ses
+checkpoints, ses artefacts et son état de workflow, dans sessions/<id>/. Sans
+identifiant, on utilise la session par défaut (le pipeline global historique).
+
+Les DataFrames des étapes sont tous sauvegardés en checkpoint sur disque : au-delà
+du budget mémoire global, les sessions inactives les moins récemment utilisées
+libèrent leurs DataFrames et leurs artefacts ajustés, qui sont restaurés depuis
+les checkpoints et le store d'artefacts à la prochaine utilisation (sans recalcul).
+
+L'enveloppe mémoire est bornée quel que soit le nombre d'identifiants envoyés :
+au-delà de max_sessions pipelines en mémoire, les moins récemment utilisés sont
+déchargés (leurs fichiers restent sur disque, le pipeline est recréé au prochain
+accès) ; les sessions inactives depuis plus de ttl_s secondes sont supprimées,
+fichiers compris.
+"""
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SESSION = "default"
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def check_session_id(session_id):
+    """Refuse les identifiants qui ne sont pas de simples noms de dossier"""
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise ValueError(f"Identifiant de session invalide: {session_id!r} (lettres, chiffres, - et _, 64 max)")
+    return session_id
+
+
+class SessionManager:
+    def __init__(self, root, factory, default_pipeline, max_bytes=None, max_sessions=None, ttl_s=None):
+        # factory(session_id, session_dir) -> PreprocessingPipeline ; None => pas de limite
+        self.root = root
+        self.factory = factory
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions = OrderedDict({DEFAULT_SESSION: default_pipeline})
+        # Dernier accès (time.time) de chaque session nommée, chargée ou non ; les sessions déjà sur disque
+        # (processus précédents) partent de la date de modification de leur dossier
+        self._last_used = {}
+        if ttl_s and os.path.isdir(root):
+            for entry in os.scandir(root):
+                if entry.is_dir() and SESSION_ID_PATTERN.match(entry.name) and entry.name != DEFAULT_SESSION:
+                    self._last_used[entry.name] = entry.stat().st_mtime
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.unloaded = 0
+        self.expired = 0
+
+    def session_dir(self, session_id):
+        return os.path.join(self.root, check_session_id(session_id))
+
+    def get(self, session_id=None):
+        """Pipeline de la session (créé au premier accès), marqué comme le plus récemment utilisé"""
+        session_id = check_session_id(session_id or DEFAULT_SESSION)
+        with self._lock:
+            self.expire_idle(keep=session_id)
+            pipeline = self._sessions.get(session_id)
+            if pipeline is None:
+                session_dir = self.session_dir(session_id)
+                os.makedirs(session_dir, exist_ok=True)
+                pipeline = self.factory(session_id, session_dir)
+                self._sessions[session_id] = pipeline
+            self._sessions.move_to_end(session_id)
+            if session_id != DEFAULT_SESSION:
+                self._last_used[session_id] = time.time()
+            self._unload_excess(keep=session_id)
+        self.enforce_budget(keep=session_id)
+        return pipeline
+
+    def drop(self, session_id):
+        """Supprime une session nommée (pipeline et fichiers)"""
+        if check_session_id(session_id) == DEFAULT_SESSION:
+            raise ValueError("La session par défaut ne peut pas être supprimée")
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._last_used.pop(session_id, None)
+            shutil.rmtree(self.session_dir(session_id), ignore_errors=True)
+
+    def _unload_excess(self, keep=None):
+        """Décharge les pipelines nommés les moins récemment utilisés au-delà de max_sessions"""
+        if self.max_sessions is None:
+            return
+        named = [sid for sid in self._sessions if sid != DEFAULT_SESSION]
+        excess = len(named) - self.max_sessions
+        for session_id in named:
+            if excess <= 0:
+                break
+            pipeline = self._sessions[session_id]
+            if session_id == keep or pipeline.busy():
+                continue
+            pipeline.release_memory()
+            del self._sessions[session_id]
+            if not self.ttl_s:
+                self._last_used.pop(session_id, None)
+            self.unloaded += 1
+            excess -= 1
+
+    def expire_idle(self, keep=None):
+        """Supprime (pipeline et fichiers) les sessions nommées inactives depuis plus de ttl_s secondes"""
+        if not self.ttl_s:
+            return
+        now = time.time()
+        with self._lock:
+            for session_id, last_used in list(self._last_used.items()):
+                pipeline = self._sessions.get(session_id)
+                if session_id == keep or now - last_used <= self.ttl_s or (pipeline is not None and pipeline.busy()):
+                    continue
+                self.drop(session_id)
+                self.expired += 1
+                print(f"🗑️ Session '{session_id}' expirée (inactive depuis {int(now - last_used)} s)")
+
+    def memory_usage(self):
+        with self._lock:
+            return {session_id: p.memory_usage() for session_id, p in self._sessions.items()}
+
+    def enforce_budget(self, keep=None):
+        """Libère les DataFrames des sessions inactives (LRU) jusqu'à repasser sous le budget"""
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            usage = self.memory_usage()
+            total = sum(usage.values())
+            for session_id, pipeline in list(self._sessions.items()):
+                if total <= self.max_bytes:
+                    break
+                if session_id == keep or not usage[session_id]:
+                    continue
+                freed = pipeline.release_memory()
+                if freed:
+                    total -= freed
+                    self.evictions += 1
+                    self.evicted_bytes += freed
+                    print(f"💾 Session '{session_id}' : {freed / 1e6:.1f} Mo libérés (restaurés depuis les checkpoints au besoin)")
+
+    def stats(self):
+        usage = self.memory_usage()
+        with self._lock:
+            sessions = [
+                {"id": session_id, "bytes": usage.get(session_id, 0), "steps_completed": p.steps_completed}
+                for session_id, p in reversed(self._sessions.items())
+            ]
+        return {
+            "sessions": sessions,
+            "bytes": sum(usage.values()),
+            "max_bytes": self.max_bytes,
+            "max_sessions": self.max_sessions,
+            "ttl_s": self.ttl_s,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "unloaded": self.unloaded,
+            "expired": self.expired,
+        }
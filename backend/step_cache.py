@@ -0,0 +1,124 @@
+"""
+Checkpoints des étapes du pipeline
+==================================
+Chaque étape est identifiée par une clé = sha256(nom de l'étape, hash de son
+entrée, paramètres). Le résultat (DataFrame de sortie, réponse JSON, objets
+ajustés) est sauvegardé sous cette clé : relancer une étape avec la même
+entrée et les mêmes paramètres le restaure au lieu de le recalculer.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+
+
+def step_key(step, input_hash, params):
+    payload = json.dumps({"step": step, "input": input_hash, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Hash de contenu (sha256) d'un fichier, lu par blocs"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Budget par défaut des DataFrames gardés par les checkpoints en mémoire (root=None)
+MEMORY_CHECKPOINTS_MAX_BYTES = 256 * 1024 * 1024
+
+
+def payload_bytes(payload):
+    """Taille estimée d'un checkpoint en mémoire : celle de son DataFrame de sortie"""
+    output = payload.get("output")
+    return int(output.memory_usage(deep=True).sum()) if output is not None else 0
+
+
+class StepCheckpointStore:
+    """Checkpoints sur disque (root) ou en mémoire si root est None
+
+    En mémoire, comme sur disque : au plus keep_per_step checkpoints par étape (les moins récemment
+    utilisés sont supprimés), et au plus max_memory_bytes de DataFrames de sortie au total.
+    """
+
+    def __init__(self, root=None, keep_per_step=5, max_memory_bytes=MEMORY_CHECKPOINTS_MAX_BYTES):
+        self.root = root
+        self.keep_per_step = keep_per_step
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()  # (étape, clé) -> (payload, octets), du moins au plus récemment utilisé
+        self._memory_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, step, key):
+        return os.path.join(self.root, step, f"{key}.joblib")
+
+    def load(self, step, key):
+        if self.root is None:
+            with self._memory_lock:
+                entry = self._memory.get((step, key))
+                if entry is not None:
+                    self._memory.move_to_end((step, key))
+            payload = entry[0] if entry is not None else None
+        else:
+            path = self._path(step, key)
+            try:
+                payload = joblib.load(path)
+                os.utime(path)  # marque le checkpoint comme récemment utilisé
+            except (OSError, EOFError, ValueError):
+                payload = None
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    def save(self, step, key, payload):
+        if self.root is None:
+            with self._memory_lock:
+                self._memory[(step, key)] = (payload, payload_bytes(payload))
+                self._memory.move_to_end((step, key))
+                self._prune_memory(keep=(step, key))
+            return
+        step_dir = os.path.join(self.root, step)
+        os.makedirs(step_dir, exist_ok=True)
+        path = self._path(step, key)
+        tmp_path = path + ".tmp"
+        joblib.dump(payload, tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(step_dir)
+
+    def _prune(self, step_dir):
+        """Ne garde que les checkpoints les plus récemment utilisés de l'étape"""
+        entries = [os.path.join(step_dir, f) for f in os.listdir(step_dir) if f.endswith(".joblib")]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[self.keep_per_step:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _prune_memory(self, keep):
+        """Supprime les checkpoints en mémoire les moins récemment utilisés au-delà des limites"""
+        per_step = {}
+        for step, _ in self._memory:
+            per_step[step] = per_step.get(step, 0) + 1
+        total = sum(size for _, size in self._memory.values())
+        for entry_key in list(self._memory):
+            step = entry_key[0]
+            over_budget = self.max_memory_bytes is not None and total > self.max_memory_bytes
+            if entry_key == keep or (per_step[step] <= self.keep_per_step and not over_budget):
+                continue
+            total -= self._memory.pop(entry_key)[1]
+            per_step[step] -= 1
+
+    def stats(self):
+        with self._memory_lock:
+            memory_bytes = sum(size for _, size in self._memory.values())
+            entries = len(self._memory)
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": entries, "memory_bytes": memory_bytes}
@@ -0,0 +1,44 @@
+"""
+État propre à chaque application construite par create_app
+===========================================================
+Usage (depuis backend/) :
+    python -m pytest tests
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app as backend  # noqa: E402
+
+
+def make_app(tmp_path):
+    """Application de test : store d'état, artefacts, checkpoints et sessions dans tmp_path"""
+    return backend.create_app({
+        "STATE_STORE": "memory",
+        "OUTPUT_CSV": str(tmp_path / "cleaned.csv"),
+        "ARTIFACTS_DIR": str(tmp_path / "artifacts"),
+        "CHECKPOINTS_DIR": str(tmp_path / "checkpoints"),
+        "SESSIONS_DIR": str(tmp_path / "sessions"),
+    })
+
+
+def test_two_apps_do_not_share_jobs_or_sessions(tmp_path):
+    first, second = make_app(tmp_path / "first"), make_app(tmp_path / "second")
+    state, other = first.extensions["can2025"], second.extensions["can2025"]
+    for name in ("state_store", "jobs", "pipeline", "sessions", "browser_pool"):
+        assert getattr(state, name) is not getattr(other, name)
+    assert state.pipeline.artifact_store.root == str(tmp_path / "first" / "artifacts")
+
+    client = first.test_client()
+    assert client.get("/api/workflow/status", headers={"X-Session-ID": "analyste"}).status_code == 200
+    response = client.post("/api/task3_clean?async=1", headers={"X-Session-ID": "analyste"})
+    assert response.status_code == 202
+    state.jobs.executor.shutdown(wait=True)
+
+    assert sorted(s["id"] for s in client.get("/api/sessions").get_json()["sessions"]) == ["analyste", "default"]
+    assert len(client.get("/api/jobs").get_json()) == 1
+    other_client = second.test_client()
+    assert [s["id"] for s in other_client.get("/api/sessions").get_json()["sessions"]] == ["default"]
+    assert other_client.get("/api/jobs").get_json() == []
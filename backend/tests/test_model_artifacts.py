@@ -0,0 +1,65 @@
+"""
+Artefacts du modèle et checkpoints de l'étape de modélisation
+=============================================================
+Usage (depuis backend/) :
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from preprocessing import PreprocessingPipeline  # noqa: E402
+from workflow_store import FileStateStore  # noqa: E402
+
+INPUT_CSV = os.path.join(BACKEND_DIR, "dataset_can_2025_realiste.csv")
+
+
+def make_pipeline(tmp_path):
+    """Pipeline d'un « processus » : mêmes dossiers et même état partagé d'un démarrage à l'autre"""
+    pipeline = PreprocessingPipeline(
+        INPUT_CSV, str(tmp_path / "cleaned.csv"),
+        artifacts_dir=str(tmp_path / "artifacts"), checkpoints_dir=str(tmp_path / "checkpoints"),
+        state_store=FileStateStore(str(tmp_path / "workflow_state.json")))
+    pipeline.sync_state()
+    if pipeline.artifacts_version is None:
+        pipeline.restore_artifacts()
+    return pipeline
+
+
+def sample_rows():
+    return pd.read_csv(INPUT_CSV, nrows=20)
+
+
+def test_cached_model_is_served_after_retraining_and_restart(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    assert "error" not in pipeline.train_model({"n_estimators": 100})
+    expected = pipeline.predict(sample_rows())
+
+    assert "error" not in pipeline.train_model({"n_estimators": 10})
+    result = pipeline.train_model({"n_estimators": 100})
+    assert result["cached"]
+    assert len(pipeline.model.estimators_) == 100
+    assert (pipeline.predict(sample_rows()) == expected).all()
+
+    restarted = make_pipeline(tmp_path)
+    assert restarted.step_state["modeling"]["params"]["n_estimators"] == 100
+    assert (restarted.predict(sample_rows()) == expected).all()
+    assert len(restarted.model.estimators_) == 100
+
+
+def test_checkpoint_restore_is_not_overwritten_by_pending_artifacts(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    pipeline.train_model({"n_estimators": 100})
+    pipeline.train_model({"n_estimators": 10})
+
+    # Redémarrage sur la version à 10 arbres (chargée à la demande), puis retour au checkpoint à 100 arbres
+    restarted = make_pipeline(tmp_path)
+    assert "model" in restarted._pending_artifacts
+    assert restarted.train_model({"n_estimators": 100})["cached"]
+    assert "model" not in restarted._pending_artifacts
+    restarted.predict(sample_rows())
+    assert len(restarted.model.estimators_) == 100
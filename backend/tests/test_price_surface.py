@@ -0,0 +1,46 @@
+"""
+Table de prix précalculée (price_surface)
+=========================================
+Usage (depuis backend/) :
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from price_surface import PriceSurface  # noqa: E402
+
+
+def fitted_forest():
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(0, 4, 300), rng.normal(size=300), rng.uniform(0, 100, 300)])
+    y = 100 * X[:, 0] + 20 * X[:, 1] + X[:, 2] + rng.normal(size=300)
+    return RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y), X
+
+
+def test_precomputed_rows_match_the_model_exactly():
+    model, X = fitted_forest()
+    surface = PriceSurface.build(model, X, expand=[0])
+    # Chaque ligne, avec chacune des 4 modalités de la colonne 0
+    other = X.copy()
+    other[:, 0] = (other[:, 0] + 1) % 4
+    for rows in (X, other):
+        prices, hit = surface.predict(rows, model)
+        assert hit.all()
+        assert np.array_equal(prices, model.predict(rows))
+
+
+def test_missed_rows_fall_back_to_the_model_then_hit():
+    model, X = fitted_forest()
+    surface = PriceSurface.build(model, X)
+    new = np.array([[2.0, 5.0, 250.0]])
+    prices, hit = surface.predict(new, model)
+    assert not hit.any() and np.array_equal(prices, model.predict(new))
+    prices, hit = surface.predict(new, model)
+    assert hit.all() and np.array_equal(prices, model.predict(new))
@@ -0,0 +1,168 @@
+"""
+Upload de dataset en flux, validé par morceaux
+==============================================
+Le corps de la requête est lu par blocs et passe par un « tee » qui l'écrit
+dans un fichier temporaire (même dossier que la destination) tout en calculant
+son sha256. pandas parse ce même flux par morceaux de lignes : chaque morceau est
+validé de façon vectorisée (colonnes obligatoires, types du schéma déclaré) et
+le premier morceau invalide interrompt la lecture. Le fichier n'est renommé à
+sa place (os.replace, atomique) qu'une fois entièrement validé : une entrée à
+moitié écrite n'est jamais visible.
+
+Aperçu, statistiques par colonne et DataFrame complet sont produits pendant le
+flux : l'import qui suit n'a pas à relire le fichier.
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from columnar_storage import DATASET_SCHEMA
+
+UPLOAD_CHUNK_ROWS = 50_000
+UPLOAD_BLOCK_BYTES = 1 << 20
+UPLOAD_REQUIRED_COLUMNS = ["Prix_Final_MAD"]
+PREVIEW_ROWS = 5
+
+
+class _TeeReader(io.RawIOBase):
+    """Flux binaire qui recopie tout ce qui est lu dans sink et en calcule le sha256"""
+
+    def __init__(self, source, sink, max_bytes=None):
+        self.source = source
+        self.sink = sink
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.sha256 = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.source.read(len(buffer))
+        if not data:
+            return 0
+        self.bytes += len(data)
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            raise ValueError(f"Fichier trop volumineux (max {self.max_bytes // (1024 * 1024)} Mo)")
+        self.sink.write(data)
+        self.sha256.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _validate_chunk(chunk, schema, first_row):
+    """Convertit les colonnes numériques déclarées ; ValueError à la première valeur invalide"""
+    for col, dtype in schema.items():
+        if col not in chunk.columns or dtype == "category":
+            continue
+        values = chunk[col]
+        # Déjà typé correctement par le parseur : rien à vérifier
+        if pd.api.types.is_integer_dtype(values) or (pd.api.types.is_float_dtype(values) and not dtype.startswith("int")):
+            continue
+        numeric = pd.to_numeric(values, errors="coerce")
+        bad = numeric.isna() & values.notna()
+        if dtype.startswith("int"):
+            bad |= numeric.notna() & (numeric != numeric.round())
+        if bad.any():
+            position = int(np.flatnonzero(bad.to_numpy())[0])
+            # +2 : ligne d'en-tête et numérotation à partir de 1
+            raise ValueError(f"Colonne {col}: valeur invalide '{values.iloc[position]}' à la ligne "
+                             f"{first_row + position + 2} (type attendu: {dtype})")
+        chunk[col] = numeric
+    return chunk
+
+
+class _ColumnStats:
+    """Statistiques fusionnables par colonne, accumulées morceau par morceau"""
+
+    def __init__(self):
+        self.missing = {}
+        self.count = {}
+        self.sum = {}
+        self.min = {}
+        self.max = {}
+
+    def update(self, chunk):
+        for col, missing in chunk.isna().sum().items():
+            self.missing[col] = self.missing.get(col, 0) + int(missing)
+        numeric = chunk.select_dtypes(include="number")
+        for col, count, total, low, high in zip(numeric.columns, numeric.count(), numeric.sum(),
+                                                numeric.min(), numeric.max()):
+            if not count:
+                continue
+            self.count[col] = self.count.get(col, 0) + int(count)
+            self.sum[col] = self.sum.get(col, 0.0) + float(total)
+            self.min[col] = min(self.min.get(col, np.inf), float(low))
+            self.max[col] = max(self.max.get(col, -np.inf), float(high))
+
+    def to_dict(self):
+        stats = {}
+        for col, missing in self.missing.items():
+            stats[col] = {"missing": missing}
+            if col in self.count:
+                stats[col].update({
+                    "min": self.min[col],
+                    "max": self.max[col],
+                    "mean": round(self.sum[col] / self.count[col], 4),
+                })
+        return stats
+
+
+def stream_upload(source, dest_path, schema=None, required=None, max_bytes=None, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Écrit le flux source dans dest_path après validation complète
+
+    Retourne (DataFrame, rapport) ; rapport = lignes, octets, sha256, schéma, statistiques et aperçu.
+    Lève ValueError (fichier invalide ou trop gros) sans toucher à dest_path.
+    """
+    schema = DATASET_SCHEMA if schema is None else schema
+    required = UPLOAD_REQUIRED_COLUMNS if required is None else required
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            tee = _TeeReader(source, sink, max_bytes)
+            reader = io.BufferedReader(tee, buffer_size=UPLOAD_BLOCK_BYTES)
+            chunks, stats, rows = [], _ColumnStats(), 0
+            try:
+                for chunk in pd.read_csv(reader, chunksize=chunk_rows):
+                    if not chunks:
+                        missing = [c for c in required if c not in chunk.columns]
+                        if missing:
+                            raise ValueError(f"Colonnes obligatoires manquantes: {', '.join(missing)}")
+                    chunk = _validate_chunk(chunk, schema, rows)
+                    stats.update(chunk)
+                    chunks.append(chunk)
+                    rows += len(chunk)
+            except pd.errors.EmptyDataError:
+                raise ValueError("Fichier CSV vide")
+            except pd.errors.ParserError as e:
+                raise ValueError(f"CSV mal formé: {e}")
+            if not chunks:
+                raise ValueError("Le fichier ne contient aucune ligne de données")
+            # Le parseur s'arrête à la dernière ligne : on recopie un éventuel reliquat
+            while reader.read(UPLOAD_BLOCK_BYTES):
+                pass
+            sink.flush()
+            os.fsync(sink.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    report = {
+        "rows": rows,
+        "bytes": tee.bytes,
+        "sha256": tee.sha256.hexdigest(),
+        "chunks": len(chunks),
+        "schema": {str(c): str(t) for c, t in df.dtypes.items()},
+        "stats": stats.to_dict(),
+        "preview": df.head(PREVIEW_ROWS).to_dict(orient="records"),
+    }
+    return df, report
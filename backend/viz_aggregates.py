@@ -0,0 +1,243 @@
+"""
+Moteur d'agrégation pour les visualisations
+===========================================
+Calcule tous les agrégats de visualisation (distribution des prix, prix par
+catégorie, effet Maroc, stats par ville, demande par jour, corrélations) en une
+seule passe de groupby sur le dataset, puis les conserve en mémoire et sur
+disque. Les agrégats ne sont recalculés que lorsque la version du dataset change.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from columnar_storage import write_dataset
+
+DAY_ORDER = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+CORRELATION_COLUMNS = ['Prix_Final_MAD', 'Indice_Demande', 'Taux_Rareté', 'Score_Visibilite',
+                       'Score_Rivalite', 'Valeur_Marchande_Totale_MEUR', 'Index_Stars_Total']
+
+# Dimensions regroupées dans la passe unique, puis agrégées séparément
+GROUP_KEYS = ['Categorie', 'Effet_Maroc', 'Ville', 'Jour_Semaine']
+VALUE_COLUMNS = ['Prix_Final_MAD', 'Indice_Demande']
+
+# Nom de l'agrégat -> fichier CSV exporté pour le frontend
+VIZ_FILES = {
+    "price_distribution": "viz_price_distribution.csv",
+    "category_pricing": "viz_category_pricing.csv",
+    "morocco_effect": "viz_morocco_effect.csv",
+    "venue_stats": "viz_venue_stats.csv",
+    "day_demand": "viz_day_demand.csv",
+    "correlation": "viz_correlation_heatmap.csv",
+}
+
+
+def _rollup(fine, key, values):
+    """Agrège le groupby fin sur une seule dimension (moyennes, min, max, écart-type)"""
+    grouped = fine.groupby(level=key, sort=True)
+    out = pd.DataFrame(index=grouped.size().index)
+    for v in values:
+        out[v] = grouped[f"{v}__sum"].sum() / grouped[f"{v}__count"].sum()
+    if 'Prix_Final_MAD__min' in fine.columns:
+        n = grouped['Prix_Final_MAD__count'].sum()
+        total = grouped['Prix_Final_MAD__sum'].sum()
+        sumsq = grouped['Prix_Final_MAD__sumsq'].sum()
+        out['min'] = grouped['Prix_Final_MAD__min'].min()
+        out['max'] = grouped['Prix_Final_MAD__max'].max()
+        # Écart-type (ddof=1) recomposé depuis la somme des carrés
+        out['std'] = np.sqrt(((sumsq - total ** 2 / n) / (n - 1)).clip(lower=0)).where(n > 1, 0.0)
+    return out
+
+
+def fine_aggregates(df):
+    """Groupby fin sur toutes les dimensions disponibles (sommes, comptes, somme des carrés, min, max)
+
+    Le résultat est fusionnable : cf. merge_fine_aggregates pour combiner des morceaux du dataset.
+    """
+    keys = [k for k in GROUP_KEYS if k in df.columns]
+    values = [v for v in VALUE_COLUMNS if v in df.columns]
+    if not (keys and values):
+        return None
+    spec = {}
+    for v in values:
+        spec[f"{v}__sum"] = (v, 'sum')
+        spec[f"{v}__count"] = (v, 'count')
+    if 'Prix_Final_MAD' in df.columns:
+        df = df.assign(Prix_Final_MAD__sq=df['Prix_Final_MAD'] ** 2)
+        spec['Prix_Final_MAD__sumsq'] = ('Prix_Final_MAD__sq', 'sum')
+        spec['Prix_Final_MAD__min'] = ('Prix_Final_MAD', 'min')
+        spec['Prix_Final_MAD__max'] = ('Prix_Final_MAD', 'max')
+    return df.groupby(keys, dropna=False, observed=True).agg(**spec)
+
+
+def merge_fine_aggregates(parts):
+    """Fusionne des groupby fins partiels (même structure) en un seul"""
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    combined = pd.concat(parts)
+    how = {c: ('min' if c.endswith('__min') else 'max' if c.endswith('__max') else 'sum') for c in combined.columns}
+    return combined.groupby(level=list(combined.index.names), dropna=False, observed=True).agg(how)
+
+
+def aggregates_from_fine(fine, category_median=None):
+    """Agrégats par catégorie, effet Maroc, ville et jour, déduits du groupby fin"""
+    artifacts = {}
+    keys = list(fine.index.names)
+    values = [v for v in VALUE_COLUMNS if f"{v}__sum" in fine.columns]
+
+    if 'Categorie' in keys and 'Prix_Final_MAD__min' in fine.columns:
+        cat = _rollup(fine, 'Categorie', ['Prix_Final_MAD'])
+        # La médiane ne se recompose pas depuis des agrégats partiels : calculée à part (exacte ou sketch)
+        median = category_median.reindex(cat.index) if category_median is not None else np.nan
+        artifacts["category_pricing"] = pd.DataFrame({
+            "min": cat['min'],
+            "mean": cat['Prix_Final_MAD'],
+            "median": median,
+            "max": cat['max'],
+            "std": cat['std'],
+        }).rename_axis('Categorie').reset_index()
+
+    if 'Effet_Maroc' in keys:
+        morocco = _rollup(fine, 'Effet_Maroc', values)[values].rename_axis('Effet_Maroc').reset_index()
+        morocco['Effet_Maroc'] = morocco['Effet_Maroc'].map({1: 'Maroc', 0: 'Autres'})
+        artifacts["morocco_effect"] = morocco
+
+    if 'Ville' in keys:
+        venue = _rollup(fine, 'Ville', values)[values].rename_axis('Ville').reset_index()
+        artifacts["venue_stats"] = venue.sort_values(by=values[0], ascending=False)
+
+    if 'Jour_Semaine' in keys and 'Indice_Demande' in values:
+        day = _rollup(fine, 'Jour_Semaine', ['Indice_Demande'])['Indice_Demande']
+        existing_days = [d for d in DAY_ORDER if d in day.index]
+        artifacts["day_demand"] = day.reindex(existing_days).rename_axis('Jour_Semaine').reset_index()
+
+    return artifacts
+
+
+def price_distribution_frame(counts, edges):
+    return pd.DataFrame({
+        "label": [f"{int(edges[i])}-{int(edges[i + 1])}" for i in range(len(counts))],
+        "count": np.asarray(counts).astype(int),
+    })
+
+
+def correlation_frame(corr):
+    """Matrice de corrélation -> format long (var1, var2, correlation) attendu par le frontend"""
+    corr = corr.round(2).stack().reset_index()
+    corr.columns = ['var1', 'var2', 'correlation']
+    return corr
+
+
+def compute_viz_aggregates(df, bins=15):
+    """Calcule tous les agrégats de visualisation et retourne un dict nom -> DataFrame"""
+    artifacts = {}
+    has_price = 'Prix_Final_MAD' in df.columns
+
+    # 1. Distribution des prix
+    if has_price:
+        counts, edges = np.histogram(df['Prix_Final_MAD'].dropna(), bins=bins)
+        artifacts["price_distribution"] = price_distribution_frame(counts, edges)
+
+    # 2. Passe unique : un seul groupby sur toutes les dimensions disponibles
+    fine = fine_aggregates(df)
+    if fine is not None:
+        median = None
+        if 'Categorie' in df.columns and has_price:
+            median = df.groupby('Categorie', observed=True)['Prix_Final_MAD'].median()
+        artifacts.update(aggregates_from_fine(fine, median))
+
+    # 3. Matrice de corrélation
+    corr_cols = [c for c in CORRELATION_COLUMNS if c in df.columns]
+    if corr_cols:
+        artifacts["correlation"] = correlation_frame(df[corr_cols].corr())
+
+    return artifacts
+
+
+class VizAggregateStore:
+    """Stocke les agrégats en mémoire et sur disque, indexés par la version du dataset"""
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        self.version = None
+        self.artifacts = {}
+        self.builds = 0
+        self._lock = threading.Lock()
+
+    def get(self, version, load_df):
+        """Retourne les agrégats pour cette version du dataset (recalculés seulement si elle a changé)"""
+        with self._lock:
+            if version is None:
+                return None
+            if self.version == version:
+                return self.artifacts
+            if self._load_from_disk(version):
+                return self.artifacts
+
+            df = load_df()
+            if df is None:
+                return None
+            self.artifacts = compute_viz_aggregates(df)
+            self.version = version
+            self.builds += 1
+            self._save_to_disk()
+            return self.artifacts
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+            self.artifacts = {}
+
+    def _load_from_disk(self, version):
+        if not os.path.exists(self.store_path):
+            return False
+        try:
+            with open(self.store_path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if payload.get("version") != version:
+            return False
+        self.artifacts = {
+            name: pd.DataFrame(content["data"], columns=content["columns"])
+            for name, content in payload["artifacts"].items()
+        }
+        self.version = version
+        return True
+
+    def _save_to_disk(self):
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        payload = {
+            "version": self.version,
+            "artifacts": {
+                name: {"columns": list(df.columns), "data": df.astype(object).values.tolist()}
+                for name, df in self.artifacts.items()
+            },
+        }
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, self.store_path)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type non sérialisable: {type(value)}")
+
+
+def export_csv(artifacts, data_path, catalog=None):
+    """Écrit les agrégats en CSV pour le frontend (et en colonnaire si disponible) et retourne la liste des fichiers générés"""
+    files = []
+    for name, filename in VIZ_FILES.items():
+        if name in artifacts:
+            path = os.path.join(data_path, filename)
+            write_dataset(artifacts[name], path, schema={})
+            if catalog is not None:
+                catalog.record(path, artifacts[name])
+            files.append(filename)
+    return files
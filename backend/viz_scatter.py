@@ -0,0 +1,127 @@
+"""
+Nuage de points demande × prix à taille de réponse bornée
+=========================================================
+- "sample" : échantillon reproductible (graine) stratifié par Categorie × Effet_Maroc
+- "grid"   : comptes sur une grille 2D (bins × bins) par Categorie × Effet_Maroc
+- "hex"    : comptes sur une grille hexagonale (même principe que matplotlib.hexbin)
+
+Les modes agrégés sont entièrement vectorisés : chaque point reçoit un
+identifiant de cellule, combiné au code de son groupe, puis np.bincount
+compte toutes les cellules en une passe. Le nombre de cellules renvoyées ne
+dépend que de bins et du nombre de groupes, pas de la taille du dataset.
+"""
+import numpy as np
+import pandas as pd
+
+X_COLUMN = "Indice_Demande"
+Y_COLUMN = "Prix_Final_MAD"
+GROUP_COLUMNS = ["Categorie", "Effet_Maroc"]
+SCATTER_MODES = ("sample", "grid", "hex")
+
+MAX_SAMPLE_POINTS = 5000
+MAX_BINS = 100
+
+
+def scatter_sample(df, n=500, seed=42):
+    """Échantillon stratifié (allocation proportionnelle par groupe), identique pour une même graine"""
+    columns = [c for c in [X_COLUMN, Y_COLUMN] + GROUP_COLUMNS if c in df.columns]
+    n = max(1, min(int(n), MAX_SAMPLE_POINTS))
+    data = df[columns]
+    if len(data) <= n:
+        return data
+    keys = [c for c in GROUP_COLUMNS if c in data.columns]
+    if not keys:
+        return data.sample(n=n, random_state=seed)
+    # Chaque groupe garde sa part du dataset (au moins une ligne), puis on ramène au total exact
+    fraction = n / len(data)
+    parts = [
+        group.sample(n=max(1, min(len(group), int(round(len(group) * fraction)))), random_state=seed)
+        for _, group in data.groupby(keys, dropna=False, observed=True, sort=True)
+    ]
+    sample = pd.concat(parts)
+    if len(sample) > n:
+        sample = sample.sample(n=n, random_state=seed)
+    return sample.sort_index()
+
+
+def _grid_cells(x, y, bins, extent):
+    """Identifiant de cellule et centres (x, y) pour une grille rectangulaire"""
+    xmin, xmax, ymin, ymax = extent
+    sx = (xmax - xmin) / bins or 1.0
+    sy = (ymax - ymin) / bins or 1.0
+    ix = np.clip(((x - xmin) / sx).astype(np.int64), 0, bins - 1)
+    iy = np.clip(((y - ymin) / sy).astype(np.int64), 0, bins - 1)
+    cell = ix * bins + iy
+    return cell, xmin + (ix + 0.5) * sx, ymin + (iy + 0.5) * sy
+
+
+def _hex_cells(x, y, bins, extent):
+    """Identifiant de cellule et centres (x, y) pour une grille hexagonale à deux réseaux décalés"""
+    xmin, xmax, ymin, ymax = extent
+    nx = bins
+    ny = max(1, int(round(bins / np.sqrt(3))))
+    sx = (xmax - xmin) / nx or 1.0
+    sy = (ymax - ymin) / ny or 1.0
+    u = (x - xmin) / sx
+    v = (y - ymin) / sy
+    # Réseau 1 : sommets entiers ; réseau 2 : décalé d'une demi-cellule ; on garde le centre le plus proche
+    ix1, iy1 = np.round(u), np.round(v)
+    ix2, iy2 = np.floor(u), np.floor(v)
+    d1 = (u - ix1) ** 2 + 3.0 * (v - iy1) ** 2
+    d2 = (u - ix2 - 0.5) ** 2 + 3.0 * (v - iy2 - 0.5) ** 2
+    first = d1 < d2
+    cx = np.where(first, ix1, ix2 + 0.5)
+    cy = np.where(first, iy1, iy2 + 0.5)
+    # Identifiant entier unique : coordonnées doublées (demi-entiers -> entiers)
+    cell = (2 * cx).astype(np.int64) * (4 * (ny + 2)) + (2 * cy).astype(np.int64)
+    return cell, xmin + cx * sx, ymin + cy * sy
+
+
+def scatter_density(df, mode="grid", bins=30):
+    """Comptes par cellule (et prix moyen) pour chaque groupe Categorie × Effet_Maroc"""
+    bins = max(2, min(int(bins), MAX_BINS))
+    data = df[[c for c in [X_COLUMN, Y_COLUMN] + GROUP_COLUMNS if c in df.columns]].dropna(subset=[X_COLUMN, Y_COLUMN])
+    result = {"mode": mode, "bins": bins, "total": int(len(data)), "cells": []}
+    if data.empty:
+        return result
+
+    x = data[X_COLUMN].to_numpy(dtype=float)
+    y = data[Y_COLUMN].to_numpy(dtype=float)
+    extent = (float(x.min()), float(x.max()), float(y.min()), float(y.max()))
+    cell, cx, cy = (_hex_cells if mode == "hex" else _grid_cells)(x, y, bins, extent)
+
+    keys = [c for c in GROUP_COLUMNS if c in data.columns]
+    if keys:
+        grouped = data.groupby(keys, dropna=False, observed=True, sort=True)
+        group_codes = grouped.ngroup().to_numpy()
+        group_labels = list(grouped.size().index)
+    else:
+        group_codes, group_labels = np.zeros(len(data), dtype=np.int64), [()]
+
+    # Clé combinée (groupe, cellule) -> comptes et sommes en un seul np.bincount chacun, sans tri
+    n_cells = int(cell.max()) + 1
+    combined = group_codes.astype(np.int64) * n_cells + cell
+    size = len(group_labels) * n_cells
+    counts = np.bincount(combined, minlength=size)
+    occupied = np.flatnonzero(counts)
+    counts = counts[occupied]
+    price_sums = np.bincount(combined, weights=y, minlength=size)[occupied]
+    # Tous les points d'une cellule ont le même centre : la moyenne des centres le redonne
+    centers_x = np.bincount(combined, weights=cx, minlength=size)[occupied] / counts
+    centers_y = np.bincount(combined, weights=cy, minlength=size)[occupied] / counts
+
+    cells = []
+    for key, count, price_sum, center_x, center_y in zip(occupied, counts, price_sums, centers_x, centers_y):
+        label = group_labels[key // n_cells]
+        label = label if isinstance(label, tuple) else (label,)
+        entry = {name: (value.item() if hasattr(value, "item") else value) for name, value in zip(keys, label)}
+        entry.update({
+            "x": round(float(center_x), 4),
+            "y": round(float(center_y), 4),
+            "count": int(count),
+            "mean_price": round(float(price_sum / count), 2),
+        })
+        cells.append(entry)
+    result["extent"] = {"x": [extent[0], extent[1]], "y": [extent[2], extent[3]]}
+    result["cells"] = cells
+    return result
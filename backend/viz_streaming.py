@@ -0,0 +1,223 @@
+"""
+Agrégation hors mémoire (par morceaux) pour les visualisations
+==============================================================
+Même résultat que compute_viz_aggregates, sans jamais charger tout le CSV :
+le fichier est lu par morceaux (chunksize lignes) et chaque morceau produit des
+agrégats partiels fusionnables :
+
+- histogramme des prix à bornes fixes (min/max lus lors d'une première passe
+  qui ne charge que les colonnes numériques utiles)
+- groupby fin (sommes, comptes, sommes des carrés, min, max) -> moyennes et
+  écarts-types exacts
+- sommes croisées par paire de variables -> covariance et corrélation exactes
+  (observations complètes par paire, comme DataFrame.corr)
+- t-digest par catégorie -> médiane approchée (exacte sur les petites catégories)
+- échantillon stratifié du nuage de points
+
+Les morceaux peuvent être traités dans un pool de processus ; le nombre de
+morceaux en cours est borné, donc la mémoire aussi.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from viz_aggregates import (CORRELATION_COLUMNS, aggregates_from_fine, correlation_frame, fine_aggregates,
+                            merge_fine_aggregates, price_distribution_frame)
+from viz_scatter import GROUP_COLUMNS, X_COLUMN, Y_COLUMN
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class TDigest:
+    """t-digest fusionnable (fonction d'échelle k1) pour estimer des quantiles en mémoire bornée"""
+
+    def __init__(self, compression=1000):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if len(other.means):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        # Peu de points : on les garde tous (quantiles exacts)
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        # k1(q) = δ/(2π)·asin(2q-1) : des centroïdes fins aux extrémités, larges au centre
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        cluster = np.floor(k - k.min()).astype(np.int64)
+        w = np.bincount(cluster, weights=weights)
+        m = np.bincount(cluster, weights=weights * means)
+        keep = w > 0
+        self.weights, self.means = w[keep], m[keep] / w[keep]
+
+    def quantile(self, q):
+        if not len(self.means):
+            return np.nan
+        positions = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[0.0], positions, [self.count]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * self.count, xp, fp))
+
+
+class _PairwiseMoments:
+    """Sommes additives par paire (n, Σx, Σx², Σxy) sur les observations complètes de chaque paire"""
+
+    def __init__(self, columns, shift):
+        self.columns = columns
+        self.shift = shift  # centrage approximatif pour limiter les pertes de précision
+        p = len(columns)
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros((p, p))
+
+    def update(self, frame):
+        X = frame[self.columns].to_numpy(dtype=float) - self.shift
+        mask = ~np.isnan(X)
+        M = mask.astype(float)
+        X0 = np.where(mask, X, 0.0)
+        self.n += M.T @ M
+        self.sx += X0.T @ M      # sx[i, j] = Σ x_i sur les lignes où i et j sont présents
+        self.sxx += (X0 * X0).T @ M
+        self.sxy += X0.T @ X0
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.sx += other.sx
+        self.sxx += other.sxx
+        self.sxy += other.sxy
+        return self
+
+    def correlation(self):
+        sy = self.sx.T
+        syy = self.sxx.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.n * self.sxy - self.sx * sy
+            var_x = self.n * self.sxx - self.sx ** 2
+            var_y = self.n * syy - sy ** 2
+            corr = cov / np.sqrt(var_x * var_y)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.diag(self.n) > 1, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def _scan(csv_path, chunksize):
+    """Première passe légère : nombre de lignes, bornes des prix, colonnes et centrage des corrélations"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    corr_cols = [c for c in CORRELATION_COLUMNS if c in header]
+    usecols = list(dict.fromkeys(corr_cols + (['Prix_Final_MAD'] if 'Prix_Final_MAD' in header else [])))
+    rows, low, high, shift = 0, np.inf, -np.inf, None
+    for chunk in pd.read_csv(csv_path, usecols=usecols or None, chunksize=chunksize):
+        rows += len(chunk)
+        if 'Prix_Final_MAD' in chunk.columns and chunk['Prix_Final_MAD'].notna().any():
+            low = min(low, float(chunk['Prix_Final_MAD'].min()))
+            high = max(high, float(chunk['Prix_Final_MAD'].max()))
+        if shift is None and corr_cols:
+            shift = np.nan_to_num(chunk[corr_cols].mean().to_numpy(dtype=float))
+    return {"rows": rows, "price_range": (low, high) if low <= high else None,
+            "corr_cols": corr_cols, "shift": shift}
+
+
+def _partial(chunk, edges, corr_cols, shift, scatter_fraction, seed):
+    """Agrégats partiels d'un morceau (exécuté dans un processus du pool si demandé)"""
+    partial = {"fine": fine_aggregates(chunk), "hist": None, "digests": {}, "moments": None, "scatter": None}
+    if edges is not None:
+        partial["hist"] = np.histogram(chunk['Prix_Final_MAD'].dropna(), bins=edges)[0]
+    if 'Categorie' in chunk.columns and 'Prix_Final_MAD' in chunk.columns:
+        for cat, prices in chunk.groupby('Categorie', observed=True)['Prix_Final_MAD']:
+            partial["digests"][cat] = TDigest().update(prices.to_numpy())
+    if corr_cols:
+        partial["moments"] = _PairwiseMoments(corr_cols, shift).update(chunk)
+    if scatter_fraction:
+        columns = [c for c in [X_COLUMN, Y_COLUMN] + GROUP_COLUMNS if c in chunk.columns]
+        keys = [c for c in GROUP_COLUMNS if c in chunk.columns]
+        data = chunk[columns]
+        if keys:
+            partial["scatter"] = data.groupby(keys, dropna=False, observed=True, group_keys=False).sample(
+                frac=scatter_fraction, random_state=seed)
+        else:
+            partial["scatter"] = data.sample(frac=scatter_fraction, random_state=seed)
+    return partial
+
+
+def stream_viz_aggregates(csv_path, chunksize=DEFAULT_CHUNKSIZE, bins=15, workers=0, scatter_n=0, seed=42):
+    """Calcule les agrégats de visualisation par morceaux ; retourne (agrégats, échantillon du nuage ou None)"""
+    scan = _scan(csv_path, chunksize)
+    edges = None
+    if scan["price_range"] is not None:
+        edges = np.linspace(scan["price_range"][0], scan["price_range"][1], bins + 1)
+    scatter_fraction = min(1.0, scatter_n / scan["rows"]) if scatter_n and scan["rows"] else 0.0
+    args = (edges, scan["corr_cols"], scan["shift"], scatter_fraction, seed)
+
+    fine, hist, digests, moments, samples = None, None, {}, None, []
+
+    def absorb(partial):
+        nonlocal fine, hist, moments
+        fine = merge_fine_aggregates([fine, partial["fine"]])
+        if partial["hist"] is not None:
+            hist = partial["hist"] if hist is None else hist + partial["hist"]
+        for cat, digest in partial["digests"].items():
+            digests[cat] = digests[cat].merge(digest) if cat in digests else digest
+        if partial["moments"] is not None:
+            moments = partial["moments"] if moments is None else moments.merge(partial["moments"])
+        if partial["scatter"] is not None:
+            samples.append(partial["scatter"])
+
+    chunks = pd.read_csv(csv_path, chunksize=chunksize)
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for chunk in chunks:
+                pending.append(pool.submit(_partial, chunk, *args))
+                # Au plus 2 morceaux en attente par processus : la mémoire reste bornée
+                if len(pending) >= 2 * workers:
+                    absorb(pending.pop(0).result())
+            for future in pending:
+                absorb(future.result())
+    else:
+        for chunk in chunks:
+            absorb(_partial(chunk, *args))
+
+    artifacts = {}
+    if hist is not None:
+        artifacts["price_distribution"] = price_distribution_frame(hist, edges)
+    if fine is not None:
+        median = pd.Series({cat: d.quantile(0.5) for cat, d in digests.items()}, dtype=float) if digests else None
+        artifacts.update(aggregates_from_fine(fine, median))
+    if moments is not None:
+        artifacts["correlation"] = correlation_frame(moments.correlation())
+
+    scatter = None
+    if samples:
+        scatter = pd.concat(samples)
+        if len(scatter) > scatter_n:
+            scatter = scatter.sample(n=scatter_n, random_state=seed)
+        scatter = scatter.sort_index()
+    return artifacts, scatter
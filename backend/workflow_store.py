@@ -0,0 +1,247 @@
+"""
+État du workflow partagé entre workers
+======================================
+Avec plusieurs workers gunicorn, chaque processus a son propre pipeline en
+mémoire. L'état de référence (étapes terminées, clés des checkpoints, version
+des artefacts, jobs) vit donc dans un store partagé, versionné par un numéro de
+révision : un worker qui voit une révision plus récente que la sienne se
+resynchronise (les DataFrames et le modèle sont restaurés depuis les
+checkpoints et le stockage d'artefacts, eux aussi sur disque).
+
+Backends (variable CAN2025_STATE_STORE) :
+- "sqlite" : fichier SQLite en mode WAL (par défaut)
+- "file"   : fichier JSON écrit de façon atomique, protégé par un verrou fichier
+- "memory" : en mémoire, pour un seul processus
+"""
+import contextlib
+import copy
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows : le verrou ne protège que les threads du processus
+    fcntl = None
+
+MAX_JOBS = 200
+
+
+class FileLock:
+    """Verrou exclusif inter-processus (flock) et réentrant pour le thread qui le détient
+
+    Sans chemin (store en mémoire), seuls les threads du processus sont sérialisés.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @contextlib.contextmanager
+    def hold(self):
+        with self._thread_lock:
+            if self._depth == 0 and fcntl is not None and self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a+")
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._file is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
+
+
+class MemoryStateStore:
+    def __init__(self):
+        self._lock = FileLock(None)
+        self._data_lock = threading.Lock()
+        self._revision = 0
+        self._state = None
+        self._jobs = {}
+
+    def lock(self):
+        return self._lock.hold()
+
+    def revision(self):
+        return self._revision
+
+    def load(self):
+        with self._data_lock:
+            return self._revision, copy.deepcopy(self._state)
+
+    def save(self, state):
+        with self._data_lock:
+            self._revision += 1
+            self._state = copy.deepcopy(state)
+            return self._revision
+
+    def put_job(self, job):
+        with self._data_lock:
+            self._jobs[job["id"]] = job
+            for old in list(self._jobs)[:max(0, len(self._jobs) - MAX_JOBS)]:
+                del self._jobs[old]
+
+    def get_job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list_jobs(self):
+        return list(self._jobs.values())
+
+
+class FileStateStore:
+    """Un fichier JSON {revision, state, jobs} ; toute écriture se fait sous verrou puis os.replace"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock(path + ".lock")
+        # Verrou court propre aux écritures, distinct du verrou des étapes (tenu pendant un calcul)
+        self._write_lock = FileLock(path + ".write.lock")
+
+    def lock(self):
+        return self._lock.hold()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"revision": 0, "state": None, "jobs": {}}
+
+    def _write(self, data):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
+
+    def revision(self):
+        return self._read()["revision"]
+
+    def load(self):
+        data = self._read()
+        return data["revision"], data["state"]
+
+    def save(self, state):
+        with self._write_lock.hold():
+            data = self._read()
+            data["revision"] += 1
+            data["state"] = state
+            self._write(data)
+            return data["revision"]
+
+    def put_job(self, job):
+        with self._write_lock.hold():
+            data = self._read()
+            jobs = data.setdefault("jobs", {})
+            jobs[job["id"]] = job
+            for old in list(jobs)[:max(0, len(jobs) - MAX_JOBS)]:
+                del jobs[old]
+            self._write(data)
+
+    def get_job(self, job_id):
+        return self._read().get("jobs", {}).get(job_id)
+
+    def list_jobs(self):
+        return list(self._read().get("jobs", {}).values())
+
+
+class SQLiteStateStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock(path + ".lock")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS workflow_state ("
+                         "id INTEGER PRIMARY KEY CHECK (id = 1), revision INTEGER NOT NULL, "
+                         "state TEXT, updated_at TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                         "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at TEXT)")
+        conn.close()
+
+    def _connect(self):
+        # Une connexion par appel : les connexions sqlite3 ne se partagent pas entre threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lock(self):
+        return self._lock.hold()
+
+    def revision(self):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT revision FROM workflow_state WHERE id = 1").fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else 0
+
+    def load(self):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT revision, state FROM workflow_state WHERE id = 1").fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return 0, None
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def save(self, state):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT revision FROM workflow_state WHERE id = 1").fetchone()
+                revision = (row[0] if row else 0) + 1
+                conn.execute(
+                    "INSERT INTO workflow_state (id, revision, state, updated_at) VALUES (1, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET revision = excluded.revision, state = excluded.state, "
+                    "updated_at = excluded.updated_at",
+                    (revision, json.dumps(state, ensure_ascii=False, default=str), datetime.now().isoformat()))
+        finally:
+            conn.close()
+        return revision
+
+    def put_job(self, job):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO jobs (id, data, updated_at) VALUES (?, ?, ?)",
+                             (job["id"], json.dumps(job, ensure_ascii=False, default=str), datetime.now().isoformat()))
+                conn.execute("DELETE FROM jobs WHERE id NOT IN "
+                             "(SELECT id FROM jobs ORDER BY updated_at DESC LIMIT ?)", (MAX_JOBS,))
+        finally:
+            conn.close()
+
+    def get_job(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def list_jobs(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT data FROM jobs ORDER BY updated_at").fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+
+def create_state_store(kind, root):
+    """Instancie le store demandé ("sqlite", "file" ou "memory") dans le dossier root"""
+    if kind == "memory":
+        return MemoryStateStore()
+    if kind == "file":
+        return FileStateStore(os.path.join(root, "workflow_state.json"))
+    if kind == "sqlite":
+        return SQLiteStateStore(os.path.join(root, "workflow_state.sqlite3"))
+    raise ValueError(f"Store d'état inconnu: {kind} (attendu: sqlite, file, memory)")